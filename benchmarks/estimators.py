@@ -0,0 +1,207 @@
+'''
+Accuracy and cost benchmark of the ETA estimators in `progressbar.algorithms`.
+
+Every estimator is fed the `(elapsed, value)` samples of a progress trace and
+after every sample the estimated time to go is compared with the actual time
+to go. The error is reported relative to the total duration of the trace so
+traces of different lengths can be compared.
+
+The built-in traces are generated with a fixed seed so the results are
+reproducible. Recorded traces can be added with `--trace`, these are files
+with one JSON object per line containing (at least) the `elapsed` seconds and
+the `value`, such as the traces written by `progressbar.tracing`:
+
+    {"elapsed": 0.25, "value": 120}
+
+On the generated traces the estimators only beat the average rate when the
+rate changes over time (`slowing` and `speeding`). On the `bursty` trace the
+rate is random but steady on average, so the average rate is the most
+accurate and the median is far off since it ignores the fast bursts.
+
+Usage:
+
+    python benchmarks/estimators.py
+    python benchmarks/estimators.py --trace job.ndjson --json
+'''
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import statistics
+import sys
+import time
+import typing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from progressbar import algorithms
+
+Trace = typing.List[typing.Tuple[float, float]]
+
+
+class AverageRate(algorithms.RateEstimator):
+    '''The average rate since the start, the baseline used by `ETA`.'''
+
+    _start: tuple[float, float] | None = None
+
+    def _update(self, value, seconds, rate, delta_time):
+        if self._start is None:
+            self._start = self._last
+        start_value, start_seconds = self._start  # type: ignore[misc]
+        return (value - start_value) / (seconds - start_seconds)
+
+
+#: The estimators to compare, by name and constructor parameters
+ESTIMATORS: dict[str, tuple[type[algorithms.RateEstimator], dict]] = dict(
+    average=(AverageRate, {}),
+    linear_regression=(algorithms.WindowedLinearRegression, {}),
+    kalman=(algorithms.KalmanFilter, {}),
+    median=(algorithms.MedianOfRates, {}),
+    holt_winters=(algorithms.HoltWinters, {}),
+)
+
+#: The first part of a trace is not scored since no estimator can know much
+WARMUP = 0.05
+
+
+def generate_trace(
+    rates: typing.Callable[[float], float],
+    duration: float = 600,
+    interval: float = 0.1,
+    jitter: float = 0.2,
+    seed: int = 0,
+) -> Trace:
+    '''Generate a trace with the rate `rates(fraction_of_duration)`.'''
+    rng = random.Random(seed)
+    trace: Trace = []
+    elapsed = value = 0.0
+    while elapsed < duration:
+        trace.append((elapsed, value))
+        step = interval * rng.uniform(1 - jitter, 1 + jitter)
+        rate = max(rates(elapsed / duration), 0)
+        value += rate * step * rng.uniform(1 - jitter, 1 + jitter)
+        elapsed += step
+    trace.append((elapsed, value))
+    return trace
+
+
+def builtin_traces() -> dict[str, Trace]:
+    bursts = random.Random(1)
+    return dict(
+        steady=generate_trace(lambda fraction: 100),
+        slowing=generate_trace(lambda fraction: 200 * (1 - 0.9 * fraction)),
+        speeding=generate_trace(lambda fraction: 20 + 180 * fraction),
+        # Bursts of 10x the normal rate with pauses in between
+        bursty=generate_trace(
+            lambda fraction: bursts.choice((0, 10, 10, 100)),
+            seed=1,
+        ),
+        stalls=generate_trace(
+            lambda fraction: 0 if math.sin(fraction * 40) > 0.7 else 100,
+            seed=2,
+        ),
+    )
+
+
+def load_trace(path: Path) -> Trace:
+    trace = []
+    with path.open() as fh:
+        for line in fh:
+            if line.strip():
+                sample = json.loads(line)
+                trace.append((float(sample['elapsed']), sample['value']))
+    return trace
+
+
+def run(
+    estimator: algorithms.RateEstimator,
+    trace: Trace,
+) -> tuple[float, float]:
+    '''Return the mean relative error and the nanoseconds per update.'''
+    end_time, end_value = trace[-1]
+    start = WARMUP * len(trace)
+    errors = []
+    cost = 0
+    for index, (elapsed, value) in enumerate(trace):
+        before = time.perf_counter_ns()
+        estimator.update(value, elapsed)
+        eta = estimator.eta(end_value - value)
+        cost += time.perf_counter_ns() - before
+
+        if index >= start:
+            actual = end_time - elapsed
+            if eta is None:
+                # An unknown ETA is scored as the worst possible guess
+                eta = end_time
+            errors.append(min(abs(eta - actual) / end_time, 1.0))
+
+    return statistics.fmean(errors), cost / len(trace)
+
+
+def benchmark(traces: dict[str, Trace]) -> list[dict[str, typing.Any]]:
+    results = []
+    for trace_name, trace in traces.items():
+        for name, (estimator_class, parameters) in ESTIMATORS.items():
+            error, cost = run(estimator_class(**parameters), trace)
+            results.append(
+                dict(
+                    trace=trace_name,
+                    estimator=name,
+                    samples=len(trace),
+                    mean_relative_error=round(error, 6),
+                    ns_per_update=round(cost),
+                ),
+            )
+    return results
+
+
+def print_table(results: list[dict[str, typing.Any]]) -> None:
+    print(f'{"trace":12} {"estimator":18} {"error":>8} {"ns/update":>10}')
+    for result in results:
+        print(
+            f'{result["trace"]:12} {result["estimator"]:18} '
+            f'{result["mean_relative_error"]:8.2%} '
+            f'{result["ns_per_update"]:10d}',
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument(
+        '--trace',
+        type=Path,
+        action='append',
+        default=[],
+        help='NDJSON trace with `elapsed` and `value` keys (repeatable)',
+    )
+    parser.add_argument(
+        '--no-builtin',
+        action='store_true',
+        help='Skip the generated traces',
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Write the results as JSON',
+    )
+    args = parser.parse_args(argv)
+
+    traces = {} if args.no_builtin else builtin_traces()
+    for path in args.trace:
+        traces[path.stem] = load_trace(path)
+
+    results = benchmark(traces)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,335 @@
+'''
+Benchmarks of the hot paths of progressbar.
+
+Every benchmark reports a single number with its unit, the best of a couple
+of repeats to reduce the noise of other processes. The results can be
+written as JSON and compared with a previous run to catch performance
+regressions before a release:
+
+    python benchmarks/hot_paths.py --json baseline.json
+    # ... make changes ...
+    python benchmarks/hot_paths.py --compare baseline.json
+
+The comparison exits with status 1 if any benchmark is more than
+`--threshold` (default 10%) slower than the baseline. Use `--quick` for a
+fast but noisier run and `-k` to select benchmarks by (part of) their name.
+'''
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+import typing
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import progressbar
+from progressbar import utils
+from progressbar.terminal import colors
+
+Result = typing.Dict[str, typing.Any]
+
+
+class Options(typing.NamedTuple):
+    #: The number of updates or items per measurement
+    items: int
+    #: The number of measurements, the best one is reported
+    repeat: int
+    #: The size of the file for the CLI throughput in bytes
+    file_size: int
+
+
+def best_of(repeat: int, func: typing.Callable[[], typing.Any]) -> float:
+    '''The fastest of `repeat` calls of `func` in seconds.'''
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def result(
+    name: str,
+    value: float,
+    unit: str,
+    lower_is_better: bool = True,
+) -> Result:
+    return dict(
+        name=name,
+        value=round(value, 3),
+        unit=unit,
+        lower_is_better=lower_is_better,
+    )
+
+
+def bench_update(options: Options) -> typing.Iterator[Result]:
+    items = options.items
+
+    def update(force: bool = False):
+        bar = progressbar.ProgressBar(max_value=items, fd=io.StringIO())
+        bar.start()
+        for i in range(items):
+            bar.update(i, force=force)
+        bar.finish()
+
+    seconds = best_of(options.repeat, update)
+    yield result('update.default_widgets', seconds / items * 1e9, 'ns')
+
+    # Every update renders the bar, this is the cost of a single redraw
+    seconds = best_of(options.repeat, lambda: update(force=True))
+    yield result('update.forced_render', seconds / items * 1e6, 'us')
+
+
+def bench_iterate(options: Options) -> typing.Iterator[Result]:
+    items = options.items * 10
+
+    def bare():
+        for _ in range(items):
+            pass
+
+    def wrapped(fast_iteration: bool):
+        bar = progressbar.ProgressBar(fd=io.StringIO())
+        for _ in bar(range(items), fast_iteration=fast_iteration):
+            pass
+
+    baseline = best_of(options.repeat, bare)
+    for name, fast_iteration in (('default', False), ('fast', True)):
+        seconds = best_of(options.repeat, lambda: wrapped(fast_iteration))
+        yield result(
+            f'iterate.overhead_{name}',
+            (seconds - baseline) / items * 1e9,
+            'ns',
+        )
+
+
+def bench_multibar(options: Options) -> typing.Iterator[Result]:
+    for count in (10, 100, 1000):
+        multibar = progressbar.MultiBar(
+            fd=io.StringIO(),
+            remove_finished=None,
+        )
+        bars = []
+        for i in range(count):
+            bar = multibar[f'bar {i}']
+            bar.max_value = 100
+            bar.start()
+            bars.append(bar)
+
+        # The frames to render depend on the amount of bars so the total
+        # amount of work is about the same for every count
+        frames = max(options.items // count // 10, 3)
+
+        def full():
+            # Every bar is formatted and written again
+            for _ in range(frames):
+                multibar.render(force=True)
+
+        def incremental():
+            # Only the updated bar is formatted and written again
+            for frame in range(frames):
+                bars[frame % count].update(frame % 100)
+                multibar.render()
+
+        seconds = best_of(options.repeat, full)
+        yield result(
+            f'multibar.render_{count}.full',
+            seconds / frames * 1e6,
+            'us',
+        )
+        seconds = best_of(options.repeat, incremental)
+        yield result(
+            f'multibar.render_{count}.incremental',
+            seconds / frames * 1e6,
+            'us',
+        )
+
+
+def bench_colors(options: Options) -> typing.Iterator[Result]:
+    palette = [colors.red, colors.green, colors.blue, colors.yellow]
+    text = ''.join(
+        palette[i % len(palette)](f'segment {i} ') for i in range(100)
+    )
+    calls = max(options.items // 10, 1)
+
+    for name, func in (
+        ('len_color', utils.len_color),
+        ('no_color', utils.no_color),
+    ):
+        seconds = best_of(
+            options.repeat,
+            lambda: [func(text) for _ in range(calls)],
+        )
+        yield result(f'colors.{name}', seconds / calls * 1e6, 'us')
+
+    gradient = colors.dark_gradient
+    values = [i / calls for i in range(calls)]
+    seconds = best_of(
+        options.repeat,
+        lambda: [gradient.get_color(value) for value in values],
+    )
+    yield result('colors.gradient_lookup', seconds / calls * 1e9, 'ns')
+
+
+def bench_cli(options: Options) -> typing.Iterator[Result]:
+    def run(path: str):
+        subprocess.run(
+            [sys.executable, '-m', 'progressbar', path, '-o', os.devnull],
+            check=True,
+            cwd=ROOT,
+            stderr=subprocess.DEVNULL,
+        )
+
+    with contextlib.ExitStack() as stack:
+        directory = stack.enter_context(tempfile.TemporaryDirectory())
+        empty = Path(directory, 'empty')
+        empty.touch()
+        large = Path(directory, 'large')
+        with large.open('wb') as fh:
+            block = os.urandom(1 << 20)
+            for _ in range(options.file_size // len(block)):
+                fh.write(block)
+
+        # Subtract the startup time of the interpreter
+        startup = best_of(options.repeat, lambda: run(str(empty)))
+        seconds = best_of(options.repeat, lambda: run(str(large)))
+        size = large.stat().st_size
+        yield result(
+            'cli.throughput',
+            size / max(seconds - startup, 1e-9) / 1e6,
+            'MB/s',
+            lower_is_better=False,
+        )
+
+
+BENCHMARKS: dict[str, typing.Callable[[Options], typing.Iterator[Result]]]
+BENCHMARKS = dict(
+    update=bench_update,
+    iterate=bench_iterate,
+    multibar=bench_multibar,
+    colors=bench_colors,
+    cli=bench_cli,
+)
+
+
+def run_benchmarks(
+    options: Options,
+    selected: list[str],
+) -> list[Result]:
+    results = []
+    for name, benchmark in BENCHMARKS.items():
+        if selected and not any(part in name for part in selected):
+            continue
+        for result_ in benchmark(options):
+            print(
+                f'{result_["name"]:36} {result_["value"]:12.3f} '
+                f'{result_["unit"]}',
+                file=sys.stderr,
+            )
+            results.append(result_)
+    return results
+
+
+def compare(
+    baseline: list[Result],
+    results: list[Result],
+    threshold: float,
+) -> list[str]:
+    '''Print the changes against the baseline and return the regressions.'''
+    previous = {result_['name']: result_ for result_ in baseline}
+    regressions = []
+    print(f'{"benchmark":36} {"baseline":>12} {"current":>12} {"change":>8}')
+    for result_ in results:
+        old = previous.get(result_['name'])
+        if old is None or old['unit'] != result_['unit']:
+            continue
+
+        new_value = max(result_['value'], 1e-9)
+        old_value = max(old['value'], 1e-9)
+        # Positive changes are always slower, regardless of the unit
+        if result_['lower_is_better']:
+            change = new_value / old_value - 1
+        else:
+            change = old_value / new_value - 1
+
+        marker = ''
+        if change > threshold:
+            marker = ' REGRESSION'
+            regressions.append(result_['name'])
+        print(
+            f'{result_["name"]:36} {old["value"]:12.3f} '
+            f'{result_["value"]:12.3f} {change:+8.1%}{marker}',
+        )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument(
+        '-k',
+        dest='selected',
+        action='append',
+        default=[],
+        help=f'Only run the matching benchmarks of: {", ".join(BENCHMARKS)}',
+    )
+    parser.add_argument(
+        '--json',
+        type=Path,
+        help='Write the results to this file, use `-` for stdout',
+    )
+    parser.add_argument(
+        '--compare',
+        type=Path,
+        help='Compare with the results of a previous `--json` run',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='The allowed slowdown when comparing (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--quick',
+        action='store_true',
+        help='Use less items and repeats, faster but noisier',
+    )
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        options = Options(items=2_000, repeat=3, file_size=16 << 20)
+    else:
+        options = Options(items=20_000, repeat=5, file_size=256 << 20)
+
+    results = run_benchmarks(options, args.selected)
+    if args.json:
+        report = dict(
+            created=datetime.now().isoformat(timespec='seconds'),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            progressbar=progressbar.__version__,
+            options=options._asdict(),
+            results=results,
+        )
+        if str(args.json) == '-':
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with args.json.open('w') as fh:
+                json.dump(report, fh, indent=2)
+
+    if args.compare:
+        with args.compare.open() as fh:
+            baseline = json.load(fh)['results']
+        if compare(baseline, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
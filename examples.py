@@ -838,6 +838,15 @@ def percentage_on_generators():
         time.sleep(0.02)
 
 
+@example
+def background_render_example():
+    bar = progressbar.BackgroundProgressBar(max_value=200).start()
+    for i in range(200):
+        bar.update(i + 1)
+        time.sleep(0.02)
+    bar.finish()
+
+
 def test(*tests):
     if tests:
         no_tests = True
@@ -4,11 +4,22 @@ from .__about__ import __author__, __version__
 from .algorithms import (
     DoubleExponentialMovingAverage,
     ExponentialMovingAverage,
+    HoltWinters,
+    KalmanFilter,
+    MedianOfRates,
+    RateEstimator,
     SmoothingAlgorithm,
+    WindowedLinearRegression,
+)
+from .bar import (
+    BackgroundProgressBar,
+    DataTransferBar,
+    LogProgressBar,
+    NullBar,
+    ProgressBar,
 )
-from .bar import DataTransferBar, NullBar, ProgressBar
 from .base import UnknownLength
-from .multi import MultiBar, SortKey
+from .multi import FrameScheduler, MultiBar, SortKey
 from .shortcuts import progressbar
 from .terminal.stream import LineOffsetStreamWrapper
 from .utils import len_color, streams
@@ -56,6 +67,11 @@ __all__ = [
     'SmoothingAlgorithm',
     'ExponentialMovingAverage',
     'DoubleExponentialMovingAverage',
+    'RateEstimator',
+    'WindowedLinearRegression',
+    'KalmanFilter',
+    'MedianOfRates',
+    'HoltWinters',
     'DataSize',
     'FileTransferSpeed',
     'AdaptiveTransferSpeed',
@@ -70,6 +86,8 @@ __all__ = [
     'UnknownLength',
     'ProgressBar',
     'DataTransferBar',
+    'BackgroundProgressBar',
+    'LogProgressBar',
     'RotatingMarker',
     'VariableMixin',
     'MultiRangeBar',
@@ -87,5 +105,6 @@ __all__ = [
     'LineOffsetStreamWrapper',
     'MultiBar',
     'SortKey',
+    'FrameScheduler',
     'JobStatusBar',
 ]
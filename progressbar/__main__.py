@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import contextlib
+import os
 import pathlib
 import sys
 import typing
@@ -9,6 +10,8 @@ from pathlib import Path
 from typing import BinaryIO, TextIO
 
 import progressbar
+import progressbar.transfer
+import progressbar.watchfd
 
 
 def size_to_bytes(size_str: str) -> int:
@@ -57,6 +60,20 @@ def size_to_bytes(size_str: str) -> int:
     return int(size_str) * (1024**exponent)
 
 
+def format_rate(rate: float) -> str:
+    '''
+    Format a rate in bytes per second with binary prefixes.
+
+    >>> format_rate(512)
+    '512.0 B/s'
+    >>> format_rate(10 * 1024 * 1024)
+    '10.0 MiB/s'
+    '''
+    prefixes = ('', 'Ki', 'Mi', 'Gi', 'Ti', 'Pi')
+    scaled, power = progressbar.utils.scale_1024(rate, len(prefixes))
+    return f'{scaled:.1f} {prefixes[power]}B/s'
+
+
 def create_argument_parser() -> argparse.ArgumentParser:
     '''
     Create the argument parser for the `progressbar` command.
@@ -204,7 +221,10 @@ def create_argument_parser() -> argparse.ArgumentParser:
         help='Use transfer buffer size of BYTES.',
     )
     parser.add_argument(
-        '-C', '--no-splice', action='store_true', help='Never use splice.'
+        '-C',
+        '--no-splice',
+        action='store_true',
+        help='Never use splice, sendfile or copy_file_range.',
     )
     parser.add_argument(
         '-E', '--skip-errors', action='store_true', help='Ignore read errors.'
@@ -240,7 +260,11 @@ def create_argument_parser() -> argparse.ArgumentParser:
         help='Discard input data instead of transferring it.',
     )
     parser.add_argument(
-        '-d', '--watchfd', type=str, help='Watch file descriptor of process.'
+        '-d',
+        '--watchfd',
+        type=str,
+        metavar='PID[:FD]',
+        help='Watch the file descriptors of process PID, or only FD.',
     )
     parser.add_argument(
         '-R',
@@ -282,10 +306,17 @@ def main(argv: list[str] | None = None):  # noqa: C901
     parser: argparse.ArgumentParser = create_argument_parser()
     args: argparse.Namespace = parser.parse_args(argv)
 
+    if args.watchfd:
+        _watch(parser, args)
+        return
+
     with contextlib.ExitStack() as stack:
-        output_stream: typing.IO[typing.Any] = _get_output_stream(
-            args.output, args.line_mode, stack
-        )
+        # Discarding the data skips all writes, e.g. to benchmark reading
+        output_stream: typing.IO[typing.Any] | None = None
+        if not args.discard:
+            output_stream = _get_output_stream(
+                args.output, args.line_mode, stack
+            )
 
         input_paths: list[BinaryIO | TextIO | Path] = []
         total_size: int = 0
@@ -338,18 +369,40 @@ def main(argv: list[str] | None = None):  # noqa: C901
             widgets.append(' ')
             widgets.append(progressbar.AdaptiveETA())
 
+        rate_limiter = None
+        if args.rate_limit:
+            rate = size_to_bytes(args.rate_limit)
+            rate_limiter = progressbar.transfer.RateLimiter(rate)
+            # The achieved rate next to the configured limit
+            widgets += [
+                ' ',
+                progressbar.AdaptiveTransferSpeed(),
+                f' (limit {format_rate(rate)})',
+            ]
+
         # Initialize the progress bar
         bar = progressbar.ProgressBar(
-            # widgets=widgets,
+            widgets=widgets,
             max_value=total_size or None,
             max_error=False,
         )
 
         # Data processing and updating the progress bar
         buffer_size = (
-            size_to_bytes(args.buffer_size) if args.buffer_size else 1024
+            size_to_bytes(args.buffer_size) if args.buffer_size else None
         )
         total_transferred = 0
+        # Without a buffer size the buffer adapts to the throughput
+        transfer = progressbar.transfer.Transfer(
+            output_stream,
+            bar.update,
+            buffer_size=buffer_size,
+            zero_copy=not args.no_splice,
+            update_interval=args.interval or bar.min_poll_interval,
+            rate_limiter=rate_limiter,
+            direct_io=args.direct_io,
+            sync=args.sync,
+        )
 
         bar.start()
         with contextlib.suppress(KeyboardInterrupt):
@@ -361,23 +414,39 @@ def main(argv: list[str] | None = None):  # noqa: C901
                 else:
                     input_stream = input_path
 
-                while True:
-                    data: str | bytes
-                    if args.line_mode:
-                        data = input_stream.readline(buffer_size)
-                    else:
-                        data = input_stream.read(buffer_size)
+                if not args.line_mode:
+                    transfer.copy(input_stream)
+                    continue
 
+                while True:
+                    data: str = input_stream.readline(buffer_size or 1024)
                     if not data:
                         break
 
-                    output_stream.write(data)
+                    if output_stream is not None:
+                        output_stream.write(data)
                     total_transferred += len(data)
                     bar.update(total_transferred)
 
         bar.finish(dirty=True)
 
 
+def _watch(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    try:
+        pid, fd = progressbar.watchfd.parse_target(args.watchfd)
+    except ValueError:
+        parser.error(f'Expected PID or PID:FD for --watchfd: {args.watchfd}')
+
+    if not os.path.isdir(f'/proc/{pid}'):
+        parser.error(f'Process not found: {pid}')
+
+    watcher = progressbar.watchfd.FdWatcher(pid, fd)
+    try:
+        watcher.run(args.interval or 1.0)
+    except PermissionError:
+        parser.error(f'Not allowed to watch process: {pid}')
+
+
 def _get_output_stream(
     output: str | None,
     line_mode: bool,
@@ -0,0 +1,254 @@
+'''
+Progressbar support for asyncio.
+
+The `AsyncProgressBar` never renders or writes from within `update()`.
+Redraws are scheduled on the event loop using `loop.call_later` and the
+rendered output is written to the actual stream from the loop's executor so
+a slow terminal never blocks the event loop.
+'''
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import typing
+
+from . import bar, base
+from .terminal import stream
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncStreamWriter(stream.TextIOOutputWrapper):
+    '''
+    Stream wrapper that buffers writes and writes them from an executor.
+
+    At most one write to the wrapped stream is in progress at any time, the
+    output that is flushed in the meantime is coalesced into the next write.
+    All methods need to be called from the event loop thread.
+    '''
+
+    loop: asyncio.AbstractEventLoop
+    executor: concurrent.futures.Executor | None
+    pending: asyncio.Future[None] | None
+
+    def __init__(
+        self,
+        stream: base.TextIO,
+        loop: asyncio.AbstractEventLoop,
+        executor: concurrent.futures.Executor | None = None,
+    ):
+        super().__init__(stream)
+        self.loop = loop
+        self.executor = executor
+        self._buffer: list[str] = []
+        self.pending = None
+
+    def write(self, value: str) -> int:
+        self._buffer.append(value)
+        return len(value)
+
+    def flush(self) -> None:
+        if self.pending is None:
+            self._submit()
+
+    async def drain(self) -> None:
+        '''Wait until all flushed output has been written.'''
+        while self.pending is not None:
+            # Errors are logged by `_written` already
+            with contextlib.suppress(Exception):
+                await asyncio.shield(self.pending)
+
+    def _submit(self) -> None:
+        if not self._buffer:
+            self.pending = None
+            return
+
+        value = ''.join(self._buffer)
+        self._buffer.clear()
+        self.pending = self.loop.run_in_executor(
+            self.executor,
+            self._write,
+            value,
+        )
+        self.pending.add_done_callback(self._written)
+
+    def _write(self, value: str) -> None:
+        self.stream.write(value)
+        self.stream.flush()
+
+    def _written(self, future: asyncio.Future[None]) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(
+                'Unable to write progressbar output',
+                exc_info=future.exception(),
+            )
+        self._submit()
+
+
+class AsyncProgressBar(bar.ProgressBar):
+    '''
+    A progressbar for use within an asyncio event loop.
+
+    When started from within a running event loop, `update()` only stores
+    the new value and schedules a redraw with `loop.call_later` so the
+    progressbar is redrawn at most once per `min_poll_interval`, and every
+    `poll_interval` if the widgets are time sensitive. The output is written
+    from the loop's (or the given) executor.
+
+    Outside of an event loop it behaves like a regular `ProgressBar`.
+
+    It can wrap both regular and asynchronous iterables:
+
+    >>> async def main():
+    ...     async def numbers():
+    ...         for i in range(10):
+    ...             yield i
+    ...
+    ...     async with AsyncProgressBar(max_value=10) as progress:
+    ...         async for i in progress(numbers()):
+    ...             pass
+
+    >>> asyncio.run(main())
+
+    Args:
+        executor: The executor to write the output from, defaults to the
+            default executor of the event loop
+        **kwargs: Passed on to `ProgressBar`
+    '''
+
+    executor: concurrent.futures.Executor | None
+    _loop: asyncio.AbstractEventLoop | None = None
+    _render_handle: asyncio.TimerHandle | None = None
+    _rendered_value: bar.NumberT | None = None
+    _async_iterable: typing.AsyncIterator[typing.Any] | None = None
+
+    def __init__(
+        self,
+        *args: typing.Any,
+        executor: concurrent.futures.Executor | None = None,
+        **kwargs: typing.Any,
+    ):
+        bar.ProgressBar.__init__(self, *args, **kwargs)
+        self.executor = executor
+
+    def __call__(self, iterable, max_value=None, **kwargs):
+        '''Use the progressbar to iterate through an (async) iterable.'''
+        if not hasattr(iterable, '__aiter__'):
+            return bar.ProgressBar.__call__(
+                self,
+                iterable,
+                max_value=max_value,
+                **kwargs,
+            )
+
+        if max_value is not None:
+            self.max_value = max_value
+        elif self.max_value is None:
+            try:
+                self.max_value = len(iterable)
+            except TypeError:
+                self.max_value = base.UnknownLength
+        self._async_iterable = iterable.__aiter__()
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._async_iterable is None:
+            raise TypeError(
+                'Call the progressbar with an async iterable to iterate it',
+            )
+
+        try:
+            value = await self._async_iterable.__anext__()
+        except StopAsyncIteration:
+            await self.afinish()
+            raise
+
+        if self._start_timer is None:
+            self.start()
+        else:
+            self.update(self.value + 1)
+        return value
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.afinish(dirty=bool(exc_type))
+
+    def start(self, *args, **kwargs):
+        if self._loop is None:
+            with contextlib.suppress(RuntimeError):
+                self._loop = asyncio.get_running_loop()
+
+            if self._loop is not None and not isinstance(
+                self.fd,
+                AsyncStreamWriter,
+            ):
+                self.fd = AsyncStreamWriter(
+                    self.fd,
+                    self._loop,
+                    self.executor,
+                )
+
+        return bar.ProgressBar.start(self, *args, **kwargs)
+
+    def update(self, value=None, force=False, **kwargs):
+        '''Store the new value and schedule a redraw.'''
+        if self._loop is None:
+            return bar.ProgressBar.update(self, value, force=force, **kwargs)
+
+        self._store_update(value, kwargs)
+        if force:
+            self._render(force=True)
+        else:
+            self._schedule_render(self.min_poll_interval)
+        if self.listeners:
+            self._notify('update', force=force)
+        return None
+
+    def finish(self, end='\n', dirty=False):
+        bar.ProgressBar.finish(self, end=end, dirty=dirty)
+        self._cancel_render()
+        self._loop = None
+        # The writer is bound to the loop, restarting the progressbar (from
+        # another loop) wraps the stream again
+        if isinstance(self.fd, AsyncStreamWriter):
+            self.fd = self.fd.stream
+
+    async def afinish(self, end='\n', dirty=False):
+        '''Finish the progressbar and wait for the output to be written.'''
+        fd = self.fd
+        self.finish(end=end, dirty=dirty)
+        if isinstance(fd, AsyncStreamWriter):
+            await fd.drain()
+
+    def _schedule_render(self, delay: float) -> None:
+        if self._render_handle is None and self._loop is not None:
+            self._render_handle = self._loop.call_later(delay, self._render)
+
+    def _cancel_render(self) -> None:
+        if self._render_handle is not None:
+            self._render_handle.cancel()
+            self._render_handle = None
+
+    def _render(self, force: bool = False) -> None:
+        self._cancel_render()
+
+        value = self.value
+        if value != self._rendered_value:
+            self.previous_value = self._rendered_value
+            force = True
+        # Rendering is not an update for the listeners
+        with self._silenced():
+            bar.ProgressBar.update(self, force=force)
+        self._rendered_value = value
+
+        # Time sensitive widgets need to be redrawn even without updates
+        if self.poll_interval and self._end_timer is None:
+            self._schedule_render(self.poll_interval)
@@ -1,7 +1,18 @@
 from __future__ import annotations
 import abc
+import array
+import bisect
+import collections
+import math
+import numbers
+import typing
 from datetime import timedelta
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 class SmoothingAlgorithm(abc.ABC):
 
     @abc.abstractmethod
@@ -15,16 +26,74 @@ class SmoothingAlgorithm(abc.ABC):
         """
         pass
 
+    def update_many(
+        self,
+        new_values: typing.Iterable[float],
+        elapsed: typing.Iterable[timedelta | float],
+    ) -> typing.Sequence[float]:
+        """Updates the algorithm with a series of values and returns the
+        smoothed series.
+
+        The result is an `array.array` of floats, with or without NumPy,
+        and the values are identical to those of calling `update()` for
+        every value. Given a sequence of alphas the result is a list with
+        an `array.array` row per value and a column per alpha, which
+        `numpy.asarray()` turns into a 2D array.
+
+        Every value depends on the previous one, so the values are still
+        smoothed one at a time in a Python loop. With NumPy a grid of
+        alphas is smoothed in that same loop, without NumPy every alpha
+        is a separate pass.
+        """
+        update = self.update
+        return _to_array(
+            [
+                update(value, elapsed_)
+                for value, elapsed_ in zip(new_values, elapsed)
+            ],
+        )
+
 class ExponentialMovingAverage(SmoothingAlgorithm):
     """
     The Exponential Moving Average (EMA) is an exponentially weighted moving
     average that reduces the lag that's typically associated with a simple
     moving average. It's more responsive to recent changes in data.
+
+    Given a sequence of alphas, every alpha is smoothed separately and
+    `update_many()` returns a row with a result per alpha for every value.
     """
 
-    def __init__(self, alpha: float=0.5) -> None:
-        self.alpha = alpha
-        self.value = 0
+    _grid_state = ('value',)
+
+    def __init__(self, alpha: float | typing.Sequence[float]=0.5) -> None:
+        self.alpha = _alphas(alpha)
+        self.value = _initial_state(self.alpha)
+
+    def update(self, new_value: float, elapsed: timedelta) -> float:
+        if not isinstance(self.alpha, numbers.Real):
+            return self.update_many([new_value], [elapsed])[0]
+        self.value = self.alpha * new_value + (1 - self.alpha) * self.value
+        return self.value
+
+    def update_many(
+        self,
+        new_values: typing.Iterable[float],
+        elapsed: typing.Iterable[timedelta | float],
+    ) -> typing.Sequence[float]:
+        # The EMA does not depend on the elapsed time, just like `update()`
+        if isinstance(self.alpha, list):
+            return _update_grid(self, new_values, elapsed)
+
+        alpha = self.alpha
+        beta = 1 - alpha
+        value = self.value
+        results = []
+        append = results.append
+        for new_value in _to_list(new_values):
+            value = alpha * new_value + beta * value
+            append(value)
+        self.value = value
+        return _to_array(results, alpha)
 
 class DoubleExponentialMovingAverage(SmoothingAlgorithm):
     """
@@ -33,7 +102,409 @@ class DoubleExponentialMovingAverage(SmoothingAlgorithm):
     It's more responsive to recent changes in data.
     """
 
-    def __init__(self, alpha: float=0.5) -> None:
+    _grid_state = ('ema1', 'ema2')
+
+    def __init__(self, alpha: float | typing.Sequence[float]=0.5) -> None:
+        self.alpha = _alphas(alpha)
+        self.ema1 = _initial_state(self.alpha)
+        self.ema2 = _initial_state(self.alpha)
+
+    def update(self, new_value: float, elapsed: timedelta) -> float:
+        if not isinstance(self.alpha, numbers.Real):
+            return self.update_many([new_value], [elapsed])[0]
+        self.ema1 = self.alpha * new_value + (1 - self.alpha) * self.ema1
+        self.ema2 = self.alpha * self.ema1 + (1 - self.alpha) * self.ema2
+        return 2 * self.ema1 - self.ema2
+
+    def update_many(
+        self,
+        new_values: typing.Iterable[float],
+        elapsed: typing.Iterable[timedelta | float],
+    ) -> typing.Sequence[float]:
+        # The DEMA does not depend on the elapsed time, just like `update()`
+        if isinstance(self.alpha, list):
+            return _update_grid(self, new_values, elapsed)
+
+        alpha = self.alpha
+        beta = 1 - alpha
+        ema1 = self.ema1
+        ema2 = self.ema2
+        results = []
+        append = results.append
+        for new_value in _to_list(new_values):
+            ema1 = alpha * new_value + beta * ema1
+            ema2 = alpha * ema1 + beta * ema2
+            append(2 * ema1 - ema2)
+        self.ema1 = ema1
+        self.ema2 = ema2
+        return _to_array(results, alpha)
+
+
+def _alphas(alpha: float | typing.Sequence[float]) -> typing.Any:
+    # A sequence of alphas evaluates a grid of smoothing factors at once. The
+    # arithmetic broadcasts over a NumPy array, without NumPy the alphas are
+    # kept as a list and `_update_grid` does a pass per alpha.
+    if isinstance(alpha, numbers.Real):
+        return alpha
+    if np is not None:
+        return np.asarray(alpha, dtype=float)
+    return [float(alpha_) for alpha_ in alpha]
+
+
+def _initial_state(alpha: typing.Any) -> typing.Any:
+    if isinstance(alpha, list):
+        return [0.0] * len(alpha)
+    return 0
+
+
+def _update_grid(
+    algorithm: typing.Any,
+    new_values: typing.Iterable[float],
+    elapsed: typing.Iterable[timedelta | float],
+) -> list[array.array]:
+    # Runs the scalar tight loop for every alpha and returns a row of results
+    # per value, matching the rows of the NumPy grid
+    new_values = _to_list(new_values)
+    elapsed = _to_list(elapsed)
+    alphas = algorithm.alpha
+    states = {name: getattr(algorithm, name) for name in algorithm._grid_state}
+    columns = []
+    try:
+        for column, alpha in enumerate(alphas):
+            algorithm.alpha = alpha
+            for name, state in states.items():
+                setattr(algorithm, name, state[column])
+            columns.append(algorithm.update_many(new_values, elapsed))
+            for name, state in states.items():
+                state[column] = getattr(algorithm, name)
+    finally:
+        algorithm.alpha = alphas
+        for name, state in states.items():
+            setattr(algorithm, name, state)
+    return [array.array('d', row) for row in zip(*columns)]
+
+
+def _to_list(values: typing.Iterable[typing.Any]) -> list[typing.Any]:
+    # Iterating a list of Python floats is much faster than iterating a
+    # NumPy array and gives exactly the same results
+    tolist = getattr(values, 'tolist', None)
+    if tolist is not None:
+        return tolist()
+    return list(values)
+
+
+def _to_array(
+    values: list[typing.Any],
+    alpha: typing.Any=None,
+) -> typing.Any:
+    # The same result types with and without NumPy, a row per value for a
+    # NumPy grid of alphas just like `_update_grid`
+    if alpha is not None and not isinstance(alpha, numbers.Real):
+        return [array.array('d', row.tolist()) for row in values]
+    return array.array('d', values)
+
+
+def _seconds(elapsed: timedelta | float) -> float:
+    if isinstance(elapsed, timedelta):
+        return elapsed.total_seconds()
+    return float(elapsed)
+
+
+class RateEstimator(SmoothingAlgorithm):
+    """
+    Base class for estimators of the progress rate.
+
+    Rate estimators are updated with the current (cumulative) value and the
+    elapsed time and return the estimated rate in units per second. The
+    state is updated incrementally so every update costs O(1), or O(window)
+    for a fixed window. Updates without elapsed time are ignored.
+
+    The `eta` method estimates the seconds needed for the remaining units,
+    `SmoothingETA` uses it when it is given a rate estimator.
+
+    The estimators weigh recent updates more than the average rate since the
+    start does. That helps when the rate really changes, but if the rate is
+    bursty and steady on average the estimates follow the bursts and the
+    average rate is more accurate.
+    """
+
+    #: The estimated rate in units per second, 0 until it is known
+    rate: float
+    _last: tuple[float, float] | None
+
+    def __init__(self) -> None:
+        self.rate = 0.0
+        self._last = None
+
+    def update(self, new_value: float, elapsed: timedelta | float) -> float:
+        seconds = _seconds(elapsed)
+        if self._last is not None:
+            last_value, last_seconds = self._last
+            delta_time = seconds - last_seconds
+            if delta_time <= 0:
+                return self.rate
+
+            rate = (new_value - last_value) / delta_time
+            self.rate = self._update(new_value, seconds, rate, delta_time)
+
+        self._last = new_value, seconds
+        return self.rate
+
+    @abc.abstractmethod
+    def _update(
+        self,
+        value: float,
+        seconds: float,
+        rate: float,
+        delta_time: float,
+    ) -> float:
+        """Return the new rate given the rate since the previous update."""
+
+    def eta(self, remaining: float) -> float | None:
+        """The estimated seconds to go, `None` if the rate is unknown."""
+        if self.rate > 0:
+            return remaining / self.rate
+        return None
+
+
+class WindowedLinearRegression(RateEstimator):
+    """
+    Least squares fit of the value over time for the last `window` updates.
+
+    The sums needed for the slope are maintained incrementally. To prevent
+    the floating point errors of the running sums from accumulating, they
+    are recalculated (relative to the oldest point) once every `window`
+    updates.
+
+    A small window follows changes of the rate quickly but also follows
+    bursts and stalls, a window covering several bursts is needed to
+    average them out.
+
+    >>> regression = WindowedLinearRegression(window=3)
+    >>> for second, value in enumerate([0, 10, 20, 40, 60]):
+    ...     rate = regression.update(value, second)
+    >>> rate
+    20.0
+    """
+
+    def __init__(self, window: int=100) -> None:
+        super().__init__()
+        self.window = max(window, 2)
+        self.points: collections.deque[tuple[float, float]] = (
+            collections.deque()
+        )
+        self._origin = 0.0, 0.0
+        self._sums = [0.0, 0.0, 0.0, 0.0]
+        self._pushes = 0
+
+    def _update(self, value, seconds, rate, delta_time):
+        if not self.points and self._last is not None:
+            self._push(*self._last)
+        self._push(value, seconds)
+        if len(self.points) > self.window:
+            self._add(*self.points.popleft(), sign=-1)
+
+        self._pushes += 1
+        if self._pushes >= self.window:
+            self._recalculate()
+
+        n = len(self.points)
+        sum_t, sum_v, sum_tt, sum_tv = self._sums
+        denominator = n * sum_tt - sum_t * sum_t
+        if denominator <= 0:
+            return self.rate
+        return (n * sum_tv - sum_t * sum_v) / denominator
+
+    def _push(self, value: float, seconds: float) -> None:
+        self.points.append((value, seconds))
+        self._add(value, seconds)
+
+    def _add(self, value: float, seconds: float, sign: int=1) -> None:
+        origin_value, origin_seconds = self._origin
+        t = seconds - origin_seconds
+        v = value - origin_value
+        sums = self._sums
+        sums[0] += sign * t
+        sums[1] += sign * v
+        sums[2] += sign * t * t
+        sums[3] += sign * t * v
+
+    def _recalculate(self) -> None:
+        self._pushes = 0
+        self._origin = self.points[0]
+        self._sums = [0.0, 0.0, 0.0, 0.0]
+        for value, seconds in self.points:
+            self._add(value, seconds)
+
+
+class KalmanFilter(RateEstimator):
+    """
+    A one dimensional Kalman filter of the rate.
+
+    The rate is modelled as a random walk. Since the scale of the rate is
+    unknown beforehand the noise parameters are relative to the squared
+    rate: the process noise grows with the time between updates and the
+    measurement noise shrinks with it, as rates measured over a longer
+    period are more reliable.
+
+    A lower `process_noise` smooths bursts more but follows a changing rate
+    more slowly.
+
+    >>> kalman = KalmanFilter()
+    >>> for second, value in enumerate([0, 10, 20, 30, 40]):
+    ...     rate = kalman.update(value, second)
+    >>> rate
+    10.0
+    """
+
+    variance: float | None
+
+    def __init__(
+        self,
+        process_noise: float=0.01,
+        measurement_noise: float=1.0,
+    ) -> None:
+        super().__init__()
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.variance = None
+
+    def _update(self, value, seconds, rate, delta_time):
+        scale = self.rate * self.rate or rate * rate or 1.0
+        if self.variance is None:
+            self.variance = scale
+            return rate
+
+        variance = self.variance + self.process_noise * scale * delta_time
+        measurement_variance = self.measurement_noise * scale / delta_time
+        gain = variance / (variance + measurement_variance)
+        self.variance = (1 - gain) * variance
+        return self.rate + gain * (rate - self.rate)
+
+
+class MedianOfRates(RateEstimator):
+    """
+    The median of the rates between the last `window` updates.
+
+    The median ignores bursts and stalls completely as long as they cover
+    less than half of the window. That also makes it a poor fit for bursty
+    progress: the median is the typical rate instead of the average one, so
+    with mostly slow intervals and a few fast bursts it underestimates the
+    rate and the ETA is much too long.
+
+    >>> median = MedianOfRates(window=3)
+    >>> for second, value in enumerate([0, 10, 20, 1000, 1010]):
+    ...     rate = median.update(value, second)
+    >>> rate
+    10.0
+    """
+
+    def __init__(self, window: int=100) -> None:
+        super().__init__()
+        self.window = max(window, 1)
+        self.rates: collections.deque[float] = collections.deque()
+        self._sorted: list[float] = []
+
+    def _update(self, value, seconds, rate, delta_time):
+        self.rates.append(rate)
+        bisect.insort(self._sorted, rate)
+        if len(self.rates) > self.window:
+            oldest = self.rates.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+
+        middle, odd = divmod(len(self._sorted), 2)
+        if odd:
+            return self._sorted[middle]
+        return (self._sorted[middle - 1] + self._sorted[middle]) / 2
+
+
+class HoltWinters(RateEstimator):
+    """
+    Holt-Winters (double exponential) smoothing of the rate with a trend.
+
+    The `level` is the smoothed rate and the `trend` its change per second,
+    both weighted by the time between updates. Progress has no seasonality
+    so the seasonal component of Holt-Winters is left out.
+
+    The `eta` integrates the trend, so a slowing job gets a longer ETA than
+    the current rate would suggest.
+
+    >>> holt_winters = HoltWinters(alpha=0.5, beta=0.5)
+    >>> for second, value in enumerate([0, 10, 30, 60, 100]):
+    ...     rate = holt_winters.update(value, second)
+    >>> round(rate, 2), round(holt_winters.trend, 2)
+    (34.69, 8.28)
+    """
+
+    level: float | None
+    trend: float
+
+    def __init__(self, alpha: float=0.1, beta: float=0.001) -> None:
+        super().__init__()
         self.alpha = alpha
-        self.ema1 = 0
-        self.ema2 = 0
\ No newline at end of file
+        self.beta = beta
+        self.level = None
+        self.trend = 0.0
+
+    def _update(self, value, seconds, rate, delta_time):
+        previous = self.level
+        if previous is None:
+            self.level = rate
+            return rate
+
+        forecast = previous + self.trend * delta_time
+        level = self.level = (
+            self.alpha * rate + (1 - self.alpha) * forecast
+        )
+        self.trend = (
+            self.beta * (level - previous) / delta_time
+            + (1 - self.beta) * self.trend
+        )
+        return level
+
+    def eta(self, remaining: float) -> float | None:
+        if self.rate <= 0:
+            return None
+
+        # Solve `rate * t + trend * t ** 2 / 2 == remaining` for the first
+        # positive `t`, written in a form that also works without a trend
+        discriminant = self.rate * self.rate + 2 * self.trend * remaining
+        if discriminant < 0:
+            # The rate drops to zero before finishing, use the current rate
+            return remaining / self.rate
+        return 2 * remaining / (self.rate + math.sqrt(discriminant))
+
+
+#: The available smoothing algorithms by name, see `SmoothingETA`
+ALGORITHMS: dict[str, type[SmoothingAlgorithm]] = dict(
+    ema=ExponentialMovingAverage,
+    dema=DoubleExponentialMovingAverage,
+    linear_regression=WindowedLinearRegression,
+    kalman=KalmanFilter,
+    median=MedianOfRates,
+    holt_winters=HoltWinters,
+)
+
+
+def get_algorithm(
+    algorithm: str | type[SmoothingAlgorithm],
+) -> type[SmoothingAlgorithm]:
+    """Return the algorithm class for either a class or a name.
+
+    >>> get_algorithm('kalman')
+    <class 'progressbar.algorithms.KalmanFilter'>
+    >>> get_algorithm('spam')  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown smoothing algorithm 'spam', expected one of: ema, ...
+    """
+    if not isinstance(algorithm, str):
+        return algorithm
+
+    try:
+        return ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(
+            f'Unknown smoothing algorithm {algorithm!r}, expected one of: '
+            + ', '.join(ALGORITHMS),
+        ) from None
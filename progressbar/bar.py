@@ -1,16 +1,21 @@
 from __future__ import annotations
 import abc
+import bisect
 import contextlib
 import itertools
+import json
 import logging
 import math
 import os
+import re
 import sys
+import threading
 import time
 import timeit
 import warnings
 from copy import deepcopy
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import ClassVar
 from python_utils import converters, types
 import progressbar.env
 import progressbar.terminal
@@ -24,7 +29,13 @@ T = types.TypeVar('T')
 class ProgressBarMixinBase(abc.ABC):
     _started = False
     _finished = False
+    #: The `timeit.default_timer()` timestamps of the last update, the start
+    #: and the end. The `datetime` properties are views on these
     _last_update_time: types.Optional[float] = None
+    _start_timer: types.Optional[float] = None
+    _end_timer: types.Optional[float] = None
+    #: The wall clock time minus the timer, used to convert between the two
+    _wall_offset: float = 0.0
     term_width: int = 80
     widgets: types.MutableSequence[widgets_module.WidgetBase | str]
     max_error: bool
@@ -42,15 +53,59 @@ class ProgressBarMixinBase(abc.ABC):
     previous_value: types.Optional[NumberT]
     min_value: NumberT
     max_value: NumberT | types.Type[base.UnknownLength]
-    end_time: types.Optional[datetime]
-    start_time: types.Optional[datetime]
     seconds_elapsed: float
     extra: types.Dict[str, types.Any]
+
+    def _timer_to_datetime(
+        self,
+        timer: types.Optional[float],
+    ) -> types.Optional[datetime]:
+        if timer is None:
+            return None
+        return datetime.fromtimestamp(timer + self._wall_offset)
+
+    def _datetime_to_timer(
+        self,
+        value: types.Optional[datetime],
+    ) -> types.Optional[float]:
+        if value is None:
+            return None
+        return value.timestamp() - self._wall_offset
+
+    def get_last_update_time(self) -> types.Optional[datetime]:
+        return self._timer_to_datetime(self._last_update_time)
+
+    def set_last_update_time(self, value: types.Optional[datetime]):
+        self._last_update_time = self._datetime_to_timer(value)
+
+    def get_start_time(self) -> types.Optional[datetime]:
+        return self._timer_to_datetime(self._start_timer)
+
+    def set_start_time(self, value: types.Optional[datetime]):
+        self._start_timer = self._datetime_to_timer(value)
+
+    def get_end_time(self) -> types.Optional[datetime]:
+        return self._timer_to_datetime(self._end_timer)
+
+    def set_end_time(self, value: types.Optional[datetime]):
+        self._end_timer = self._datetime_to_timer(value)
+
     last_update_time = property(get_last_update_time, set_last_update_time)
+    start_time = property(get_start_time, set_start_time)
+    end_time = property(get_end_time, set_end_time)
 
-    def __init__(self, **kwargs):
+    def __init__(self, **kwargs):  # noqa: B027
         pass
 
+    def start(self, **kwargs):
+        self._started = True
+
+    def update(self, value=None):  # noqa: B027
+        pass
+
+    def finish(self):  # pragma: no cover
+        self._finished = True
+
     def __del__(self):
         if not self._finished and self._started:
             try:
@@ -61,6 +116,15 @@ class ProgressBarMixinBase(abc.ABC):
     def __getstate__(self):
         return self.__dict__
 
+    def data(self) -> types.Dict[str, types.Any]:  # pragma: no cover
+        raise NotImplementedError()
+
+    def started(self) -> bool:
+        return self._finished or self._started
+
+    def finished(self) -> bool:
+        return self._finished
+
 class ProgressBarBase(types.Iterable, ProgressBarMixinBase):
     _index_counter = itertools.count()
     index: int = -1
@@ -74,12 +138,218 @@ class ProgressBarBase(types.Iterable, ProgressBarMixinBase):
         label = f': {self.label}' if self.label else ''
         return f'<{self.__class__.__name__}#{self.index}{label}>'
 
+#: Format keys that change over time, widgets using these in their format
+#: cannot be cached even if they are otherwise value dependent
+TIME_FORMAT_KEYS_RE = re.compile(
+    r'elapsed|seconds|minutes|hours|days|time|eta|start|finished|updates'
+)
+#: The `data()` keys that change over time, see `RenderPlan.dependencies`
+TIME_DATA_KEYS = frozenset(
+    (
+        'last_update_time',
+        'end_time',
+        'updates',
+        'total_seconds_elapsed',
+        'time_elapsed',
+        'seconds_elapsed',
+        'minutes_elapsed',
+        'hours_elapsed',
+        'days_elapsed',
+    ),
+)
+#: The `data()` keys that contain all variables
+VARIABLES_DATA_KEYS = frozenset(('variables', 'dynamic_messages'))
+
+
+class RenderPlan:
+    '''The compiled widget layout of a progressbar.
+
+    The plan classifies the widgets once so redraws only need to render the
+    fragments that can actually have changed:
+
+     - static strings are converted and measured when compiling
+     - value dependent widgets are only rendered when the `value`,
+       `min_value`, `max_value` or their variables have changed
+     - time dependent (and unknown) widgets are rendered on every redraw
+     - auto width widgets are rendered last with the remaining width
+
+    Widgets hidden by their `min_width`/`max_width` are left out completely so
+    the plan has to be recompiled when the terminal width or the widgets
+    change, see `matches`.
+
+    The `data()` keys every widget reads during its first render are
+    recorded in `dependencies`, indexed by the position of the fragment.
+    These refine the classification: a value dependent widget that reads
+    the elapsed time is rendered on every redraw after all and one that
+    reads all `variables` is also rendered when any variable changes.
+    '''
+
+    widgets: list[widgets_module.WidgetBase | str]
+    term_width: int
+    fragments: list[str]
+    widths: list[int]
+    renderers: list[types.Any]
+    value_indices: list[int]
+    time_indices: list[int]
+    auto_indices: list[int]
+    variable_names: list[str]
+    dependencies: dict[int, frozenset[str]]
+    #: Whether a value dependent widget reads all variables
+    all_variables: bool
+    state: types.Optional[tuple]
+
+    def __init__(self, progress: ProgressBarMixinBase):
+        self.widgets = list(progress.widgets)
+        self.term_width = progress.term_width
+        self.fragments = []
+        self.widths = []
+        self.value_indices = []
+        self.time_indices = []
+        self.auto_indices = []
+        self.variable_names = []
+        self.renderers = []
+        self.dependencies = {}
+        self.all_variables = False
+        self.state = None
+        # The indices of the widgets with new dependencies
+        self._recorded: list[int] = []
+
+        for widget in self.widgets:
+            if isinstance(widget, str):
+                fragment = converters.to_unicode(widget)
+                self.fragments.append(fragment)
+                self.widths.append(progress.custom_len(fragment))
+                self.renderers.append(None)
+                continue
+            elif isinstance(
+                widget,
+                widgets_module.WidgetBase,
+            ) and not widget.check_size(progress):
+                continue
+
+            index = len(self.fragments)
+            self.fragments.append('')
+            self.widths.append(0)
+            self.renderers.append(widget)
+
+            if isinstance(widget, widgets_module.AutoWidthWidgetBase):
+                self.auto_indices.append(index)
+            elif self._is_value_dependent(widget):
+                self.value_indices.append(index)
+                if isinstance(widget, widgets_module.VariableMixin):
+                    self.variable_names.append(widget.name)
+            else:
+                self.time_indices.append(index)
+
+    @staticmethod
+    def _is_value_dependent(widget) -> bool:
+        if isinstance(widget, widgets_module.TimeSensitiveWidgetBase):
+            return False
+        elif not getattr(widget, 'value_dependent', False):
+            return False
+
+        format_ = getattr(widget, 'format', None)
+        return not (
+            isinstance(format_, str) and TIME_FORMAT_KEYS_RE.search(format_)
+        )
+
+    def matches(self, progress: ProgressBarMixinBase) -> bool:
+        '''Check if the plan is still valid for the given progressbar.'''
+        return (
+            progress.term_width == self.term_width
+            and progress.widgets == self.widgets
+        )
+
+    def render(self, progress: ProgressBarMixinBase) -> list[str]:
+        '''Render the changed fragments and return all fragments.
+
+        Note that the returned list is reused between renders.
+        '''
+        fragments = self.fragments
+        widths = self.widths
+        data: types.Optional[types.Dict[str, types.Any]] = None
+
+        indices: types.Iterable[int] = self.time_indices
+        if self.value_indices:
+            variables = progress.variables
+            state = (
+                progress.value,
+                progress.min_value,
+                progress.max_value,
+                *[variables.get(name) for name in self.variable_names],
+                dict(variables) if self.all_variables else None,
+            )
+            if state != self.state:
+                self.state = state
+                indices = itertools.chain(self.value_indices, indices)
+
+        for index in indices:
+            if data is None:
+                data = progress.data()
+
+            fragment = converters.to_unicode(
+                self._render_widget(index, progress, data),
+            )
+            fragments[index] = fragment
+            widths[index] = progress.custom_len(fragment)
+
+        count = len(self.auto_indices)
+        if count:
+            if data is None:
+                data = progress.data()
+
+            width = self.term_width - sum(widths)
+            for index in self.auto_indices:
+                portion = max(math.ceil(width / count), 0)
+                count -= 1
+
+                fragment = converters.to_unicode(
+                    self._render_widget(index, progress, data, portion),
+                )
+                width -= progress.custom_len(fragment)
+                fragments[index] = fragment
+
+        if self._recorded:
+            self._apply_dependencies()
+
+        return fragments
+
+    def _render_widget(self, index: int, progress, data, *args) -> str:
+        widget = self.renderers[index]
+        if index in self.dependencies or not isinstance(data, utils.LazyDict):
+            return widget(progress, data, *args)
+
+        # Record the keys read by the widget for the first render
+        accessed, data.accessed = data.accessed, set()
+        try:
+            return widget(progress, data, *args)
+        finally:
+            self.dependencies[index] = frozenset(data.accessed)
+            self._recorded.append(index)
+            data.accessed |= accessed
+
+    def _apply_dependencies(self):
+        '''Reclassify the value dependent widgets by the keys they read.'''
+        for index in self._recorded:
+            if index not in self.value_indices:
+                continue
+
+            dependencies = self.dependencies[index]
+            if dependencies & TIME_DATA_KEYS:
+                self.value_indices.remove(index)
+                bisect.insort(self.time_indices, index)
+            elif dependencies & VARIABLES_DATA_KEYS:
+                self.all_variables = True
+        self._recorded.clear()
+
+
 class DefaultFdMixin(ProgressBarMixinBase):
     fd: base.TextIO = sys.stderr
     is_ansi_terminal: bool | None = False
     is_terminal: bool | None
     line_breaks: bool | None = True
     enable_colors: progressbar.env.ColorSupport = progressbar.env.COLOR_SUPPORT
+    _render_plan: RenderPlan | None = None
 
     def __init__(self, fd: base.TextIO=sys.stderr, is_terminal: bool | None=None, line_breaks: bool | None=None, enable_colors: progressbar.env.ColorSupport | None=None, line_offset: int=0, **kwargs):
         if fd is sys.stdout:
@@ -94,6 +364,28 @@ class DefaultFdMixin(ProgressBarMixinBase):
         self.enable_colors = self._determine_enable_colors(enable_colors)
         super().__init__(**kwargs)
 
+    def _apply_line_offset(
+        self,
+        fd: base.TextIO,
+        line_offset: int,
+    ) -> base.TextIO:
+        if line_offset:
+            return progressbar.terminal.stream.LineOffsetStreamWrapper(
+                line_offset,
+                fd,
+            )
+        else:
+            return fd
+
+    def _determine_line_breaks(self, line_breaks: bool | None) -> bool | None:
+        if line_breaks is None:
+            return progressbar.env.env_flag(
+                'PROGRESSBAR_LINE_BREAKS',
+                not self.is_terminal,
+            )
+        else:
+            return line_breaks
+
     def _determine_enable_colors(self, enable_colors: progressbar.env.ColorSupport | None) -> progressbar.env.ColorSupport:
         """
         Determines the color support for the progress bar.
@@ -122,11 +414,89 @@ class DefaultFdMixin(ProgressBarMixinBase):
             ValueError: If `enable_colors` is not None, True, False, or an
             instance of `progressbar.env.ColorSupport`.
         """
-        pass
+        color_support: progressbar.env.ColorSupport
+        if enable_colors is None:
+            colors = (
+                progressbar.env.env_flag('PROGRESSBAR_ENABLE_COLORS'),
+                progressbar.env.env_flag('FORCE_COLOR'),
+                self.is_ansi_terminal,
+            )
+
+            for color_enabled in colors:
+                if color_enabled is not None:
+                    if color_enabled:
+                        color_support = progressbar.env.COLOR_SUPPORT
+                    else:
+                        color_support = progressbar.env.ColorSupport.NONE
+                    break
+            else:
+                color_support = progressbar.env.ColorSupport.NONE
+
+        elif enable_colors is True:
+            color_support = progressbar.env.ColorSupport.XTERM_256
+        elif enable_colors is False:
+            color_support = progressbar.env.ColorSupport.NONE
+        elif isinstance(enable_colors, progressbar.env.ColorSupport):
+            color_support = enable_colors
+        else:
+            raise ValueError(f'Invalid color support value: {enable_colors}')
+
+        return color_support
+
+    def print(self, *args: types.Any, **kwargs: types.Any) -> None:
+        print(*args, file=self.fd, **kwargs)
+
+    def start(self, **kwargs):
+        os_specific.set_console_mode()
+        super().start()
+
+    def update(self, *args: types.Any, **kwargs: types.Any) -> None:
+        ProgressBarMixinBase.update(self, *args, **kwargs)
+
+        line: str = converters.to_unicode(self._format_line())
+        if not self.enable_colors:
+            line = utils.no_color(line)
+
+        line = line.rstrip() + '\n' if self.line_breaks else '\r' + line
+
+        try:  # pragma: no cover
+            self.fd.write(line)
+        except UnicodeEncodeError:  # pragma: no cover
+            self.fd.write(types.cast(str, line.encode('ascii', 'replace')))
+
+    def finish(
+        self,
+        *args: types.Any,
+        **kwargs: types.Any,
+    ) -> None:  # pragma: no cover
+        os_specific.reset_console_mode()
+
+        if self._finished:
+            return
+
+        end = kwargs.pop('end', '\n')
+        ProgressBarMixinBase.finish(self, *args, **kwargs)
+
+        if end and not self.line_breaks:
+            self.fd.write(end)
+
+        self.fd.flush()
+
+    def _format_widgets(self):
+        plan = self._render_plan
+        if plan is None or not plan.matches(self):
+            plan = self._render_plan = RenderPlan(self)
+
+        return plan.render(self)
 
     def _format_line(self):
         """Joins the widgets and justifies the line."""
-        pass
+        line = ''.join(self._format_widgets())
+
+        if self.left_justify:
+            return line.ljust(self.term_width)
+        else:
+            return line.rjust(self.term_width)
 
 class ResizableMixin(ProgressBarMixinBase):
 
@@ -145,7 +515,16 @@ class ResizableMixin(ProgressBarMixinBase):
 
     def _handle_resize(self, signum=None, frame=None):
         """Tries to catch resize signals sent from the terminal."""
-        pass
+        w, _ = utils.get_terminal_size()
+        self.term_width = w
+
+    def finish(self):  # pragma: no cover
+        ProgressBarMixinBase.finish(self)
+        if self.signal_set:
+            with contextlib.suppress(Exception):
+                import signal
+
+                signal.signal(signal.SIGWINCH, self._prev_handle)
 
 class StdRedirectMixin(DefaultFdMixin):
     redirect_stderr: bool = False
@@ -162,6 +541,38 @@ class StdRedirectMixin(DefaultFdMixin):
         self._stdout = self.stdout = sys.stdout
         self._stderr = self.stderr = sys.stderr
 
+    def start(self, *args, **kwargs):
+        if self.redirect_stdout:
+            utils.streams.wrap_stdout()
+
+        if self.redirect_stderr:
+            utils.streams.wrap_stderr()
+
+        self._stdout = utils.streams.original_stdout
+        self._stderr = utils.streams.original_stderr
+
+        self.stdout = utils.streams.stdout
+        self.stderr = utils.streams.stderr
+
+        utils.streams.start_capturing(self)
+        DefaultFdMixin.start(self, *args, **kwargs)
+
+    def update(self, value: types.Optional[float] = None):
+        if not self.line_breaks and utils.streams.needs_clear():
+            self.fd.write('\r' + ' ' * self.term_width + '\r')
+
+        utils.streams.flush()
+        DefaultFdMixin.update(self, value=value)
+
+    def finish(self, end='\n'):
+        DefaultFdMixin.finish(self, end=end)
+        utils.streams.stop_capturing(self)
+        if self.redirect_stdout:
+            utils.streams.unwrap_stdout()
+
+        if self.redirect_stderr:
+            utils.streams.unwrap_stderr()
+
 class ProgressBar(StdRedirectMixin, ResizableMixin, ProgressBarBase):
     """The ProgressBar class which updates and prints the bar.
 
@@ -238,8 +649,58 @@ class ProgressBar(StdRedirectMixin, ResizableMixin, ProgressBarBase):
     _iterable: types.Optional[types.Iterator]
     _DEFAULT_MAXVAL: type[base.UnknownLength] = base.UnknownLength
     _MINIMUM_UPDATE_INTERVAL: float = 0.05
+    #: The maximum amount of items between clock checks when using
+    #: `fast_iteration`
+    _FAST_ITERATION_MAX_CHECK: int = 100_000
     _last_update_time: types.Optional[float] = None
     paused: bool = False
+    #: Synchronise the progressbar every couple of items instead of every
+    #: single item when iterating, see `_fast_iterator`
+    fast_iteration: bool = False
+    #: Called with the progressbar when `update()` changes the value or the
+    #: variables, a `MultiBar` uses this to schedule a redraw
+    update_listener: types.Optional[types.Callable[[ProgressBar], None]] = None
+    #: Called after every `start()`, `update()` and `finish()`, see
+    #: `add_listener()`
+    listeners: types.List[types.Callable[..., None]]
+
+    #: The lazily computed keys of `data()`. The elapsed times are computed
+    #: from the (monotonic) timers, `datetime` objects are only created for
+    #: the widgets that need them.
+    data_factories: ClassVar[types.Dict[str, utils.LazyFactory]] = dict(
+        # Last update time of the widget
+        last_update_time=lambda progress, data: progress.last_update_time,
+        # Start time of the widget
+        start_time=lambda progress, data: progress.start_time,
+        # End time of the widget
+        end_time=lambda progress, data: progress.end_time,
+        # The seconds since the bar started
+        total_seconds_elapsed=lambda progress, data: (
+            progress._last_update_time - progress._start_timer
+        ),
+        # The raw elapsed `datetime.timedelta` object
+        time_elapsed=lambda progress, data: timedelta(
+            seconds=data['total_seconds_elapsed'],
+        ),
+        # The seconds since the bar started modulo 60
+        seconds_elapsed=lambda progress, data: (
+            data['total_seconds_elapsed'] % 60
+        ),
+        # The minutes since the bar started modulo 60
+        minutes_elapsed=lambda progress, data: (
+            int(data['total_seconds_elapsed'] % 86400) / 60 % 60
+        ),
+        # The hours since the bar started modulo 24
+        hours_elapsed=lambda progress, data: (
+            int(data['total_seconds_elapsed'] % 86400) / (60 * 60) % 24
+        ),
+        # The days since the bar started
+        days_elapsed=lambda progress, data: (
+            int(data['total_seconds_elapsed'] // 86400)
+        ),
+        # Percentage as a float or `None` if no max_value is available
+        percentage=lambda progress, data: progress.percentage,
+    )
 
     def __init__(self, min_value: NumberT=0, max_value: NumberT | types.Type[base.UnknownLength] | None=None, widgets: types.Optional[types.Sequence[widgets_module.WidgetBase | str]]=None, left_justify: bool=True, initial_value: NumberT=0, poll_interval: types.Optional[float]=None, widget_kwargs: types.Optional[types.Dict[str, types.Any]]=None, custom_len: types.Callable[[str], int]=utils.len_color, max_error=True, prefix=None, suffix=None, variables=None, min_poll_interval=None, **kwargs):
         """Initializes a progress bar with sane defaults."""
@@ -280,15 +741,38 @@ class ProgressBar(StdRedirectMixin, ResizableMixin, ProgressBarBase):
         for widget in self.widgets:
             if isinstance(widget, widgets_module.VariableMixin) and widget.name not in self.variables:
                 self.variables[widget.name] = None
+        self._increment_lock = threading.Lock()
+        self._increment_local = threading.local()
+        self.listeners = []
+        self._listeners_local = threading.local()
+
+    @property
+    def dynamic_messages(self):  # pragma: no cover
+        return self.variables
+
+    @dynamic_messages.setter
+    def dynamic_messages(self, value):  # pragma: no cover
+        self.variables = value
 
     def init(self):
         """
         (re)initialize values to original state so the progressbar can be
         used (again).
         """
-        pass
+        self.previous_value = None
+        self._wall_offset = time.time() - timeit.default_timer()
+        self.last_update_time = None
+        self.start_time = None
+        self.updates = 0
+        self.end_time = None
+        self.extra = dict()
+        self._last_update_timer = timeit.default_timer()
+        self._render_plan = None
+        #: The per thread counters of `increment()` and their sum that has
+        #: already been added to `value`
+        self._increment_slots: types.List[types.List[NumberT]] = []
+        self._increments_applied: NumberT = 0
 
-    @property
     @property
     def percentage(self) -> float | None:
         """Return current percentage, returns None if no max_value is given."""
@@ -308,35 +792,73 @@ class ProgressBar(StdRedirectMixin, ResizableMixin, ProgressBarBase):
         """
         Returns a dictionary of the ProgressBar's state.
 
+        The derived values such as the elapsed time and the percentage are
+        computed lazily on first access so widgets only pay for the keys they
+        actually use. See `data_factories` for the lazy keys.
+
         Returns:
-            dict: A dictionary containing various data about the ProgressBar's state.
+            dict: A `utils.LazyDict` containing various data about the
+            ProgressBar's state.
         """
-        now = time.time()
-        time_elapsed = now - self.start_time if self.start_time else 0
-        value = self.value
-        max_value = self.max_value
+        self._last_update_time = self._last_update_timer = (
+            timeit.default_timer()
+        )
+        return utils.LazyDict(
+            self.data_factories,
+            self,
+            # The maximum value (can be None with iterators)
+            max_value=self.max_value,
+            # The current value
+            value=self.value,
+            # The previous value
+            previous_value=self.previous_value,
+            # The total update count
+            updates=self.updates,
+            # Dictionary of user-defined
+            # :py:class:`progressbar.widgets.Variable`'s
+            variables=self.variables,
+            # Deprecated alias for the variables
+            dynamic_messages=self.variables,
+        )
 
-        return {
-            'max_value': max_value,
-            'start_time': self.start_time,
-            'last_update_time': self._last_update_time,
-            'end_time': self.end_time,
-            'value': value,
-            'previous_value': self.previous_value,
-            'updates': self.num_intervals,
-            'total_seconds_elapsed': time_elapsed,
-            'seconds_elapsed': int(time_elapsed) % 60,
-            'minutes_elapsed': int(time_elapsed / 60) % 60,
-            'hours_elapsed': int(time_elapsed / 3600) % 24,
-            'days_elapsed': int(time_elapsed / 86400),
-            'time_elapsed': datetime.timedelta(seconds=int(time_elapsed)),
-            'percentage': self.percentage,
-            'dynamic_messages': self.variables,  # Deprecated
-            'variables': self.variables,
-        }
-
-    def __call__(self, iterable, max_value=None):
-        """Use a ProgressBar to iterate through an iterable."""
+    def default_widgets(self):
+        if self.max_value:
+            return [
+                widgets.Percentage(**self.widget_kwargs),
+                ' ',
+                widgets.SimpleProgress(
+                    format=f'({widgets.SimpleProgress.DEFAULT_FORMAT})',
+                    **self.widget_kwargs,
+                ),
+                ' ',
+                widgets.Bar(**self.widget_kwargs),
+                ' ',
+                widgets.Timer(**self.widget_kwargs),
+                ' ',
+                widgets.SmoothingETA(**self.widget_kwargs),
+            ]
+        else:
+            return [
+                widgets.AnimatedMarker(**self.widget_kwargs),
+                ' ',
+                widgets.BouncingBar(**self.widget_kwargs),
+                ' ',
+                widgets.Counter(**self.widget_kwargs),
+                ' ',
+                widgets.Timer(**self.widget_kwargs),
+            ]
+
+    def __call__(self, iterable, max_value=None, fast_iteration=None):
+        """Use a ProgressBar to iterate through an iterable.
+
+        Args:
+            iterable: The iterable to wrap
+            max_value (int): The maximum value, defaults to `len(iterable)`
+                when available
+            fast_iteration (bool): Only synchronise the progressbar every
+                couple of items instead of calling `update()` for every item,
+                see `fast_iteration`
+        """
         if max_value is not None:
             self.max_value = max_value
         elif self.max_value is None:
@@ -344,19 +866,82 @@ class ProgressBar(StdRedirectMixin, ResizableMixin, ProgressBarBase):
                 self.max_value = len(iterable)
             except TypeError:
                 self.max_value = base.UnknownLength
+        if fast_iteration is not None:
+            self.fast_iteration = fast_iteration
         self._iterable = iter(iterable)
         return self
 
     def __iter__(self):
+        if self.fast_iteration and self._iterable is not None:
+            return self._fast_iterator(self._iterable)
         return self
 
+    def _fast_iterator(self, iterable: types.Iterator[T]) -> types.Iterator[T]:
+        """Iterate with (amortized) constant overhead per item.
+
+        The items are counted locally and the clock is only checked every
+        `check` items. At every check the progressbar is synchronised through
+        `update()` and `check` is tuned from the measured item rate so the
+        checks happen about once per `min_poll_interval` (or `poll_interval`
+        if that is smaller). Note that `value` lags behind the actual
+        iteration between checks.
+        """
+        if self._start_timer is None:
+            self.start()
+
+        pending = 0
+        check = 1
+        last_check = timeit.default_timer()
+        try:
+            for item in iterable:
+                yield item
+                pending += 1
+                if pending < check:
+                    continue
+
+                self.update(self.value + pending)
+                pending = 0
+
+                now = timeit.default_timer()
+                check = self._fast_iteration_check(check, now - last_check)
+                last_check = now
+        except GeneratorExit:
+            self.value += pending
+            self.finish(dirty=True)
+            raise
+
+        self.value += pending
+        self.finish()
+
+    def _fast_iteration_check(self, check: int, elapsed: float) -> int:
+        """Calculate the amount of items until the next clock check."""
+        interval = self.min_poll_interval
+        if self.poll_interval:
+            interval = min(interval, self.poll_interval)
+
+        if elapsed > 0:
+            # Grow slowly so a burst of fast items cannot stall the bar for
+            # too long when the items slow down again
+            check = min(int(check * interval / elapsed) or 1, check * 2)
+        else:
+            check *= 2
+        check = min(check, self._FAST_ITERATION_MAX_CHECK)
+
+        # Make sure we stop exactly at the max_value so we can raise an error
+        # for overflowing values
+        if self.max_value is not base.UnknownLength:
+            remaining = self.max_value - self.value  # type: ignore
+            check = min(check, max(int(remaining), 1))
+
+        return check
+
     def __next__(self):
         try:
             if self._iterable is None:
                 value = self.value
             else:
                 value = next(self._iterable)
-            if self.start_time is None:
+            if self._start_timer is None:
                 self.start()
             else:
                 self.update(self.value + 1)
@@ -380,13 +965,217 @@ class ProgressBar(StdRedirectMixin, ResizableMixin, ProgressBarBase):
         """Updates the ProgressBar by adding a new value."""
         return self.increment(value)
 
+    def increment(self, value=1, *args, **kwargs):
+        """Increments the value, safe to use from multiple threads.
+
+        Every thread adds to a counter of its own so incrementing never
+        waits for a lock. With a single thread the value is updated right
+        away. With multiple threads the first thread that finds that the
+        bar needs a redraw (see `_needs_update()`) adds the counters to
+        `value` and updates the bar, the other threads continue without
+        waiting for it. As a result `value` can lag behind the increments for
+        up to `min_poll_interval` seconds (or while paused), `finish()`
+        includes all increments.
+
+        Passing variables or `force` updates the bar right away.
+        """
+        local = self._increment_local
+        if getattr(local, 'slots', None) is not self._increment_slots:
+            # First increment of this thread (since the last `init()`)
+            local.slots = self._increment_slots
+            local.slot = [0]
+            local.slots.append(local.slot)
+        local.slot[0] += value
+
+        if args or kwargs:
+            with self._increment_lock:
+                self._apply_increments(*args, **kwargs)
+        elif (
+            len(self._increment_slots) == 1 or self._needs_update()
+        ) and self._increment_lock.acquire(blocking=False):
+            try:
+                self._apply_increments()
+            finally:
+                self._increment_lock.release()
+        return self
+
+    def _apply_increments(self, *args, **kwargs):
+        """Add the new increments of all threads and update the bar.
+
+        Needs to be called with the `_increment_lock` held.
+        """
+        total = sum([slot[0] for slot in self._increment_slots])
+        value = self.value + total - self._increments_applied
+        self._increments_applied = total
+        max_value = self.max_value
+        if not self.max_error and max_value not in (None, base.UnknownLength):
+            value = min(value, max_value)
+        self.update(value, *args, **kwargs)
+
     def _needs_update(self):
         """Returns whether the ProgressBar should redraw the line."""
-        pass
+        if self.paused:
+            return False
+        delta = timeit.default_timer() - self._last_update_timer
+        if delta < self.min_poll_interval:
+            # Prevent updating too often
+            return False
+        elif self.poll_interval and delta > self.poll_interval:
+            # Needs to redraw timers and animations
+            return True
+        elif (
+            len(self._increment_slots) > 1
+            and sum([slot[0] for slot in self._increment_slots])
+            != self._increments_applied
+        ):
+            # Other threads have increments that are not in `value` yet
+            return True
+
+        # Update if value increment is not large enough to
+        # add more bars to progressbar (according to current
+        # terminal width)
+        with contextlib.suppress(Exception):
+            divisor: float = self.max_value / self.term_width  # type: ignore
+            value_divisor = self.value // divisor  # type: ignore
+            pvalue_divisor = self.previous_value // divisor  # type: ignore
+            if value_divisor != pvalue_divisor:
+                return True
+        # No need to redraw yet
+        return False
+
+    def add_listener(self, listener: types.Callable[..., None]) -> None:
+        """Call `listener` after every `start()`, `update()` and `finish()`.
+
+        The listener is called with the progressbar, the name of the method
+        and the `force` argument of `update()` or the `dirty` argument of
+        `finish()`. The updates from within `start()` and `finish()` are
+        part of those calls. Adding a listener again does nothing.
+        """
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener: types.Callable[..., None]) -> None:
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _notify(self, event: str, **kwargs: types.Any) -> None:
+        if not getattr(self._listeners_local, 'silenced', False):
+            for listener in self.listeners:
+                listener(self, event, **kwargs)
+
+    @contextlib.contextmanager
+    def _silenced(self) -> types.Iterator[None]:
+        """Don't notify the listeners of the calls within this thread."""
+        local = self._listeners_local
+        silenced = getattr(local, 'silenced', False)
+        local.silenced = True
+        try:
+            yield
+        finally:
+            local.silenced = silenced
 
     def update(self, value=None, force=False, **kwargs):
         """Updates the ProgressBar to a new value."""
-        pass
+        if self._start_timer is None:
+            self.start()
+
+        if (
+            value is not None
+            and value is not base.UnknownLength
+            and isinstance(value, (int, float))
+        ):
+            if self.max_value is base.UnknownLength:
+                # Can't compare against unknown lengths so just update
+                pass
+            elif self.min_value > value:  # type: ignore
+                raise ValueError(
+                    f'Value {value} is too small. Should be '
+                    f'between {self.min_value} and {self.max_value}',
+                )
+            elif self.max_value < value:  # type: ignore
+                if self.max_error:
+                    raise ValueError(
+                        f'Value {value} is too large. Should be between '
+                        f'{self.min_value} and {self.max_value}',
+                    )
+                else:
+                    value = self.max_value
+
+            value_changed = value != self.value
+            self.previous_value = self.value
+            self.value = value  # type: ignore
+        else:
+            value_changed = False
+
+        # Save the updated values for dynamic messages
+        variables_changed = self._update_variables(kwargs)
+
+        if self.update_listener is not None and (
+            value_changed or variables_changed
+        ):
+            self.update_listener(self)
+
+        if self._needs_update() or variables_changed or force:
+            self._update_parents(value)
+
+        if self.listeners:
+            self._notify('update', force=force)
+
+    def _update_variables(self, kwargs):
+        variables_changed = False
+        for key, value_ in kwargs.items():
+            if key not in self.variables:
+                raise TypeError(
+                    'update() got an unexpected variable name as argument '
+                    f'{key!r}',
+                )
+            elif self.variables[key] != value_:
+                self.variables[key] = kwargs[key]
+                variables_changed = True
+        return variables_changed
+
+    def _update_parents(self, value):
+        self.updates += 1
+        ResizableMixin.update(self, value=value)
+        ProgressBarBase.update(self, value=value)
+        StdRedirectMixin.update(self, value=value)  # type: ignore
+
+        # Only flush if something was actually written
+        self.fd.flush()
+
+    def _store_update(
+        self,
+        value: NumberT | None,
+        variables: types.Dict[str, types.Any],
+    ) -> None:
+        """Validate and store a new value and variables without rendering.
+
+        This is used by the progressbars that render outside of `update()`.
+        """
+        if value is not None and self.max_value is not base.UnknownLength:
+            if value < self.min_value:
+                raise ValueError(
+                    f'Value {value} is too small. Should be '
+                    f'between {self.min_value} and {self.max_value}',
+                )
+            elif value > self.max_value:  # type: ignore
+                if self.max_error:
+                    raise ValueError(
+                        f'Value {value} is too large. Should be between '
+                        f'{self.min_value} and {self.max_value}',
+                    )
+                value = self.max_value  # type: ignore
+
+        if value is not None:
+            self.value = value
+
+        for key, value_ in variables.items():
+            if key not in self.variables:
+                raise TypeError(
+                    f'update() got an unexpected variable name as argument '
+                    f'{key!r}',
+                )
+            self.variables[key] = value_
 
     def start(self, max_value=None, init=True, *args, **kwargs):
         """Starts measuring time, and prints the bar at 0%.
@@ -406,7 +1195,89 @@ class ProgressBar(StdRedirectMixin, ResizableMixin, ProgressBarBase):
         ...
         >>> pbar.finish()
         """
-        pass
+        if init:
+            self.init()
+
+        # Prevent multiple starts
+        if self._start_timer is not None:  # pragma: no branch
+            return self
+
+        if max_value is not None:
+            self.max_value = max_value
+
+        if self.max_value is None:
+            self.max_value = self._DEFAULT_MAXVAL
+
+        StdRedirectMixin.start(self, max_value=max_value)
+        ResizableMixin.start(self, max_value=max_value)
+        ProgressBarBase.start(self, max_value=max_value)
+
+        # Constructing the default widgets is only done when we know max_value
+        if not self.widgets:
+            self.widgets = self.default_widgets()
+
+        self._init_prefix()
+        self._init_suffix()
+        self._calculate_poll_interval()
+        self._verify_max_value()
+
+        # The widgets are final now so we can compile the render plan
+        self._render_plan = RenderPlan(self)
+
+        now = timeit.default_timer()
+        if self.initial_start_time is None:
+            self._start_timer = now
+        else:
+            self.start_time = self.initial_start_time
+        self._last_update_time = self._last_update_timer = now
+        with self._silenced():
+            self.update(self.min_value, force=True)
+
+        if self.listeners:
+            self._notify('start')
+        return self
+
+    def _init_suffix(self):
+        if self.suffix:
+            self.widgets.append(
+                widgets.FormatLabel(self.suffix, new_style=True),
+            )
+            # Unset the suffix variable after applying so an extra start()
+            # won't keep copying it
+            self.suffix = None
+
+    def _init_prefix(self):
+        if self.prefix:
+            self.widgets.insert(
+                0,
+                widgets.FormatLabel(self.prefix, new_style=True),
+            )
+            # Unset the prefix variable after applying so an extra start()
+            # won't keep copying it
+            self.prefix = None
+
+    def _verify_max_value(self):
+        if (
+            self.max_value is not base.UnknownLength
+            and self.max_value is not None
+            and self.max_value < 0  # type: ignore
+        ):
+            raise ValueError(
+                f'max_value out of range, got {self.max_value!r}',
+            )
+
+    def _calculate_poll_interval(self) -> None:
+        self.num_intervals = max(100, self.term_width)
+        for widget in self.widgets:
+            interval: int | float | None = utils.deltas_to_seconds(
+                getattr(widget, 'INTERVAL', None),
+                default=None,
+            )
+            if interval is not None:
+                self.poll_interval = min(
+                    self.poll_interval or interval,
+                    interval,
+                )
 
     def finish(self, end='\n', dirty=False):
         """
@@ -421,7 +1292,21 @@ class ProgressBar(StdRedirectMixin, ResizableMixin, ProgressBarBase):
             dirty (bool): When True the progressbar kept the current state and
                 won't be set to 100 percent
         """
-        pass
+        if dirty and self._increment_slots:
+            # Include the increments that were not applied yet
+            with self._increment_lock:
+                self._apply_increments(force=True)
+
+        if not dirty:
+            self._end_timer = timeit.default_timer()
+            with self._silenced():
+                self.update(self.max_value, force=True)
+
+        StdRedirectMixin.finish(self, end=end)
+        ResizableMixin.finish(self)
+        ProgressBarBase.finish(self)
+        if self.listeners:
+            self._notify('finish', dirty=dirty)
 
     @property
     def currval(self):
@@ -429,7 +1314,13 @@ class ProgressBar(StdRedirectMixin, ResizableMixin, ProgressBarBase):
         Legacy method to make progressbar-2 compatible with the original
         progressbar package.
         """
-        pass
+        warnings.warn(
+            'The usage of `currval` is deprecated, please use '
+            '`value` instead',
+            DeprecationWarning,
+            stacklevel=1,
+        )
+        return self.value
 
 class DataTransferBar(ProgressBar):
     """A progress bar with sensible defaults for downloads etc.
@@ -437,8 +1328,325 @@ class DataTransferBar(ProgressBar):
     This assumes that the values its given are numbers of bytes.
     """
 
+    def default_widgets(self):
+        if self.max_value:
+            return [
+                widgets.Percentage(),
+                ' of ',
+                widgets.DataSize('max_value'),
+                ' ',
+                widgets.Bar(),
+                ' ',
+                widgets.Timer(),
+                ' ',
+                widgets.SmoothingETA(),
+            ]
+        else:
+            return [
+                widgets.AnimatedMarker(),
+                ' ',
+                widgets.DataSize(),
+                ' ',
+                widgets.Timer(),
+            ]
+
 class NullBar(ProgressBar):
     """
     Progress bar that does absolutely nothing. Useful for single verbosity
     flags.
     """
+
+    def start(self, *args, **kwargs):
+        return self
+
+    def update(self, *args, **kwargs):
+        return self
+
+    def finish(self, *args, **kwargs):
+        return self
+
+
+class BackgroundProgressBar(ProgressBar):
+    """
+    Progress bar that renders from a background (daemon) thread.
+
+    After `start()`, `update()` only stores the new value and variables so the
+    calling thread never has to wait for the terminal. The render thread
+    redraws the bar every `poll_interval` (or `min_poll_interval` if there is
+    no `poll_interval`) and `finish()` stops the thread before rendering the
+    final state from the calling thread.
+
+    Updating is lock free, but it is not safe to update the value from
+    multiple threads at the same time.
+
+    >>> progress = BackgroundProgressBar(max_value=100).start()
+    >>> for i in range(100):
+    ...     progress.update(i + 1)
+    >>> progress.finish()
+    """
+
+    _render_thread: types.Optional[threading.Thread] = None
+    _render_event: types.Optional[threading.Event] = None
+
+    def start(self, *args, **kwargs):
+        if self._render_thread is not None:
+            return self
+
+        ProgressBar.start(self, *args, **kwargs)
+        self._render_event = threading.Event()
+        self._render_thread = threading.Thread(
+            target=self._render_loop,
+            name=f'{self!r} renderer',
+            daemon=True,
+        )
+        self._render_thread.start()
+        return self
+
+    def update(self, value=None, force=False, **kwargs):
+        """Store the new value, the render thread takes care of the rest."""
+        if self._render_thread is None:
+            return ProgressBar.update(self, value, force=force, **kwargs)
+
+        self._store_update(value, kwargs)
+        if force and self._render_event is not None:
+            self._render_event.set()
+        if self.listeners:
+            self._notify('update', force=force)
+        return None
+
+    def finish(self, end='\n', dirty=False):
+        thread, self._render_thread = self._render_thread, None
+        if thread is not None:
+            if self._render_event is not None:
+                self._render_event.set()
+            if thread is not threading.current_thread():
+                thread.join()
+
+        ProgressBar.finish(self, end=end, dirty=dirty)
+
+    def _render_loop(self):
+        thread = threading.current_thread()
+        event = self._render_event
+        assert event is not None, 'The render thread needs an event'
+        interval = self.poll_interval or self.min_poll_interval
+
+        rendered = self.value
+        while self._render_thread is thread:
+            event.wait(interval)
+            event.clear()
+            if self._render_thread is not thread:
+                break
+
+            value = self.value
+            try:
+                self.previous_value = rendered
+                # Redrawing is not an update for the listeners
+                with self._silenced():
+                    ProgressBar.update(self, force=value != rendered)
+            except Exception:
+                logger.exception('Unable to render %r, stopping', self)
+                return
+            rendered = value
+
+
+class LogProgressBar(ProgressBar):
+    """
+    Progress bar for log files and other non-terminal output.
+
+    Instead of redrawing the bar, a line is logged at the start and the end,
+    at every `log_step` percent, at the `milestones` (percentages) and at
+    most once per `log_interval` seconds otherwise. Between those lines
+    `update()` only stores the value, nothing is formatted or written.
+
+    With `json_lines` every line is a JSON object with the `event` (`start`,
+    `update`, `milestone` or `finish`), the value, the elapsed seconds, the
+    rate, the ETA and the variables instead of the formatted widgets.
+
+    >>> import io
+    >>> progress = LogProgressBar(
+    ...     max_value=100, log_step=50, fd=io.StringIO(), json_lines=True,
+    ... )
+    >>> for i in progress(range(100)):
+    ...     pass
+    >>> lines = progress.fd.getvalue().splitlines()
+    >>> [json.loads(line)['value'] for line in lines]
+    [0, 50, 100]
+
+    Args:
+        log_interval (float): The maximum interval between lines in
+            seconds while the value changes
+        log_step (float): Log every `log_step` percent, not used for
+            unknown lengths
+        milestones (list): Additional percentages to log
+        json_lines (bool): Log JSON objects instead of the widgets
+    """
+
+    _logged_value: types.Optional[NumberT] = None
+    _next_log_time: float = 0.0
+    _next_log_value: float = math.inf
+
+    def __init__(
+        self,
+        *args,
+        log_interval: float | timedelta = 60.0,
+        log_step: float | None = 10.0,
+        milestones: types.Iterable[float] = (),
+        json_lines: bool = False,
+        **kwargs,
+    ):
+        kwargs.setdefault('line_breaks', True)
+        ProgressBar.__init__(self, *args, **kwargs)
+        self.log_interval = utils.deltas_to_seconds(log_interval)
+        self.log_step = log_step
+        self.milestones = sorted(milestones)
+        self.json_lines = json_lines
+
+    def init(self):
+        ProgressBar.init(self)
+        self._logged_value = None
+        self._next_log_time = 0.0
+        self._next_log_value = math.inf
+
+    def update(self, value=None, force=False, **kwargs):
+        """Store the new value and log a line if needed."""
+        if self._start_timer is None:
+            self.start()
+
+        if value is base.UnknownLength:
+            value = None
+        elif value is not None and value != self.value:
+            self.previous_value = self.value
+        self._store_update(value, kwargs)
+
+        if force:
+            if self._end_timer is not None:
+                self._log('finish')
+            elif self._logged_value is None:
+                self._log('start')
+            else:
+                self._log('update')
+        elif self.value >= self._next_log_value:
+            self._log(self._crossed_event())
+        elif kwargs or self.value != self._logged_value:
+            now = timeit.default_timer()
+            if now >= self._next_log_time:
+                self._log('update', now)
+
+        if self.listeners:
+            self._notify('update', force=force)
+
+    def finish(self, end='\n', dirty=False):
+        ProgressBar.finish(self, end=end, dirty=dirty)
+        if dirty:
+            self._log('finish')
+
+    def _crossed_event(self) -> str:
+        if self.max_value is base.UnknownLength:
+            return 'update'
+
+        lower = self._percentage_of(self._logged_value)
+        upper = self._percentage_of(self.value)
+        for milestone in self.milestones:
+            if lower < milestone <= upper:
+                return 'milestone'
+        return 'update'
+
+    def _percentage_of(self, value) -> float:
+        total = self.max_value - self.min_value
+        if not total:
+            return 100.0
+        return (value - self.min_value) * 100.0 / total
+
+    def _value_at(self, percentage: float) -> float:
+        return (
+            self.min_value
+            + (self.max_value - self.min_value) * percentage / 100
+        )
+
+    def _schedule_next_log(self, now: float):
+        self._logged_value = self.value
+        self._next_log_time = now + self.log_interval
+
+        if self.max_value is base.UnknownLength:
+            self._next_log_value = math.inf
+            return
+
+        percentage = self._percentage_of(self.value)
+        candidates = [
+            milestone
+            for milestone in self.milestones
+            if milestone > percentage
+        ]
+        if self.log_step:
+            step = (percentage // self.log_step + 1) * self.log_step
+            candidates.append(step)
+        self._next_log_value = (
+            self._value_at(min(candidates)) if candidates else math.inf
+        )
+
+    def _log(self, event: str, now: float | None = None):
+        if now is None:
+            now = timeit.default_timer()
+        self._schedule_next_log(now)
+        self.updates += 1
+
+        if self.json_lines:
+            line = json.dumps(progress_record(self, event, now), default=str)
+        else:
+            line = self._format_line().rstrip()
+            if not self.enable_colors:
+                line = utils.no_color(line)
+
+        self.fd.write(line + '\n')
+        self.fd.flush()
+
+
+def progress_record(
+    progress: ProgressBar,
+    event: str,
+    now: float | None = None,
+) -> types.Dict[str, types.Any]:
+    """
+    Return the state of a progressbar as a JSON serializable dict.
+
+    The record contains the `event`, the `label` (if any), the value, the
+    percentage, the elapsed seconds, the average rate per second, the ETA in
+    seconds and the variables (if any). Unknown values are `None`.
+
+    This is the format of the `LogProgressBar` JSON lines and the
+    `progressbar.events` streams.
+    """
+    if progress._start_timer is None:
+        elapsed = 0.0
+    else:
+        if progress._end_timer is not None:
+            now = progress._end_timer
+        elif now is None:
+            now = timeit.default_timer()
+        elapsed = now - progress._start_timer
+
+    value = progress.value
+    done = value - progress.min_value
+    rate = done / elapsed if elapsed > 0 else None
+
+    max_value = progress.max_value
+    eta = None
+    if max_value is base.UnknownLength:
+        max_value = None
+    elif rate:
+        eta = max(max_value - value, 0) / rate
+
+    record: types.Dict[str, types.Any] = dict(event=event)
+    if progress.label:
+        record['label'] = progress.label
+    record.update(
+        value=value,
+        max_value=max_value,
+        percentage=progress.percentage,
+        elapsed=round(elapsed, 3),
+        rate=None if rate is None else round(rate, 3),
+        eta=None if eta is None else round(eta, 3),
+    )
+    if progress.variables:
+        record['variables'] = dict(progress.variables)
+    return record
@@ -0,0 +1,186 @@
+'''
+Machine readable progress events for other processes.
+
+An `EventStream` writes the state of progressbars as NDJSON, one JSON
+object per line, to a file, a path or a socket. It can be attached to a
+`ProgressBar` or a `MultiBar` next to the regular terminal output:
+
+>>> import io
+>>> output = io.StringIO()
+>>> events = EventStream(output)
+>>> progress = events.attach(bar.ProgressBar(max_value=10, fd=io.StringIO()))
+>>> for i in progress(range(10)):
+...     pass
+>>> [json.loads(line)['event'] for line in output.getvalue().splitlines()]
+['start', 'finish']
+
+Or it can replace the terminal output completely, `EventStream.progressbar`
+returns a progressbar that never formats any widgets:
+
+>>> output = io.StringIO()
+>>> with EventStream(output).progressbar(max_value=10) as progress:
+...     for i in range(10):
+...         progress.update(i)
+>>> json.loads(output.getvalue().splitlines()[-1])['value']
+10
+
+The events are the records of `progressbar.bar.progress_record`: the
+`event` (`start`, `update` or `finish`), the `label`, `value`,
+`max_value`, `percentage`, `elapsed` seconds, `rate` per second, `eta` in
+seconds and the `variables`.
+'''
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import timeit
+import typing
+from pathlib import Path
+
+from . import bar, multi
+
+
+class EventStream:
+    '''
+    Writes NDJSON progress events to a file, path or socket.
+
+    The `start` and `finish` events are always written, the `update` events
+    at most once per `min_interval` seconds per progressbar and only if the
+    value or the variables changed. The updates in between only cost a
+    comparison with the time of the next event.
+
+    Args:
+        fd: A text file, a path (opened for appending) or a connected
+            socket
+        min_interval: The minimum seconds between the updates of a single
+            progressbar
+    '''
+
+    fd: typing.IO[str]
+
+    def __init__(
+        self,
+        fd: typing.IO[str] | str | Path | socket.socket,
+        min_interval: float = 1.0,
+    ):
+        self._close = not hasattr(fd, 'write')
+        if isinstance(fd, socket.socket):
+            self.fd = fd.makefile('w', encoding='utf-8')
+        elif isinstance(fd, (str, Path)):
+            self.fd = open(fd, 'a')  # noqa: SIM115
+        else:
+            self.fd = typing.cast(typing.IO[str], fd)
+
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        # The time of the next update event and the last written state
+        self._next: dict[bar.ProgressBar, float] = {}
+        self._written: dict[bar.ProgressBar, tuple[typing.Any, dict]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def attach(self, progress):
+        '''
+        Write the events of a `ProgressBar` or all bars of a `MultiBar`.
+
+        Attaching the same progressbar or multibar again does nothing.
+
+        Returns:
+            The given progressbar or multibar
+        '''
+        if isinstance(progress, multi.MultiBar):
+            if self not in progress.event_streams:
+                progress.event_streams.append(self)
+            for bar_ in progress.values():
+                self.attach(bar_)
+            return progress
+
+        progress.add_listener(self._listen)
+        return progress
+
+    def progressbar(self, **kwargs: typing.Any) -> bar.ProgressBar:
+        '''
+        Create a progressbar that writes events instead of rendering.
+
+        The progressbar is a `LogProgressBar` that writes JSON lines to the
+        stream, the `kwargs` are passed on to it.
+        '''
+        kwargs.setdefault('log_interval', self.min_interval)
+        kwargs.setdefault('log_step', None)
+        return bar.LogProgressBar(
+            fd=_LockedWriter(self),
+            json_lines=True,
+            **kwargs,
+        )
+
+    def _listen(
+        self,
+        progress: bar.ProgressBar,
+        event: str,
+        **kwargs: typing.Any,
+    ) -> None:
+        if event != 'update':
+            self.emit(progress, event)
+            return
+
+        now = timeit.default_timer()
+        if now >= self._next.get(progress, 0.0):
+            state = progress.value, dict(progress.variables)
+            if self._written.get(progress) != state:
+                self.emit(progress, event, now)
+
+    def emit(
+        self,
+        progress: bar.ProgressBar,
+        event: str,
+        now: float | None = None,
+    ) -> None:
+        '''Write an event for the progressbar regardless of the interval.'''
+        if now is None:
+            now = timeit.default_timer()
+        self._next[progress] = now + self.min_interval
+        self._written[progress] = progress.value, dict(progress.variables)
+
+        record = bar.progress_record(progress, event, now)
+        self.write(json.dumps(record, default=str))
+
+        if event == 'finish':
+            self._next.pop(progress, None)
+            self._written.pop(progress, None)
+
+    def write(self, line: str) -> None:
+        with self._lock:
+            self.fd.write(line + '\n')
+            self.fd.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._close:
+                self.fd.close()
+
+
+class _LockedWriter:
+    '''Minimal text stream writing whole lines through the `EventStream`.'''
+
+    def __init__(self, events: EventStream):
+        self.events = events
+        self._line = ''
+
+    def write(self, value: str) -> int:
+        self._line += value
+        while '\n' in self._line:
+            line, self._line = self._line.split('\n', 1)
+            self.events.write(line)
+        return len(value)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
@@ -0,0 +1,280 @@
+'''
+Prometheus/OpenMetrics exposition of the progressbar state.
+
+The `MetricsExporter` does not hook into the progressbars at all, the
+metrics are read from the registered `ProgressBar` and `MultiBar` instances
+when they are scraped, so updating the progressbars costs nothing extra.
+The metrics can be served over HTTP or written to a file for the textfile
+collector of the node exporter:
+
+>>> exporter = MetricsExporter()
+>>> progress = exporter.register(
+...     bar.ProgressBar(max_value=10, fd=io.StringIO()).start(),
+... )
+>>> progress.label = 'job'
+>>> print(exporter.render().splitlines()[2])
+progressbar_value{bar="job"} 0
+>>> progress.finish()
+
+The rate is measured over the samples of a `SamplesMixin` widget (such as
+the `AdaptiveETA` or `AdaptiveTransferSpeed`) if the progressbar has one,
+otherwise it is the average rate since the start.
+'''
+
+from __future__ import annotations
+
+import http.server
+import io
+import math
+import os
+import tempfile
+import threading
+import typing
+from pathlib import Path
+
+from . import bar, multi, utils
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+OPENMETRICS_CONTENT_TYPE = (
+    'application/openmetrics-text; version=1.0.0; charset=utf-8'
+)
+
+#: The metric families: name, type, help and the `progress_record` key
+FAMILIES = (
+    ('value', 'gauge', 'The current value', 'value'),
+    ('max_value', 'gauge', 'The maximum value if known', 'max_value'),
+    ('rate', 'gauge', 'The rate in units per second', 'rate'),
+    ('eta_seconds', 'gauge', 'The estimated seconds to go', 'eta'),
+    ('elapsed_seconds', 'gauge', 'The seconds since the start', 'elapsed'),
+    ('finished', 'gauge', 'Whether the progressbar finished', 'finished'),
+    ('updates', 'counter', 'The number of redraws', 'updates'),
+)
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+
+def sample_rate(progress: bar.ProgressBar) -> float | None:
+    '''The rate over the samples of a `SamplesMixin` widget if available.'''
+    for value in progress.extra.values():
+        if isinstance(value, utils.SampleBuffer):
+            delta_time, delta_value = value.delta()
+            if delta_time > 0:
+                return delta_value / delta_time
+    return None
+
+
+class MetricsExporter:
+    '''
+    Exposes the state of progressbars as Prometheus metrics.
+
+    Every progressbar is identified by the `bar` label: the label of the
+    progressbar (such as the key in a `MultiBar`) or `bar<index>`.
+
+    Args:
+        prefix: The prefix of the metric names
+        labels: Constant labels to add to every metric, e.g. the job name
+    '''
+
+    def __init__(
+        self,
+        prefix: str = 'progressbar',
+        labels: dict[str, str] | None = None,
+    ):
+        self.prefix = prefix
+        self.labels = labels or {}
+        self._lock = threading.Lock()
+        self._registered: list[bar.ProgressBar | multi.MultiBar] = []
+        self._server: http.server.ThreadingHTTPServer | None = None
+        self._stopped = threading.Event()
+
+    def register(self, progress):
+        '''Register a `ProgressBar` or `MultiBar`, returns it as well.'''
+        with self._lock:
+            if progress not in self._registered:
+                self._registered.append(progress)
+        return progress
+
+    def unregister(self, progress) -> None:
+        with self._lock:
+            if progress in self._registered:
+                self._registered.remove(progress)
+
+    def progressbars(self) -> list[bar.ProgressBar]:
+        '''The registered progressbars, including those of the multibars.'''
+        with self._lock:
+            registered = list(self._registered)
+
+        progressbars = []
+        for progress in registered:
+            if isinstance(progress, multi.MultiBar):
+                progressbars.extend(list(progress.values()))
+            else:
+                progressbars.append(progress)
+        return progressbars
+
+    def collect(self) -> list[dict[str, typing.Any]]:
+        '''Return the current state of every registered progressbar.'''
+        records = []
+        for progress in self.progressbars():
+            if progress._start_timer is None:
+                continue
+
+            record = bar.progress_record(progress, 'update')
+            rate = sample_rate(progress)
+            if rate is not None:
+                record['rate'] = rate
+                max_value = record['max_value']
+                record['eta'] = None
+                if max_value is not None and rate > 0:
+                    record['eta'] = max(max_value - progress.value, 0) / rate
+
+            record['bar'] = progress.label or f'bar{progress.index}'
+            record['finished'] = progress._end_timer is not None
+            record['updates'] = progress.updates
+            records.append(record)
+        return records
+
+    def render(self, openmetrics: bool = False) -> str:
+        '''Render the metrics in the Prometheus or OpenMetrics format.'''
+        records = self.collect()
+        output = io.StringIO()
+        for family, type_, help_, key in FAMILIES:
+            name = family = f'{self.prefix}_{family}'
+            if type_ == 'counter':
+                name += '_total'
+                # Only OpenMetrics names the family without the suffix
+                if not openmetrics:
+                    family = name
+
+            output.write(f'# HELP {family} {help_}\n')
+            output.write(f'# TYPE {family} {type_}\n')
+
+            for record in records:
+                value = record[key]
+                if value is None:
+                    continue
+
+                labels = dict(self.labels, bar=record['bar'])
+                label_str = ','.join(
+                    f'{label}="{_escape(str(label_value))}"'
+                    for label, label_value in labels.items()
+                )
+                output.write(
+                    f'{name}{{{label_str}}} {_format_value(value)}\n',
+                )
+
+        if openmetrics:
+            output.write('# EOF\n')
+        return output.getvalue()
+
+    def write_textfile(self, path: str | Path) -> None:
+        '''
+        Write the metrics for the textfile collector of the node exporter.
+
+        The file is replaced atomically so the collector never reads a
+        partially written file.
+        '''
+        path = Path(path)
+        fd, temporary = tempfile.mkstemp(
+            dir=path.parent,
+            prefix=f'.{path.name}.',
+        )
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                fh.write(self.render())
+            # `mkstemp` only allows the owner to read the file
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def write_textfile_every(
+        self,
+        path: str | Path,
+        interval: float = 15.0,
+    ) -> threading.Thread:
+        '''Write the textfile every `interval` seconds until `shutdown`.'''
+
+        def run():
+            while True:
+                self.write_textfile(path)
+                if self._stopped.wait(interval):
+                    # Write the final state before stopping
+                    self.write_textfile(path)
+                    return
+
+        self._stopped.clear()
+        thread = threading.Thread(
+            target=run,
+            name=f'{self.__class__.__name__} textfile writer',
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def serve(
+        self,
+        port: int = 0,
+        host: str = '127.0.0.1',
+    ) -> http.server.ThreadingHTTPServer:
+        '''
+        Serve the metrics over HTTP from a daemon thread.
+
+        Every path serves the metrics, use port `0` to pick a free port which
+        is available as `server.server_address[1]`.
+        '''
+        exporter = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                openmetrics = 'application/openmetrics-text' in (
+                    self.headers.get('Accept') or ''
+                )
+                body = exporter.render(openmetrics).encode('utf-8')
+                self.send_response(200)
+                self.send_header(
+                    'Content-Type',
+                    OPENMETRICS_CONTENT_TYPE if openmetrics else CONTENT_TYPE,
+                )
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(
+            target=server.serve_forever,
+            name=f'{self.__class__.__name__} server',
+            daemon=True,
+        )
+        thread.start()
+        self._server = server
+        return server
+
+    def shutdown(self) -> None:
+        '''Stop the HTTP server and the textfile writer.'''
+        self._stopped.set()
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
@@ -1,4 +1,6 @@
 from __future__ import annotations
+import contextlib
+import bisect
 import enum
 import io
 import itertools
@@ -10,9 +12,10 @@ import timeit
 import typing
 from datetime import timedelta
 import python_utils
-from . import bar, terminal
+from . import bar, terminal, utils
 from .terminal import stream
 SortKeyFunc = typing.Callable[[bar.ProgressBar], typing.Any]
+T = typing.TypeVar('T', bound=typing.Hashable)
 
 class SortKey(str, enum.Enum):
     """
@@ -31,6 +34,215 @@ class SortKey(str, enum.Enum):
     VALUE = 'value'
     PERCENTAGE = 'percentage'
 
+class SortIndex(typing.Generic[T]):
+    """
+    An ordering of items by `keyfunc` which is maintained incrementally.
+
+    Instead of sorting all items every time, only the items marked with
+    `invalidate` are looked up again and moved if their key changed. Items
+    with equal keys keep the order in which they were added, just like
+    `sorted` would.
+
+    >>> index = SortIndex(len)
+    >>> for item in 'ccc', 'a', 'dd':
+    ...     index.add(item)
+    >>> list(index)
+    ['a', 'dd', 'ccc']
+    >>> index.reverse = True
+    >>> list(index)
+    ['ccc', 'dd', 'a']
+    """
+
+    keyfunc: typing.Callable[[T], typing.Any]
+    _reverse: bool
+    #: The items that need to be looked up again on the next `refresh`
+    changed: set[T]
+    _entries: list[tuple[typing.Any, int, T]]
+    _keys: dict[T, tuple[typing.Any, int, T]]
+
+    def __init__(
+        self,
+        keyfunc: typing.Callable[[T], typing.Any],
+        reverse: bool=False,
+        items: typing.Iterable[T]=(),
+    ):
+        self.keyfunc = keyfunc
+        self._reverse = reverse
+        self.changed = set()
+        self._entries = []
+        self._keys = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        for item in items:
+            self.add(item)
+
+    @property
+    def reverse(self) -> bool:
+        return self._reverse
+
+    @reverse.setter
+    def reverse(self, reverse: bool):
+        if reverse == self._reverse:
+            return
+
+        with self._lock:
+            self._reverse = reverse
+            self._entries = sorted(
+                (key, -sequence, item)
+                for key, sequence, item in self._entries
+            )
+            self._keys = {entry[-1]: entry for entry in self._entries}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, item) -> bool:
+        return item in self._keys
+
+    def __iter__(self) -> typing.Iterator[T]:
+        self.refresh()
+        with self._lock:
+            entries = self._entries[:]
+        if self._reverse:
+            entries.reverse()
+        return (entry[-1] for entry in entries)
+
+    def add(self, item: T) -> None:
+        """Add the item, existing items are marked as changed instead."""
+        if item in self._keys:
+            self.invalidate(item)
+            return
+
+        # Storing the negated sequence number keeps the order of items with
+        # equal keys stable when iterating in reverse
+        sequence = next(self._counter)
+        entry = (
+            self.keyfunc(item),
+            -sequence if self._reverse else sequence,
+            item,
+        )
+        with self._lock:
+            bisect.insort(self._entries, entry)
+            self._keys[item] = entry
+
+    def discard(self, item: T) -> None:
+        with self._lock:
+            entry = self._keys.pop(item, None)
+            if entry is not None:
+                del self._entries[bisect.bisect_left(self._entries, entry)]
+
+    def invalidate(self, item: T) -> None:
+        """Mark the key of `item` as (possibly) changed."""
+        self.changed.add(item)
+
+    def refresh(self) -> None:
+        """Move the changed items to their new position."""
+        # `set.pop` is atomic so items can be invalidated from other threads
+        while self.changed:
+            try:
+                item = self.changed.pop()
+            except KeyError:  # pragma: no cover
+                break
+
+            entry = self._keys.get(item)
+            if entry is None:
+                continue
+
+            key = self.keyfunc(item)
+            if key == entry[0]:
+                continue
+
+            with self._lock:
+                del self._entries[bisect.bisect_left(self._entries, entry)]
+                entry = self._keys[item] = (key, entry[1], item)
+                bisect.insort(self._entries, entry)
+
+
+class FrameScheduler:
+    """
+    Adaptive frame interval for the render loop of the `MultiBar`.
+
+    The delay between two frames is at least `min_interval` and long enough
+    for rendering to take at most `max_load` of the time and, if given, to
+    write at most `max_bytes_per_second`. As long as the progressbars are
+    updated frames are rendered after this delay, when they are idle the
+    interval doubles every frame up to `idle_interval`.
+
+    >>> scheduler = FrameScheduler(0.1, idle_interval=1.0)
+    >>> scheduler.frame(cost=0.001, size=100, active=True)
+    0.1
+    >>> scheduler.frame(cost=0.001, size=100, active=False)
+    0.2
+    >>> scheduler.frame(cost=0.5, size=100, active=True)
+    5.0
+    >>> scheduler.delay
+    5.0
+    """
+
+    min_interval: float
+    idle_interval: float
+    max_load: float
+    max_bytes_per_second: float | None
+    #: The minimum delay before the next frame
+    delay: float
+    #: The maximum delay before the next frame if there are no updates
+    interval: float
+
+    def __init__(
+        self,
+        min_interval: float,
+        idle_interval: float=1.0,
+        max_load: float=0.1,
+        max_bytes_per_second: float | None=None,
+    ):
+        self.min_interval = min_interval
+        self.idle_interval = max(idle_interval, min_interval)
+        self.max_load = max_load
+        self.max_bytes_per_second = max_bytes_per_second
+        self.delay = self.interval = min_interval
+
+    @classmethod
+    def for_stream(
+        cls,
+        fd: typing.IO[str],
+        min_interval: float,
+    ) -> FrameScheduler:
+        """Create a scheduler for `fd`, slowing down for non terminals.
+
+        Redirected output is kept for logs so every frame has a cost, there
+        is no need to redraw more than once per second.
+        """
+        isatty = False
+        with contextlib.suppress(AttributeError, ValueError):
+            isatty = fd.isatty()
+
+        if isatty:
+            return cls(min_interval)
+        else:
+            return cls(max(min_interval, 1.0), idle_interval=10.0)
+
+    def frame(self, cost: float, size: int, active: bool) -> float:
+        """Register a rendered frame and return the `interval` until the next.
+
+        Args:
+            cost: The number of seconds it took to render the frame
+            size: The number of characters written
+            active: Whether any progressbar was updated since the last frame
+        """
+        delay = max(self.min_interval, cost / self.max_load)
+        if self.max_bytes_per_second:
+            delay = max(delay, size / self.max_bytes_per_second)
+
+        if active:
+            interval = delay
+        else:
+            interval = max(delay, min(self.interval * 2, self.idle_interval))
+
+        self.delay = delay
+        self.interval = interval
+        return interval
+
+
 class MultiBar(typing.Dict[str, bar.ProgressBar]):
     fd: typing.TextIO
     _buffer: io.StringIO
@@ -43,15 +255,50 @@ class MultiBar(typing.Dict[str, bar.ProgressBar]):
     remove_finished: float | None
     progressbar_kwargs: dict[str, typing.Any]
     sort_keyfunc: SortKeyFunc
+    _sort_index: SortIndex[bar.ProgressBar] | None = None
+    #: The maximum number of rows to render, including the summary line. Use
+    #: `'auto'` to fit the terminal height or `None` to render all bars
+    max_rows: int | typing.Literal['auto'] | None
+    #: The format of the summary of the progressbars outside of the viewport,
+    #: with the `hidden`, `running`, `waiting` and `finished` counts
+    summary_format: str
+    #: The scheduler for the render loop, created by `run` if not given
+    frame_scheduler: FrameScheduler | None
     _previous_output: list[str]
     _finished_at: dict[bar.ProgressBar, float]
+    _finished_rendered: set[bar.ProgressBar]
     _labeled: set[bar.ProgressBar]
+    #: The progressbars that changed since they were last formatted
+    _changed: set[bar.ProgressBar]
     _print_lock: threading.RLock = threading.RLock()
     _thread: threading.Thread | None = None
     _thread_finished: threading.Event = threading.Event()
     _thread_closed: threading.Event = threading.Event()
+    _updated: threading.Event
 
-    def __init__(self, bars: typing.Iterable[tuple[str, bar.ProgressBar]] | None=None, fd: typing.TextIO=sys.stderr, prepend_label: bool=True, append_label: bool=False, label_format='{label:20.20} ', initial_format: str | None='{label:20.20} Not yet started', finished_format: str | None=None, update_interval: float=1 / 60.0, show_initial: bool=True, show_finished: bool=True, remove_finished: timedelta | float=timedelta(seconds=3600), sort_key: str | SortKey=SortKey.CREATED, sort_reverse: bool=True, sort_keyfunc: SortKeyFunc | None=None, **progressbar_kwargs):
+    def __init__(
+        self,
+        bars: typing.Iterable[tuple[str, bar.ProgressBar]] | None=None,
+        fd: typing.TextIO=sys.stderr,
+        prepend_label: bool=True,
+        append_label: bool=False,
+        label_format='{label:20.20} ',
+        initial_format: str | None='{label:20.20} Not yet started',
+        finished_format: str | None=None,
+        update_interval: float=1 / 60.0,
+        show_initial: bool=True,
+        show_finished: bool=True,
+        remove_finished: timedelta | float=timedelta(seconds=3600),
+        sort_key: str | SortKey=SortKey.CREATED,
+        sort_reverse: bool=True,
+        sort_keyfunc: SortKeyFunc | None=None,
+        max_rows: int | typing.Literal['auto'] | None=None,
+        summary_format: str=(
+            '{running} more running / {waiting} waiting / {finished} finished'
+        ),
+        frame_scheduler: FrameScheduler | None=None,
+        **progressbar_kwargs,
+    ):
         self.fd = fd
         self.prepend_label = prepend_label
         self.append_label = append_label
@@ -67,11 +314,23 @@ class MultiBar(typing.Dict[str, bar.ProgressBar]):
             sort_keyfunc = operator.attrgetter(sort_key)
         self.sort_keyfunc = sort_keyfunc
         self.sort_reverse = sort_reverse
+        self.max_rows = max_rows
+        self.summary_format = summary_format
+        self.frame_scheduler = frame_scheduler
+        self._updated = threading.Event()
         self._labeled = set()
+        self._changed = set()
         self._finished_at = {}
+        self._finished_rendered = set()
         self._previous_output = []
         self._buffer = io.StringIO()
-        super().__init__(bars or {})
+        #: The `events.EventStream`s that are attached to all bars
+        self.event_streams = []
+        super().__init__()
+        # Add the bars one by one so they are labeled and attached like the
+        # bars that are added later
+        for key, bar_ in dict(bars or {}).items():
+            self[key] = bar_
 
     def __setitem__(self, key: str, bar: bar.ProgressBar):
         """Add a progressbar to the multibar."""
@@ -80,15 +339,28 @@ class MultiBar(typing.Dict[str, bar.ProgressBar]):
             bar.fd = stream.LastLineStream(self.fd)
             bar.paused = True
             bar.print = self.print
+        if bar.update_listener != self._bar_updated:
+            # A progressbar can be added again (under another key), it should
+            # only be attached once
+            bar.update_listener = self._bar_updated
+            for event_stream in self.event_streams:
+                event_stream.attach(bar)
         if bar.index == -1:
             bar.index = next(bar._index_counter)
         super().__setitem__(key, bar)
+        if self._sort_index is not None:
+            self._sort_index.add(bar)
 
     def __delitem__(self, key):
         """Remove a progressbar from the multibar."""
+        bar_ = super().__getitem__(key)
         super().__delitem__(key)
-        self._finished_at.pop(key, None)
-        self._labeled.discard(key)
+        self._finished_at.pop(bar_, None)
+        self._finished_rendered.discard(bar_)
+        self._labeled.discard(bar_)
+        self._changed.discard(bar_)
+        if self._sort_index is not None:
+            self._sort_index.discard(bar_)
 
     def __getitem__(self, key):
         """Get (and create if needed) a progressbar from the multibar."""
@@ -99,11 +371,265 @@ class MultiBar(typing.Dict[str, bar.ProgressBar]):
             self[key] = progress
             return progress
 
-    def render(self, flush: bool=True, force: bool=False):
-        """Render the multibar to the given stream."""
-        pass
+    def _bar_updated(self, bar_: bar.ProgressBar):
+        """Wake up the render loop, called when a progressbar changed."""
+        self._changed.add(bar_)
+        if not self._updated.is_set():
+            self._updated.set()
+        self.sort_key_changed(bar_)
+
+    def render(self, flush: bool=True, force: bool=False) -> int:
+        """Render the multibar to the given stream.
+
+        Only the rows that changed since the previous render are rewritten.
+        The cursor is moved to those rows with relative cursor movements and
+        everything is written to the stream in a single write.
+
+        If there are more progressbars than `max_rows` allows, only the first
+        bars by the sort key are formatted and the others are summarized in
+        the last row.
+
+        Returns:
+            int: The number of characters written
+        """
+        now = timeit.default_timer()
+        expired = now - self.remove_finished if self.remove_finished else None
+
+        bars = self._get_shown_bars(now, expired)
+        rows = self._get_viewport_rows()
+        hidden: list[bar.ProgressBar] = []
+        if rows is not None and len(bars) > rows:
+            # Leave one row for the summary
+            shown = self._sort_bars(bars, limit=rows - 1)
+            shown_set = set(shown)
+            hidden = [bar_ for bar_ in bars if bar_ not in shown_set]
+            bars = shown
+        else:
+            bars = self._sort_bars(bars)
+
+        output: list[str] = [
+            line.strip()
+            for bar_ in bars
+            for line in self._render_bar(bar_, now, force)
+        ]
+        if hidden:
+            output.append(self._format_summary(hidden))
+
+        with self._print_lock:
+            self._write_changed_lines(output, force=force)
+            self._previous_output = output
+            written = self._buffer.tell()
+
+            if flush:  # pragma: no branch
+                self.flush()
+
+        return written
 
-    def print(self, *args, end='\n', offset=None, flush=True, clear=True, **kwargs):
+    def _get_shown_bars(
+        self,
+        now: float,
+        expired: float | None,
+    ) -> list[bar.ProgressBar]:
+        """Return the progressbars that need a row without formatting them.
+
+        Finished progressbars are removed after `remove_finished` seconds.
+        """
+        shown = []
+        for bar_ in list(self.values()):
+            if bar_.finished():
+                finished_at = self._finished_at.setdefault(bar_, now)
+                if expired is not None and expired >= finished_at:
+                    del self[bar_.label]
+                elif self.show_finished:
+                    shown.append(bar_)
+            elif bar_.started() or self.show_initial:
+                shown.append(bar_)
+        return shown
+
+    def _get_viewport_rows(self) -> int | None:
+        if self.max_rows is None:
+            return None
+        elif self.max_rows == 'auto':
+            # Keep the line the cursor is on free to prevent scrolling
+            rows = utils.get_terminal_size()[1] - 1
+        else:
+            rows = self.max_rows
+        return max(rows, 1)
+
+    def _format_summary(self, hidden: list[bar.ProgressBar]) -> str:
+        finished = running = waiting = 0
+        for bar_ in hidden:
+            if bar_.finished():
+                finished += 1
+            elif bar_.started():
+                running += 1
+            else:
+                waiting += 1
+
+        return self.summary_format.format(
+            hidden=len(hidden),
+            running=running,
+            finished=finished,
+            waiting=waiting,
+        )
+
+    def _write_changed_lines(self, output: list[str], force: bool=False):
+        """Write the rows of `output` that differ from the previous output.
+
+        Between renders the cursor is kept at the start of the line below
+        the last row so the rows can be reached with relative movements.
+        """
+        buffer = self._buffer
+        previous = self._previous_output
+
+        # Add empty lines to the end of the output if progressbars have been
+        # added so we don't overwrite previous output
+        buffer.write('\n' * max(len(output) - len(previous), 0))
+
+        position = max(len(output), len(previous))
+        for row, (previous_line, line) in enumerate(
+            itertools.zip_longest(previous, output, fillvalue=''),
+        ):
+            if previous_line == line and not force:
+                continue
+
+            buffer.write(self._move_cursor(position, row))
+            buffer.write(line)
+            buffer.write(terminal.CLEAR_LINE_RIGHT())
+            position = row
+
+        # Rows of removed progressbars are cleared above and stay empty
+        buffer.write(self._move_cursor(position, len(output)))
+
+    @staticmethod
+    def _move_cursor(current: int, row: int) -> str:
+        """Move the cursor from the `current` row to the start of `row`."""
+        if row < current:
+            return terminal.PREVIOUS_LINE(current - row)
+        elif row > current:
+            return terminal.NEXT_LINE(row - current)
+        else:
+            return ''
+
+    def _label_bar(self, bar: bar.ProgressBar):
+        if bar in self._labeled:  # pragma: no branch
+            return
+
+        assert bar.widgets, 'Cannot prepend label to empty progressbar'
+
+        if self.prepend_label:  # pragma: no branch
+            self._labeled.add(bar)
+            bar.widgets.insert(0, self.label_format.format(label=bar.label))
+
+        if self.append_label and bar not in self._labeled:  # pragma: no branch
+            self._labeled.add(bar)
+            bar.widgets.append(self.label_format.format(label=bar.label))
+
+    def _render_bar(
+        self,
+        bar_: bar.ProgressBar,
+        now: float,
+        force: bool=False,
+    ) -> typing.Iterable[str]:
+        def update(force=True):
+            # Newly labeled progressbars need to be redrawn with the label
+            force = force or bar_ not in self._labeled
+            self._label_bar(bar_)
+            # Rendering is not an update for listeners such as
+            # `events.EventStream`
+            with bar_._silenced():
+                bar_.update(force=force)
+            yield typing.cast(stream.LastLineStream, bar_.fd).line
+
+        if bar_.finished():
+            if self.finished_format is not None:  # pragma: no cover
+                yield self.finished_format.format(label=bar_.label)
+            else:
+                # Force the first update to get the finished format
+                yield from update(force=bar_ not in self._finished_rendered)
+                self._finished_rendered.add(bar_)
+        elif bar_.started():
+            yield from update(force or self._needs_redraw(bar_, now))
+        elif self.initial_format is None:
+            bar_.start()
+            yield from update()
+        else:
+            yield self.initial_format.format(label=bar_.label)
+
+    def _needs_redraw(self, bar_: bar.ProgressBar, now: float) -> bool:
+        """Whether the running bar changed since its line was formatted.
+
+        The lines of the other progressbars are reused, formatting the
+        widgets is by far the most expensive part of a frame.
+        """
+        if bar_ in self._changed:
+            # Discard first so a concurrent update is kept for the next frame
+            self._changed.discard(bar_)
+            return True
+
+        # Time sensitive widgets such as the `Timer` need to be redrawn
+        poll_interval = bar_.poll_interval
+        return bool(
+            poll_interval and now - bar_._last_update_timer >= poll_interval,
+        )
+
+    def get_sorted_bars(self) -> list[bar.ProgressBar]:
+        return list(self.get_sort_index())
+
+    def get_sort_index(self) -> SortIndex[bar.ProgressBar]:
+        """Return the (incrementally maintained) ordering of the bars.
+
+        The sort key of a progressbar is only looked up again after it has
+        been updated. If the key of a custom `sort_keyfunc` changes without
+        an update, call `sort_key_changed`.
+        """
+        index = self._sort_index
+        if (
+            index is None
+            or index.keyfunc is not self.sort_keyfunc
+            or len(index) != len(self)
+        ):
+            index = self._sort_index = SortIndex(
+                self.sort_keyfunc,
+                self.sort_reverse,
+                self.values(),
+            )
+        else:
+            index.reverse = self.sort_reverse
+        return index
+
+    def sort_key_changed(self, bar_: bar.ProgressBar) -> None:
+        """Mark the sort key of the progressbar as changed."""
+        if self._sort_index is not None:
+            self._sort_index.invalidate(bar_)
+
+    def _sort_bars(
+        self,
+        bars: typing.Iterable[bar.ProgressBar],
+        limit: int | None=None,
+    ) -> list[bar.ProgressBar]:
+        """Sort the bars, with a `limit` only the first bars are returned."""
+        shown = set(bars)
+        ordered = (bar_ for bar_ in self.get_sort_index() if bar_ in shown)
+        return list(itertools.islice(ordered, limit))
+
+    def flush(self):
+        value = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate(0)
+        if value:
+            self.fd.write(value)
+            self.fd.flush()
+
+    def print(
+        self,
+        *args,
+        end='\n',
+        offset=None,
+        flush=True,
+        clear=True,
+        **kwargs,
+    ):
         """
         Print to the progressbar stream without overwriting the progressbars.
 
@@ -115,14 +641,105 @@ class MultiBar(typing.Dict[str, bar.ProgressBar]):
             clear: If True, the line will be cleared before printing.
             **kwargs: Additional keyword arguments to pass to print
         """
-        pass
+        with self._print_lock:
+            if offset is None:
+                offset = len(self._previous_output)
+
+            if not clear:
+                self._buffer.write(terminal.PREVIOUS_LINE(offset))
+
+            if clear:
+                self._buffer.write(terminal.PREVIOUS_LINE(offset))
+                self._buffer.write(terminal.CLEAR_LINE_ALL())
+
+            print(*args, **kwargs, file=self._buffer, end=end)
+
+            if clear:
+                self._buffer.write(terminal.CLEAR_SCREEN_TILL_END())
+                for line in self._previous_output:
+                    self._buffer.write(line.strip())
+                    self._buffer.write('\n')
+
+            else:
+                self._buffer.write(terminal.NEXT_LINE(offset))
+
+            if flush:
+                self.flush()
 
     def run(self, join=True):
         """
         Start the multibar render loop and run the progressbars until they
         have force _thread_finished.
+
+        Instead of rendering at a fixed `update_interval` the delay between
+        frames is determined by the `frame_scheduler`. The loop wakes up as
+        soon as a progressbar is updated but never renders faster than the
+        scheduler allows.
         """
-        pass
+        if self.frame_scheduler is None:
+            self.frame_scheduler = FrameScheduler.for_stream(
+                self.fd,
+                self.update_interval,
+            )
+        scheduler = self.frame_scheduler
+
+        while not self._thread_finished.is_set():  # pragma: no branch
+            active = self._updated.is_set()
+            self._updated.clear()
+
+            start = timeit.default_timer()
+            written = self.render()
+            interval = scheduler.frame(
+                timeit.default_timer() - start,
+                written,
+                active,
+            )
+
+            if join or self._thread_closed.is_set():
+                # If the thread is closed, we need to check if the progressbars
+                # have finished. If they have, we can exit the loop
+                for bar_ in self.values():  # pragma: no cover
+                    if not bar_.finished():
+                        break
+                else:
+                    # Render one last time to make sure the progressbars are
+                    # correctly finished
+                    self.render(force=True)
+                    return
+
+            # Wait for the minimum delay and after that for the next update
+            if self._thread_finished.wait(scheduler.delay):
+                break
+            self._updated.wait(interval - scheduler.delay)
+
+    def start(self):
+        assert not self._thread, 'Multibar already started'
+        self._thread_closed.clear()
+        self._thread = threading.Thread(target=self.run, args=(False,))
+        self._thread.start()
+
+    def join(self, timeout: float | None=None):
+        if self._thread is not None:
+            self._thread_closed.set()
+            # Wake up the render loop to check if all progressbars finished
+            self._updated.set()
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def stop(self, timeout: float | None=None):
+        self._thread_finished.set()
+        self.join(timeout=timeout)
+
+    def serve(self, path):
+        """
+        Render the `remote.RemoteProgressBar`s of other processes.
+
+        Returns the started `remote.MultiBarServer` listening on the Unix
+        domain socket at `path`, use it as a context manager to stop it.
+        """
+        from . import remote
+
+        return remote.MultiBarServer(self, path).start()
 
     def __enter__(self):
         self.start()
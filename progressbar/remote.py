@@ -0,0 +1,262 @@
+'''
+Render the progressbars of other processes in a single `MultiBar`.
+
+The parent process serves a `MultiBar` on a Unix domain socket and the
+worker processes use a `RemoteProgressBar` instead of a regular progressbar.
+The remote progressbars never write to the terminal, they send their state
+to the server which renders all of them as one coherent `MultiBar`:
+
+>>> with MultiBar() as multibar, multibar.serve(path):  # doctest: +SKIP
+...     pool.map(work, range(10))
+
+>>> def work(i):  # doctest: +SKIP
+...     progress = RemoteProgressBar(path, label=f'job {i}', max_value=100)
+...     for _ in progress(range(100)):
+...         ...
+
+Updates are coalesced by the client: at most one message per
+`send_interval` is sent (besides the start and the finish) containing the
+latest state, so a worker doing millions of updates per second sends only a
+few messages per second. The messages are the NDJSON records of
+`progressbar.bar.progress_record`, all progressbars of a process share a
+single connection.
+'''
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import timeit
+import typing
+from pathlib import Path
+
+from . import bar, base, multi
+
+logger = logging.getLogger(__name__)
+
+#: The environment variable with the default socket path for the clients
+SOCKET_ENV = 'PROGRESSBAR_SOCKET'
+
+
+class _Connection:
+    '''A connection to the server, shared by the progressbars of a process.'''
+
+    _connections: typing.ClassVar[dict[tuple[str, int], _Connection]] = {}
+    _connections_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.socket: socket.socket | None = socket.socket(socket.AF_UNIX)
+        try:
+            self.socket.connect(path)
+        except OSError:
+            logger.warning('Unable to connect to progress server %r', path)
+            self.socket.close()
+            self.socket = None
+
+    @classmethod
+    def get(cls, path: str) -> _Connection:
+        # Connections are per process, a forked child needs its own
+        key = path, os.getpid()
+        with cls._connections_lock:
+            connection = cls._connections.get(key)
+            if connection is None:
+                connection = cls._connections[key] = cls(path)
+            return connection
+
+    def send(self, message: dict[str, typing.Any]) -> None:
+        line = json.dumps(message, default=str) + '\n'
+        with self.lock:
+            if self.socket is None:
+                return
+
+            try:
+                self.socket.sendall(line.encode())
+            except OSError:
+                logger.warning('Lost the connection to %r', self.path)
+                self.socket.close()
+                self.socket = None
+
+
+class RemoteProgressBar(bar.ProgressBar):
+    '''
+    A progressbar that is rendered by a `MultiBarServer`.
+
+    The progressbar does not render anything itself, `update()` only stores
+    the value and sends the state to the server once per `send_interval`.
+    If the server is not available the progressbar silently does nothing.
+
+    Args:
+        path: The socket of the server, defaults to the `PROGRESSBAR_SOCKET`
+            environment variable
+        label: The label within the `MultiBar`, defaults to the process id
+            and the index of the progressbar
+        send_interval: The minimum seconds between the update messages
+        **kwargs: Passed on to `ProgressBar`
+    '''
+
+    _next_send: float = 0.0
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        label: str | None = None,
+        send_interval: float = 0.2,
+        **kwargs: typing.Any,
+    ):
+        kwargs.setdefault('fd', io.StringIO())
+        bar.ProgressBar.__init__(self, **kwargs)
+        path = path or os.environ.get(SOCKET_ENV)
+        if not path:
+            raise ValueError(
+                f'No socket path given and {SOCKET_ENV} is not set',
+            )
+        self.connection = _Connection.get(str(path))
+        self.label = label or f'{os.getpid()}-{self.index}'
+        self.send_interval = send_interval
+
+    def update(self, value=None, force=False, **kwargs):
+        '''Store the new value and send it if `send_interval` passed.'''
+        if self._start_timer is None:
+            self.start()
+
+        if value is base.UnknownLength:
+            value = None
+        elif value is not None and value != self.value:
+            self.previous_value = self.value
+        self._store_update(value, kwargs)
+
+        now = timeit.default_timer()
+        if force or now >= self._next_send:
+            self._send(now)
+
+        if self.listeners:
+            self._notify('update', force=force)
+
+    def finish(self, end='\n', dirty=False):
+        bar.ProgressBar.finish(self, end=end, dirty=dirty)
+        if dirty:
+            self._send(timeit.default_timer(), dirty=True)
+
+    def _send(self, now: float, dirty: bool = False) -> None:
+        self._next_send = now + self.send_interval
+        if self._end_timer is not None or dirty:
+            event = 'finish'
+        elif not self.updates:
+            event = 'start'
+        else:
+            event = 'update'
+        self.updates += 1
+
+        message = bar.progress_record(self, event, now)
+        message['min_value'] = self.min_value
+        if dirty:
+            message['dirty'] = True
+        self.connection.send(message)
+
+
+class MultiBarServer:
+    '''
+    Serves a `MultiBar` on a Unix domain socket for `RemoteProgressBar`s.
+
+    Every message creates or updates the progressbar with the same label in
+    the `multibar`. When a client disconnects, its unfinished progressbars
+    are finished in their current state. Use `MultiBar.serve` to create and
+    start a server.
+
+    Args:
+        multibar: The multibar to add the progressbars to
+        path: The path of the socket, an existing socket is replaced
+    '''
+
+    def __init__(self, multibar: multi.MultiBar, path: str | Path):
+        self.multibar = multibar
+        self.path = str(path)
+        self._server: socketserver.ThreadingUnixStreamServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self) -> MultiBarServer:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server.handle(self.rfile)
+
+        self._server = socketserver.ThreadingUnixStreamServer(
+            self.path,
+            Handler,
+        )
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name=f'{self.__class__.__name__} {self.path}',
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+
+    def handle(self, lines: typing.Iterable[bytes]) -> None:
+        '''Apply the messages of a single client connection.'''
+        unfinished: set[bar.ProgressBar] = set()
+        try:
+            for line in lines:
+                try:
+                    message = json.loads(line)
+                    progress = self.apply(message)
+                except (ValueError, TypeError, KeyError):
+                    logger.exception('Invalid progress message %r', line)
+                    continue
+
+                if message['event'] == 'finish':
+                    unfinished.discard(progress)
+                else:
+                    unfinished.add(progress)
+        finally:
+            for progress in unfinished:
+                progress.finish(dirty=True)
+
+    def apply(self, message: dict[str, typing.Any]) -> bar.ProgressBar:
+        '''Apply a single message to the multibar.'''
+        progress = self.multibar[message['label']]
+        max_value = message.get('max_value')
+        if max_value is None:
+            max_value = base.UnknownLength
+
+        if progress._start_timer is None:
+            progress.min_value = message.get('min_value', 0)
+            progress.start(max_value=max_value)
+        else:
+            progress.max_value = max_value
+
+        # The variables are not known in advance so they are set directly
+        progress.variables.update(message.get('variables', {}))
+        if message['event'] == 'finish':
+            progress.value = message['value']
+            progress.finish(dirty=message.get('dirty', False))
+        else:
+            progress.update(message['value'], force=True)
+        return progress
@@ -0,0 +1,223 @@
+'''
+Shared memory progress counters for use with `multiprocessing`.
+
+Instead of sending every update back to the parent process through a queue,
+the worker processes increment their own slot of a `SharedCounter`. Since
+every process has a slot of its own no locking is needed and an increment is
+a single write to shared memory. The parent sums the slots whenever it
+renders the progressbar:
+
+>>> import multiprocessing
+>>> def work(counter, items):
+...     for _ in range(items):
+...         counter += 1
+
+>>> with SharedCounter() as counter:  # doctest: +SKIP
+...     with multiprocessing.Pool() as pool:
+...         result = pool.starmap_async(work, [(counter, 100)] * 10)
+...         counter.watch(ProgressBar(max_value=1000), result)
+'''
+
+from __future__ import annotations
+
+import contextlib
+import multiprocessing
+import os
+import sys
+import time
+import typing
+from multiprocessing import shared_memory
+
+from python_utils import types
+
+if types.TYPE_CHECKING:
+    from .bar import ProgressBar
+
+#: The `memoryview` format of a single slot, a signed 64 bit integer
+SLOT_FORMAT = 'q'
+SLOT_SIZE = 8
+#: The minimum number of slots when no explicit amount is given
+DEFAULT_SLOTS = 64
+
+
+class SharedCounter:
+    '''
+    A lock free progress counter in shared memory.
+
+    The counter can be passed to other processes (either by pickling or by
+    inheriting it), the memory is only released by the process that created
+    it, either through `unlink()` or by using it as a context manager.
+
+    Every process increments its own slot, by default the slot is derived
+    from the (1-based) identity of the process which is unique for the
+    workers of a `multiprocessing.Pool`. Note that two processes sharing a
+    slot can lose updates, so when you recycle workers (i.e.
+    `maxtasksperchild`) or start more processes than there are slots you
+    should pass an explicit `slot` to `increment()`.
+
+    >>> with SharedCounter(slots=2) as counter:
+    ...     counter += 5
+    ...     counter.increment(2, slot=1)
+    ...     counter.value
+    7
+
+    Args:
+        slots: The number of slots, defaults to `DEFAULT_SLOTS` or the
+            number of CPUs + 1 if that is larger so the parent process and
+            the workers of a default `Pool` each get a slot of their own
+        name: The name of the shared memory block, generated if not given
+        create: Create a new block instead of attaching to `name`
+    '''
+
+    shm: shared_memory.SharedMemory
+    counts: memoryview
+    slots: int
+    owner: bool
+    _slot: int | None = None
+    _slot_pid: int | None = None
+
+    def __init__(
+        self,
+        slots: int | None = None,
+        name: str | None = None,
+        create: bool = True,
+    ):
+        self.slots = slots or max(DEFAULT_SLOTS, (os.cpu_count() or 1) + 1)
+        self.owner = create
+        size = self.slots * SLOT_SIZE
+        if create:
+            self.shm = shared_memory.SharedMemory(
+                name=name,
+                create=True,
+                size=size,
+            )
+        else:
+            self.shm = _attach(name)
+
+        # The block can be larger than requested due to page alignment
+        self.counts = self.shm.buf[:size].cast(SLOT_FORMAT)
+        if create:
+            self.reset()
+
+    def __reduce__(self):
+        return self.__class__, (self.slots, self.name, False)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}[{self.name}]: {self.value}>'
+
+    def __del__(self):
+        # The view needs to be released before the shared memory can close
+        with contextlib.suppress(AttributeError):
+            self.counts.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    def __iadd__(self, value: int) -> SharedCounter:
+        self.increment(value)
+        return self
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def value(self) -> int:
+        '''The sum of all slots.'''
+        return sum(self.counts)
+
+    @property
+    def slot(self) -> int:
+        '''The default slot of the current process.'''
+        pid = os.getpid()
+        if self._slot_pid != pid:
+            identity = multiprocessing.current_process()._identity
+            self._slot = (identity[-1] if identity else 0) % self.slots
+            self._slot_pid = pid
+        return typing.cast(int, self._slot)
+
+    def increment(self, value: int = 1, slot: int | None = None) -> None:
+        '''Add `value` to the `slot` (or the slot of this process).'''
+        if slot is None:
+            slot = self.slot
+        self.counts[slot] += value
+
+    def reset(self) -> None:
+        for slot in range(self.slots):
+            self.counts[slot] = 0
+
+    def poll(self, progress: ProgressBar, **kwargs: typing.Any) -> int:
+        '''Update the progressbar with the current total.
+
+        Returns:
+            int: The current total
+        '''
+        value = self.value
+        progress.update(value, **kwargs)
+        return value
+
+    def watch(
+        self,
+        progress: ProgressBar,
+        done: typing.Callable[[], bool] | typing.Any,
+        interval: float | None = None,
+    ) -> int:
+        '''
+        Poll the counter into the progressbar until the work is done.
+
+        Args:
+            progress: The progressbar to update
+            done: Either a callable returning `True` when the work is done or
+                an object with a `ready()` method such as the
+                `multiprocessing.pool.AsyncResult`
+            interval: The polling interval, defaults to the
+                `min_poll_interval` of the progressbar
+
+        Returns:
+            int: The final total
+        '''
+        if hasattr(done, 'ready'):
+            done = done.ready
+
+        interval = interval or progress.min_poll_interval
+        progress.start()
+        while not done():
+            self.poll(progress)
+            time.sleep(interval)
+
+        value = self.poll(progress, force=True)
+        progress.finish()
+        return value
+
+    def close(self) -> None:
+        '''Close the shared memory for this process.'''
+        self.counts.release()
+        self.shm.close()
+
+    def unlink(self) -> None:
+        '''Release the shared memory, only needed in the owning process.'''
+        self.shm.unlink()
+
+
+def _attach(name: str | None) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):  # pragma: no cover
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+    # Before Python 3.13 attaching to a block registers it with the resource
+    # tracker. Children of the creating process share its tracker so that is
+    # harmless, but the tracker of an unrelated process would unlink the
+    # block when that process exits.
+    if multiprocessing.parent_process() is None:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(
+            shm._name,  # type: ignore[attr-defined]
+            'shared_memory',
+        )
+    return shm
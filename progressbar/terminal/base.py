@@ -29,6 +29,10 @@ class CSINoArg(CSI):
 
     def __call__(self):
         return super().__call__()
+
+
+def clear_line(n):
+    return UP(n) + CLEAR_LINE_ALL() + DOWN(n)
 CUP = CSI('H', 1, 1)
 UP = CSI('A', 1)
 DOWN = CSI('B', 1)
@@ -71,6 +75,14 @@ class _CPR(str):
                 return types.cast(types.Tuple[int, int], res_list[0])
             return types.cast(types.Tuple[int, int], tuple(res_list))
 
+    def row(self, stream):
+        row, _ = self(stream)
+        return row
+
+    def column(self, stream):
+        _, column = self(stream)
+        return column
+
 class WindowsColors(enum.Enum):
     BLACK = (0, 0, 0)
     BLUE = (0, 0, 128)
@@ -109,7 +121,14 @@ class WindowsColors(enum.Enum):
         >>> WindowsColors.from_rgb((128, 0, 128))
         <WindowsColors.MAGENTA: (128, 0, 128)>
         """
-        pass
+
+        def color_distance(rgb1, rgb2):
+            return sum((c1 - c2) ** 2 for c1, c2 in zip(rgb1, rgb2))
+
+        return min(
+            WindowsColors,
+            key=lambda color: color_distance(color.value, rgb),
+        )
 
 class WindowsColor:
     """
@@ -139,7 +158,37 @@ class RGB(collections.namedtuple('RGB', ['red', 'green', 'blue'])):
         Convert an RGB color (0-255 per channel) to the closest color in the
         Windows 16 color scheme.
         """
-        pass
+        return WindowsColors.from_rgb((self.red, self.green, self.blue))
+
+    @property
+    def rgb(self):
+        return f'rgb({self.red}, {self.green}, {self.blue})'
+
+    @property
+    def hex(self):
+        return f'#{self.red:02x}{self.green:02x}{self.blue:02x}'
+
+    @property
+    def to_ansi_16(self):
+        # Using int instead of round because it maps slightly better
+        red = int(self.red / 255)
+        green = int(self.green / 255)
+        blue = int(self.blue / 255)
+        return (blue << 2) | (green << 1) | red
+
+    @property
+    def to_ansi_256(self):
+        red = round(self.red / 255 * 5)
+        green = round(self.green / 255 * 5)
+        blue = round(self.blue / 255 * 5)
+        return 16 + 36 * red + 6 * green + blue
+
+    def interpolate(self, end: RGB, step: float) -> RGB:
+        return RGB(
+            int(self.red + (end.red - self.red) * step),
+            int(self.green + (end.green - self.green) * step),
+            int(self.blue + (end.blue - self.blue) * step),
+        )
 
 class HSL(collections.namedtuple('HSL', ['hue', 'saturation', 'lightness'])):
     """
@@ -156,10 +205,27 @@ class HSL(collections.namedtuple('HSL', ['hue', 'saturation', 'lightness'])):
         """
         Convert a 0-255 RGB color to a 0-255 HLS color.
         """
-        pass
+        hls = colorsys.rgb_to_hls(
+            rgb.red / 255,
+            rgb.green / 255,
+            rgb.blue / 255,
+        )
+        return cls(
+            round(hls[0] * 360),
+            round(hls[2] * 100),
+            round(hls[1] * 100),
+        )
+
+    def interpolate(self, end: HSL, step: float) -> HSL:
+        return HSL(
+            self.hue + (end.hue - self.hue) * step,
+            self.lightness + (end.lightness - self.lightness) * step,
+            self.saturation + (end.saturation - self.saturation) * step,
+        )
 
 class ColorBase(abc.ABC):
-    pass
+    def get_color(self, value: float) -> Color:
+        raise NotImplementedError()
 
 class Color(collections.namedtuple('Color', ['rgb', 'hls', 'name', 'xterm']), ColorBase):
     """
@@ -187,6 +253,55 @@ class Color(collections.namedtuple('Color', ['rgb', 'hls', 'name', 'xterm']), Co
     def __hash__(self):
         return hash(self.rgb)
 
+    @property
+    def fg(self):
+        if env.COLOR_SUPPORT is env.ColorSupport.WINDOWS:
+            return WindowsColor(self)
+        else:
+            return SGRColor(self, 38, 39)
+
+    @property
+    def bg(self):
+        if env.COLOR_SUPPORT is env.ColorSupport.WINDOWS:
+            return DummyColor()
+        else:
+            return SGRColor(self, 48, 49)
+
+    @property
+    def underline(self):
+        if env.COLOR_SUPPORT is env.ColorSupport.WINDOWS:
+            return DummyColor()
+        else:
+            return SGRColor(self, 58, 59)
+
+    @property
+    def ansi(self) -> types.Optional[str]:
+        if (
+            env.COLOR_SUPPORT is env.ColorSupport.XTERM_TRUECOLOR
+        ):  # pragma: no branch
+            return f'2;{self.rgb.red};{self.rgb.green};{self.rgb.blue}'
+
+        if self.xterm:  # pragma: no branch
+            color = self.xterm
+        elif (
+            env.COLOR_SUPPORT is env.ColorSupport.XTERM_256
+        ):  # pragma: no branch
+            color = self.rgb.to_ansi_256
+        elif env.COLOR_SUPPORT is env.ColorSupport.XTERM:  # pragma: no branch
+            color = self.rgb.to_ansi_16
+        else:  # pragma: no branch
+            return None
+
+        return f'5;{color}'
+
+    def interpolate(self, end: Color, step: float) -> Color:
+        return Color(
+            self.rgb.interpolate(end.rgb, step),
+            self.hls.interpolate(end.hls, step),
+            self.name if step < 0.5 else end.name,
+            self.xterm if step < 0.5 else end.xterm,
+        )
+
 class Colors:
     by_name: ClassVar[defaultdict[str, types.List[Color]]] = collections.defaultdict(list)
     by_lowername: ClassVar[defaultdict[str, types.List[Color]]] = collections.defaultdict(list)
@@ -195,6 +310,36 @@ class Colors:
     by_hls: ClassVar[defaultdict[HSL, types.List[Color]]] = collections.defaultdict(list)
     by_xterm: ClassVar[dict[int, Color]] = dict()
 
+    @classmethod
+    def register(
+        cls,
+        rgb: RGB,
+        hls: types.Optional[HSL] = None,
+        name: types.Optional[str] = None,
+        xterm: types.Optional[int] = None,
+    ) -> Color:
+        color = Color(rgb, hls, name, xterm)
+
+        if name:
+            cls.by_name[name].append(color)
+            cls.by_lowername[name.lower()].append(color)
+
+        if hls is None:
+            hls = HSL.from_rgb(rgb)
+
+        cls.by_hex[rgb.hex].append(color)
+        cls.by_rgb[rgb].append(color)
+        cls.by_hls[hls].append(color)
+
+        if xterm is not None:
+            cls.by_xterm[xterm] = color
+
+        return color
+
+    @classmethod
+    def interpolate(cls, color_a: Color, color_b: Color, step: float) -> Color:
+        return color_a.interpolate(color_b, step)
+
 class ColorGradient(ColorBase):
 
     def __init__(self, *colors: Color, interpolate=Colors.interpolate):
@@ -206,18 +351,83 @@ class ColorGradient(ColorBase):
         return self.get_color(value)
 
     def get_color(self, value: float) -> Color:
-        """Map a value from 0 to 1 to a color."""
-        pass
+        'Map a value from 0 to 1 to a color.'
+        if (
+            value == pbase.Undefined
+            or value == pbase.UnknownLength
+            or value <= 0
+        ):
+            return self.colors[0]
+        elif value >= 1:
+            return self.colors[-1]
+
+        max_color_idx = len(self.colors) - 1
+        if max_color_idx == 0:
+            return self.colors[0]
+        elif self.interpolate:
+            if max_color_idx > 1:
+                index = round(
+                    converters.remap(value, 0, 1, 0, max_color_idx - 1),
+                )
+            else:
+                index = 0
+
+            step = converters.remap(
+                value,
+                index / (max_color_idx),
+                (index + 1) / (max_color_idx),
+                0,
+                1,
+            )
+            color = self.interpolate(
+                self.colors[index],
+                self.colors[index + 1],
+                float(step),
+            )
+        else:
+            index = round(converters.remap(value, 0, 1, 0, max_color_idx))
+            color = self.colors[index]
+
+        return color
+
+
+def get_color(value: float, color: OptionalColor) -> Color | None:
+    if isinstance(color, ColorGradient):
+        color = color(value)
+    return color
 OptionalColor = types.Union[Color, ColorGradient, None]
 
-def apply_colors(text: str, percentage: float | None=None, *, fg: OptionalColor=None, bg: OptionalColor=None, fg_none: Color | None=None, bg_none: Color | None=None, **kwargs: types.Any) -> str:
+def apply_colors(
+    text: str,
+    percentage: float | None = None,
+    *,
+    fg: OptionalColor = None,
+    bg: OptionalColor = None,
+    fg_none: Color | None = None,
+    bg_none: Color | None = None,
+    **kwargs: types.Any,
+) -> str:
     """Apply colors/gradients to a string depending on the given percentage.
 
     When percentage is `None`, the `fg_none` and `bg_none` colors will be used.
     Otherwise, the `fg` and `bg` colors will be used. If the colors are
     gradients, the color will be interpolated depending on the percentage.
     """
-    pass
+    if percentage is None:
+        if fg_none is not None:
+            text = fg_none.fg(text)
+        if bg_none is not None:
+            text = bg_none.bg(text)
+    elif fg is not None or bg is not None:
+        fg = get_color(percentage * 0.01, fg)
+        bg = get_color(percentage * 0.01, bg)
+
+        if fg is not None:  # pragma: no branch
+            text = fg.fg(text)
+        if bg is not None:  # pragma: no branch
+            text = bg.bg(text)
+
+    return text
 
 class DummyColor:
 
@@ -240,12 +450,24 @@ class SGR(CSI):
     def __call__(self, text, *args):
         return self._start_template + text + self._end_template
 
+    @property
+    def _start_template(self):
+        return super().__call__(self._start_code)
+
+    @property
+    def _end_template(self):
+        return super().__call__(self._end_code)
+
 class SGRColor(SGR):
     __slots__ = ('_color', '_start_code', '_end_code')
 
     def __init__(self, color: Color, start_code: int, end_code: int):
         self._color = color
         super().__init__(start_code, end_code)
+
+    @property
+    def _start_template(self):
+        return CSI.__call__(self, self._start_code, self._color.ansi)
 encircled = SGR(52, 54)
 framed = SGR(51, 54)
 overline = SGR(53, 55)
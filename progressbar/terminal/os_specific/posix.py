@@ -1,3 +1,15 @@
 import sys
 import termios
-import tty
\ No newline at end of file
+import tty
+
+
+def getch():
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)  # type: ignore
+    try:
+        tty.setraw(sys.stdin.fileno())  # type: ignore
+        ch = sys.stdin.read(1)
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)  # type: ignore
+
+    return ch
@@ -70,4 +70,57 @@ class _INPUT_RECORD(ctypes.Structure):
 
     class _Event(ctypes.Union):
         _fields_ = (('KeyEvent', _KEY_EVENT_RECORD), ('MouseEvent', _MOUSE_EVENT_RECORD), ('WindowBufferSizeEvent', _WINDOW_BUFFER_SIZE_RECORD), ('MenuEvent', _MENU_EVENT_RECORD), ('FocusEvent', _FOCUS_EVENT_RECORD))
-    _fields_ = (('EventType', _WORD), ('Event', _Event))
\ No newline at end of file
+    _fields_ = (('EventType', _WORD), ('Event', _Event))
+
+
+def reset_console_mode() -> None:
+    _SetConsoleMode(_HANDLE(_h_console_input), _DWORD(_input_mode.value))
+    _SetConsoleMode(_HANDLE(_h_console_output), _DWORD(_output_mode.value))
+
+
+def set_console_mode() -> bool:
+    mode = (
+        _input_mode.value
+        | WindowsConsoleModeFlags.ENABLE_VIRTUAL_TERMINAL_INPUT
+    )
+    _SetConsoleMode(_HANDLE(_h_console_input), _DWORD(mode))
+
+    mode = (
+        _output_mode.value
+        | WindowsConsoleModeFlags.ENABLE_PROCESSED_OUTPUT
+        | WindowsConsoleModeFlags.ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    )
+    return bool(_SetConsoleMode(_HANDLE(_h_console_output), _DWORD(mode)))
+
+
+def get_console_mode() -> int:
+    return _input_mode.value
+
+
+def set_text_color(color) -> None:
+    _kernel32.SetConsoleTextAttribute(_h_console_output, color)
+
+
+def print_color(text, color):
+    set_text_color(color)
+    print(text)  # noqa: T201
+    set_text_color(7)  # Reset to default color, grey
+
+
+def getch():
+    lp_buffer = (_INPUT_RECORD * 2)()
+    n_length = _DWORD(2)
+    lp_number_of_events_read = _DWORD()
+
+    _ReadConsoleInput(
+        _HANDLE(_h_console_input),
+        lp_buffer,
+        n_length,
+        ctypes.byref(lp_number_of_events_read),
+    )
+
+    char = lp_buffer[1].Event.KeyEvent.uChar.AsciiChar.decode('ascii')
+    if char == '\x00':
+        return None
+
+    return char
\ No newline at end of file
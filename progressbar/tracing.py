@@ -0,0 +1,294 @@
+'''
+Record the updates of a progressbar and replay them deterministically.
+
+A `TraceRecorder` writes every `start()`, `update()` and `finish()` of a
+progressbar to an NDJSON file (gzip compressed if the name ends with `.gz`),
+one event per line with the seconds elapsed since the start:
+
+    {"event": "start", "elapsed": 0.0, "value": 0, "max_value": 100, ...}
+    {"event": "update", "elapsed": 0.25, "value": 10, "redraw": true}
+    {"event": "finish", "elapsed": 2.5, "value": 100, "redraw": true}
+
+`replay()` feeds such a trace into a new progressbar (with any set of
+widgets) under a fake clock, so widgets and ETA algorithms can be compared
+on the exact updates of a real job without running it again:
+
+>>> import io
+>>> output = io.StringIO()
+>>> with TraceRecorder(output) as recorder:
+...     bar = recorder.attach(ProgressBar(max_value=10, fd=io.StringIO()))
+...     for i in bar(range(10)):
+...         pass
+>>> events = list(read_trace(io.StringIO(output.getvalue())))
+>>> [event['event'] for event in events].count('update')
+9
+>>> replay(events, fd=io.StringIO()).value
+10
+'''
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import io
+import json
+import threading
+import timeit
+import typing
+from pathlib import Path
+
+from . import base
+from .bar import ProgressBar
+
+Event = typing.Dict[str, typing.Any]
+PathOrFile = typing.Union[str, Path, typing.IO[str]]
+
+
+def _open(path: str | Path, mode: str) -> typing.IO[str]:
+    if str(path).endswith('.gz'):
+        return typing.cast(typing.IO[str], gzip.open(path, mode + 't'))
+    return open(path, mode)
+
+
+class TraceRecorder:
+    '''
+    Records the updates of one or more progressbars as NDJSON events.
+
+    Every event contains the `event` type (`start`, `update` or `finish`),
+    the seconds `elapsed` since the recorder started, the `value` and
+    whether the progressbar was redrawn. The `start` event also contains
+    the `min_value`, `max_value` and `variables`, later events only contain
+    the `max_value` and `variables` that changed. When multiple bars are
+    attached the events contain the `bar` index as well.
+
+    Args:
+        fd: The file or path to write to, paths ending with `.gz` are
+            compressed
+    '''
+
+    fd: typing.IO[str]
+
+    def __init__(self, fd: PathOrFile):
+        if isinstance(fd, (str, Path)):
+            self.fd = _open(fd, 'w')
+            self._close = True
+        else:
+            self.fd = fd
+            self._close = False
+
+        self.bars: list[ProgressBar] = []
+        self._indices: dict[ProgressBar, int] = {}
+        # The `updates` of every bar at the previous event
+        self._updates: list[int] = []
+        self._start: float | None = None
+        self._lock = threading.Lock()
+        self._state: dict[int, tuple[typing.Any, dict]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def attach(self, bar: ProgressBar) -> ProgressBar:
+        '''
+        Record the `start`, `update` and `finish` calls of the `bar`.
+
+        Attaching the same progressbar again does nothing.
+        '''
+        if bar not in self._indices:
+            self._indices[bar] = len(self.bars)
+            self.bars.append(bar)
+            self._updates.append(bar.updates)
+            bar.add_listener(self._listen)
+        return bar
+
+    def _listen(self, bar: ProgressBar, name: str, **kwargs) -> None:
+        index = self._indices[bar]
+        redraw = bar.updates != self._updates[index]
+        self._updates[index] = bar.updates
+        self._record(index, name, redraw, kwargs)
+
+    def _record(
+        self,
+        index: int,
+        name: str,
+        redraw: bool,
+        kwargs: dict[str, typing.Any],
+    ) -> None:
+        bar = self.bars[index]
+        now = timeit.default_timer()
+        if self._start is None:
+            self._start = now
+
+        event: Event = dict(
+            event=name,
+            elapsed=round(now - self._start, 6),
+            value=bar.value,
+            redraw=redraw,
+        )
+        if len(self.bars) > 1:
+            event['bar'] = index
+        if name == 'update' and kwargs.get('force'):
+            event['force'] = True
+        if name == 'finish' and kwargs.get('dirty'):
+            event['dirty'] = True
+
+        max_value = _encode_max_value(bar.max_value)
+        variables = dict(bar.variables)
+        if name == 'start' or index not in self._state:
+            event['min_value'] = bar.min_value
+            event['max_value'] = max_value
+            event['variables'] = variables
+        else:
+            previous_max_value, previous_variables = self._state[index]
+            if max_value != previous_max_value:
+                event['max_value'] = max_value
+            changed = {
+                key: value
+                for key, value in variables.items()
+                if previous_variables.get(key) != value
+            }
+            if changed:
+                event['variables'] = changed
+        self._state[index] = max_value, variables
+
+        line = json.dumps(event, default=str, separators=(',', ':'))
+        with self._lock:
+            self.fd.write(line + '\n')
+            if name == 'finish':
+                self.fd.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._close:
+                self.fd.close()
+            else:
+                self.fd.flush()
+
+
+def _encode_max_value(max_value):
+    if max_value is base.UnknownLength:
+        return None
+    return max_value
+
+
+def _decode_max_value(max_value):
+    if max_value is None:
+        return base.UnknownLength
+    return max_value
+
+
+def read_trace(fd: PathOrFile) -> typing.Iterator[Event]:
+    '''Read the events of a trace file written by `TraceRecorder`.'''
+    if isinstance(fd, (str, Path)):
+        with _open(fd, 'r') as fh:
+            yield from read_trace(fh)
+        return
+
+    for line in fd:
+        if line.strip():
+            yield json.loads(line)
+
+
+class FakeClock:
+    '''
+    A manually advanced replacement for `timeit.default_timer`.
+
+    >>> clock = FakeClock(10)
+    >>> with clock.patch():
+    ...     clock.advance(2.5)
+    ...     timeit.default_timer()
+    12.5
+    '''
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+    @contextlib.contextmanager
+    def patch(self) -> typing.Iterator[FakeClock]:
+        '''Replace `timeit.default_timer` with the clock.
+
+        Note that this affects all threads, the progressbar reads the timer
+        from the `timeit` module at every update.
+        '''
+        timer = timeit.default_timer
+        timeit.default_timer = self
+        try:
+            yield self
+        finally:
+            timeit.default_timer = timer
+
+
+def replay(
+    events: typing.Iterable[Event] | PathOrFile,
+    bar_class: type[ProgressBar] = ProgressBar,
+    clock: FakeClock | None = None,
+    **kwargs: typing.Any,
+) -> ProgressBar:
+    '''
+    Replay a trace with a new progressbar under a fake clock.
+
+    The progressbar is created on the `start` event with the recorded
+    `min_value`, `max_value` and `variables`, the `kwargs` (e.g. `widgets`
+    or `fd`) are passed on to the `bar_class`. Only the events of the first
+    bar are replayed for traces of multiple bars. Note that wall clock
+    times such as the `AbsoluteETA` are relative to the current time.
+
+    Returns:
+        ProgressBar: The finished (or last state of the) progressbar
+    '''
+    if isinstance(events, (str, Path, io.IOBase)):
+        events = read_trace(events)
+
+    clock = clock or FakeClock()
+    origin = clock.now
+    bar: ProgressBar | None = None
+    with clock.patch():
+        for event in events:
+            if event.get('bar', 0):
+                continue
+
+            clock.now = origin + event['elapsed']
+            if bar is None:
+                bar = bar_class(
+                    min_value=event.get('min_value', 0),
+                    max_value=_decode_max_value(event.get('max_value')),
+                    variables=event.get('variables'),
+                    **kwargs,
+                )
+                bar.start()
+                if event['event'] == 'start':
+                    continue
+
+            _replay_event(bar, event)
+
+    if bar is None:
+        raise ValueError('The trace does not contain any events')
+    return bar
+
+
+def _replay_event(bar: ProgressBar, event: Event) -> None:
+    if 'max_value' in event:
+        bar.max_value = _decode_max_value(event['max_value'])
+
+    name = event['event']
+    if name == 'update':
+        bar.update(
+            event['value'],
+            force=event.get('force', False),
+            **event.get('variables', {}),
+        )
+    elif name == 'finish':
+        dirty = event.get('dirty', False)
+        if dirty:
+            bar.value = event['value']
+        bar.finish(dirty=dirty)
+    elif name == 'start':
+        bar.start(init=False)
@@ -0,0 +1,544 @@
+'''
+Copying data between files, pipes and sockets for the `progressbar` command.
+
+The `Transfer` uses the zero-copy system calls of the operating system where
+possible so the data never has to pass through Python:
+
+- `os.splice` if the input or the output is a pipe (Linux)
+- `os.copy_file_range` between regular files (Linux)
+- `os.sendfile` from a regular file to anything else (Linux)
+- `readinto()` and `write()` with a reusable buffer otherwise
+
+If a system call is not supported for the given files the next method is
+used, the progress is tracked with the byte counts of the calls. Pipes are
+enlarged to the maximum buffer size if the system allows it and the size
+of the buffer adapts to the throughput using the `BufferPolicy`. A
+`RateLimiter` limits the bandwidth if needed.
+
+For benchmarks and to keep large copies out of the page cache the data can
+be read and written with `O_DIRECT` (Linux) using page aligned buffers,
+synced to disk periodically or discarded without writing it at all:
+
+>>> output = io.BytesIO()
+>>> transfer = Transfer(output)
+>>> transfer.copy(io.BytesIO(b'some data'))
+9
+>>> transfer.method, output.getvalue()
+('buffered', b'some data')
+'''
+
+from __future__ import annotations
+
+import contextlib
+import errno
+import io
+import mmap
+import os
+import stat
+import sys
+import time
+import typing
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+#: The maximum amount of bytes per zero-copy system call
+ZERO_COPY_SIZE = 1 << 24
+
+#: The seconds between the syncs of the output
+SYNC_INTERVAL = 1.0
+
+O_DIRECT: int = getattr(os, 'O_DIRECT', 0)
+
+F_SETPIPE_SZ: int | None
+F_GETPIPE_SZ: int | None
+if sys.platform.startswith('linux'):
+    # The `fcntl` module only has the constants since Python 3.10
+    F_SETPIPE_SZ = getattr(fcntl, 'F_SETPIPE_SZ', 1031)
+    F_GETPIPE_SZ = getattr(fcntl, 'F_GETPIPE_SZ', 1032)
+else:  # pragma: no cover
+    F_SETPIPE_SZ = F_GETPIPE_SZ = None
+
+#: The errors of the zero-copy calls if they do not support the files, for
+#: example `EXDEV` for `copy_file_range` between filesystems on older
+#: kernels or `EBADF` if the output was opened for appending
+UNSUPPORTED_ERRNOS = frozenset(
+    (
+        errno.EINVAL,
+        errno.ENOSYS,
+        errno.EXDEV,
+        errno.EOPNOTSUPP,
+        errno.EBADF,
+        errno.ESPIPE,
+    ),
+)
+
+ZeroCopyFunction = typing.Callable[[int, int, int], int]
+
+
+class BufferPolicy:
+    '''
+    Adapts the buffer size of the copy loop to the measured throughput.
+
+    Every chunk should take about `target_seconds`. The size doubles after a
+    full chunk that took less than half of that and halves after a chunk
+    that took more than twice as long. Short reads, such as those from a
+    pipe that is slower than the buffer, never grow the buffer. While
+    copying from or to a pipe the size is limited to the `pipe_size`.
+
+    >>> policy = BufferPolicy(min_size=4, max_size=16)
+    >>> policy.update(4, 4, 0.001), policy.update(8, 8, 0.001)
+    (8, 16)
+    >>> policy.update(16, 2, 0.001), policy.update(16, 16, 1.0)
+    (16, 8)
+    '''
+
+    def __init__(
+        self,
+        min_size: int = 1 << 16,
+        max_size: int = 1 << 24,
+        target_seconds: float = 0.01,
+    ):
+        self.min_size = min_size
+        self.max_size = max(min_size, max_size)
+        self.target_seconds = target_seconds
+        self.size = min_size
+        #: The capacity of the pipe of the current copy, see `fit_pipe()`
+        self.pipe_size: int | None = None
+
+    @property
+    def limit(self) -> int:
+        '''The largest size, the `max_size` or the smaller `pipe_size`.'''
+        if self.pipe_size is None:
+            return self.max_size
+        return max(min(self.max_size, self.pipe_size), self.min_size)
+
+    def fit_pipe(self, pipe_size: int | None) -> None:
+        '''
+        Limit the size to the capacity of a pipe, `None` without pipes.
+
+        A read from a pipe never returns more than it holds and a larger
+        write has to wait for the reader anyway.
+
+        >>> policy = BufferPolicy(min_size=4, max_size=64)
+        >>> policy.size = 32
+        >>> policy.fit_pipe(16)
+        >>> policy.size, policy.update(16, 16, 0.001)
+        (16, 16)
+        '''
+        self.pipe_size = pipe_size
+        self.size = min(self.size, self.limit)
+
+    def update(self, requested: int, received: int, seconds: float) -> int:
+        '''Return the next size given the last chunk and its duration.'''
+        if seconds > self.target_seconds * 2:
+            self.size = max(self.size // 2, self.min_size)
+        elif received >= requested and seconds < self.target_seconds / 2:
+            self.size = min(self.size * 2, self.limit)
+        return self.size
+
+
+def _fileno(stream: typing.IO[typing.Any]) -> int | None:
+    '''The file descriptor of the stream, if it has a real one.'''
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _align(size: int) -> int:
+    '''Round up to a whole amount of pages as required by `O_DIRECT`.'''
+    return -(-size // mmap.PAGESIZE) * mmap.PAGESIZE
+
+
+def _align_down(size: int) -> int:
+    '''Round down to a whole amount of pages, but at least one page.'''
+    return max(size // mmap.PAGESIZE, 1) * mmap.PAGESIZE
+
+
+def _is_disk(fd: int) -> bool:
+    mode = os.fstat(fd).st_mode
+    return stat.S_ISREG(mode) or stat.S_ISBLK(mode)
+
+
+def _set_direct(fd: int, enabled: bool) -> bool:
+    '''Set or clear `O_DIRECT` on the file, `False` if not supported.'''
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+    flags = flags | O_DIRECT if enabled else flags & ~O_DIRECT
+    try:
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags)
+    except OSError:
+        return False
+    return True
+
+
+@contextlib.contextmanager
+def _direct_io(fd: int | None) -> typing.Iterator[None]:
+    '''
+    Use `O_DIRECT` for regular files and block devices within the context.
+
+    Pipes are skipped because `O_DIRECT` enables the packet mode for them
+    and filesystems without support (such as older versions of `tmpfs`)
+    keep using the page cache.
+    '''
+    if fd is None or not _is_disk(fd) or not _set_direct(fd, True):
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        _set_direct(fd, False)
+
+
+def _splice(input_fd: int, output_fd: int, count: int) -> int:
+    return os.splice(input_fd, output_fd, count)
+
+
+def _copy_file_range(input_fd: int, output_fd: int, count: int) -> int:
+    return os.copy_file_range(input_fd, output_fd, count)
+
+
+def _sendfile(input_fd: int, output_fd: int, count: int) -> int:
+    return os.sendfile(output_fd, input_fd, None, count)
+
+
+class RateLimiter:
+    '''
+    A token bucket limiting the bytes per second.
+
+    The bucket fills with `rate` bytes per second up to `burst` bytes, a
+    tenth of a second worth of data by default. Transfers can take more
+    than the bucket holds, the debt is paid back by sleeping. The bucket is
+    refilled from the monotonic clock so oversleeping or waking up early
+    is corrected by the next transfer, over a long transfer the average
+    rate is within `burst` bytes of the exact rate.
+
+    >>> limiter = RateLimiter(1000, burst=100)
+    >>> limiter.chunk_size
+    100
+    '''
+
+    def __init__(self, rate: float, burst: float | None = None):
+        if rate <= 0:
+            raise ValueError(f'The rate must be positive, got {rate!r}')
+        self.rate = rate
+        self.burst = burst or max(rate / 10, 1)
+        self.tokens = self.burst
+        self._last = time.monotonic()
+
+    @property
+    def chunk_size(self) -> int:
+        '''The largest amount of bytes to transfer at once.'''
+        return max(int(self.burst), 1)
+
+    def consume(self, size: int) -> None:
+        '''Take `size` bytes from the bucket, sleeps while in debt.'''
+        self._refill()
+        self.tokens -= size
+        if self.tokens < 0:
+            time.sleep(-self.tokens / self.rate)
+            self._refill()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.tokens + (now - self._last) * self.rate,
+            self.burst,
+        )
+        self._last = now
+
+
+class Transfer:
+    '''
+    Copies the inputs to a single output and reports the progress.
+
+    Args:
+        output: The binary stream to write to, `None` discards the data
+            without any write calls
+        callback: Called with the total amount of transferred bytes after
+            every system call, e.g. `ProgressBar.update`
+        buffer_size: A fixed buffer size if no zero-copy method can be
+            used, adapts to the throughput by default
+        zero_copy: Use the zero-copy system calls if possible
+        update_interval: The minimum seconds between the callbacks, the
+            callback always gets the total at the end of every copy
+        rate_limiter: Limits the bandwidth of the transfer
+        direct_io: Bypass the page cache with `O_DIRECT` for files and
+            block devices, this disables the zero-copy methods
+        sync: Sync the output to disk every `SYNC_INTERVAL` seconds and at
+            the end of every copy
+    '''
+
+    #: The method of the last copy: `splice`, `copy_file_range`,
+    #: `sendfile`, `direct` or `buffered`
+    method: str | None = None
+
+    def __init__(
+        self,
+        output: typing.BinaryIO | None,
+        callback: typing.Callable[[int], typing.Any] | None = None,
+        buffer_size: int | None = None,
+        zero_copy: bool = True,
+        update_interval: float = 0.0,
+        rate_limiter: RateLimiter | None = None,
+        direct_io: bool = False,
+        sync: bool = False,
+    ):
+        self.output = output
+        self.callback = callback
+        if buffer_size is None:
+            self.policy = BufferPolicy()
+        else:
+            self.policy = BufferPolicy(buffer_size, buffer_size)
+        self.zero_copy = zero_copy
+        self.update_interval = update_interval
+        self.rate_limiter = rate_limiter
+        self.direct_io = direct_io
+        self.sync = sync
+        self.transferred = 0
+        self._reported = 0
+        self._next_callback = 0.0
+        self._next_sync = 0.0
+        self._sync_fd: int | None = None
+        # Grows with the policy, smaller reads use a part of the buffer
+        self._buffer = bytearray(self.policy.size)
+
+    def copy(self, input: typing.BinaryIO) -> int:
+        '''Copy `input` until the end, returns the amount of bytes.'''
+        start = self.transferred
+        input_fd = _fileno(input)
+        output_fd = None if self.output is None else _fileno(self.output)
+        if self.sync and output_fd is not None and _is_disk(output_fd):
+            self._sync_fd = output_fd
+            self._next_sync = time.monotonic() + SYNC_INTERVAL
+
+        try:
+            self._copy(input, input_fd, output_fd)
+        finally:
+            if self._sync_fd is not None:
+                self._sync()
+            if self.callback is not None and self._reported != (
+                self.transferred
+            ):
+                self._reported = self.transferred
+                self.callback(self.transferred)
+        return self.transferred - start
+
+    def _copy(
+        self,
+        input: typing.BinaryIO,
+        input_fd: int | None,
+        output_fd: int | None,
+    ) -> None:
+        pipe_size = None
+        for fd in (input_fd, output_fd):
+            capacity = None if fd is None else self._grow_pipe(fd)
+            if capacity and (pipe_size is None or capacity < pipe_size):
+                pipe_size = capacity
+        self.policy.fit_pipe(pipe_size)
+
+        if self.output is not None and (
+            self.direct_io or (self.zero_copy and output_fd is not None)
+        ):
+            # The system calls bypass the buffer of the output stream
+            self.output.flush()
+
+        direct = self.direct_io and O_DIRECT and fcntl is not None
+        if direct and input_fd is not None and (
+            output_fd is not None or self.output is None
+        ):
+            self.method = 'direct'
+            with _direct_io(input_fd), _direct_io(output_fd):
+                self._copy_direct(input_fd, output_fd)
+            return
+
+        if self.zero_copy and input_fd is not None and output_fd is not None:
+            functions = self._zero_copy_functions(input_fd, output_fd)
+            for self.method, function in functions:
+                if self._copy_zero_copy(function, input_fd, output_fd):
+                    return
+
+        self.method = 'buffered'
+        self._copy_buffered(input)
+
+    def _grow_pipe(self, fd: int) -> int | None:
+        '''
+        Enlarge the pipe to the maximum buffer size, if it is a pipe.
+
+        Returns:
+            The capacity of the pipe, `None` if it is not a pipe or the
+            capacity is unknown
+        '''
+        if F_SETPIPE_SZ is None or not stat.S_ISFIFO(os.fstat(fd).st_mode):
+            return None
+
+        # Unprivileged processes are limited by `/proc/sys/fs/pipe-max-size`
+        size = self.policy.max_size
+        current: int = fcntl.fcntl(fd, F_GETPIPE_SZ)
+        while size > current:
+            with contextlib.suppress(OSError):
+                # The kernel rounds the size up to a power of two pages
+                return fcntl.fcntl(fd, F_SETPIPE_SZ, size)
+            size //= 2
+        return current
+
+    def _zero_copy_functions(
+        self,
+        input_fd: int,
+        output_fd: int,
+    ) -> typing.Iterator[tuple[str, ZeroCopyFunction]]:
+        input_stat = os.fstat(input_fd)
+        output_mode = os.fstat(output_fd).st_mode
+        if hasattr(os, 'splice') and (
+            stat.S_ISFIFO(input_stat.st_mode) or stat.S_ISFIFO(output_mode)
+        ):
+            yield 'splice', _splice
+
+        # Files without a size such as the ones in `/proc` are not really
+        # regular files, the kernel can report them as empty
+        if not stat.S_ISREG(input_stat.st_mode) or not input_stat.st_size:
+            return
+
+        if hasattr(os, 'copy_file_range') and stat.S_ISREG(output_mode):
+            yield 'copy_file_range', _copy_file_range
+
+        # The other platforms do not update the offset of the input
+        if sys.platform.startswith('linux'):
+            yield 'sendfile', _sendfile
+
+    def _copy_zero_copy(
+        self,
+        function: ZeroCopyFunction,
+        input_fd: int,
+        output_fd: int,
+    ) -> bool:
+        '''Copy until the end of the input, `False` if not supported.'''
+        count = self._limit(ZERO_COPY_SIZE)
+        while True:
+            try:
+                size = function(input_fd, output_fd, count)
+            except OSError as exception:
+                # The offsets of the files are kept so the next method can
+                # continue where this one stopped
+                if exception.errno in UNSUPPORTED_ERRNOS:
+                    return False
+                raise
+
+            if not size:
+                return True
+            self._advance(size)
+
+    def _copy_buffered(self, input: typing.BinaryIO) -> None:
+        readinto = getattr(input, 'readinto', None)
+        policy = self.policy
+        clock = time.perf_counter
+        size = policy.size
+        view = memoryview(self._buffer)
+        while True:
+            if size > len(self._buffer):
+                self._buffer = bytearray(size)
+                view = memoryview(self._buffer)
+
+            requested = self._limit(size)
+            start = clock()
+            data: bytes | memoryview
+            if readinto is None:
+                data = input.read(requested)
+                received = len(data)
+            else:
+                received = readinto(view[:requested]) or 0
+                data = view[:received]
+
+            if not received:
+                return
+            if self.output is not None:
+                self.output.write(data)
+            size = policy.update(requested, received, clock() - start)
+            self._advance(received)
+
+    def _copy_direct(self, input_fd: int, output_fd: int | None) -> None:
+        '''Copy using page aligned buffers as required by `O_DIRECT`.'''
+        policy = self.policy
+        clock = time.perf_counter
+        size = _align(policy.size)
+        # Anonymous memory maps are always page aligned
+        buffer = mmap.mmap(-1, size)
+        try:
+            while True:
+                if size > len(buffer):
+                    buffer.close()
+                    buffer = mmap.mmap(-1, size)
+
+                # Rounding down keeps the chunks within the rate limit
+                requested = _align_down(self._limit(size))
+                start = clock()
+                received = self._read_direct(input_fd, buffer, requested)
+                if not received:
+                    return
+                if output_fd is not None:
+                    self._write_direct(output_fd, buffer, received)
+                size = _align(
+                    policy.update(requested, received, clock() - start),
+                )
+                self._advance(received)
+        finally:
+            buffer.close()
+
+    def _read_direct(self, fd: int, buffer: mmap.mmap, size: int) -> int:
+        # The views are released explicitly, the buffer cannot be closed
+        # while a traceback still references one
+        with memoryview(buffer) as view, view[:size] as chunk:
+            try:
+                return os.readv(fd, [chunk])
+            except OSError as exception:
+                # Unaligned offsets, e.g. a partially read input
+                if exception.errno != errno.EINVAL:
+                    raise
+                _set_direct(fd, False)
+                return os.readv(fd, [chunk])
+
+    def _write_direct(self, fd: int, buffer: mmap.mmap, size: int) -> None:
+        with memoryview(buffer) as view, view[:size] as chunk:
+            try:
+                written = os.write(fd, chunk)
+            except OSError as exception:
+                # The last block of the input is usually not a whole amount
+                # of pages, it is written without `O_DIRECT`
+                if exception.errno != errno.EINVAL:
+                    raise
+                _set_direct(fd, False)
+                written = 0
+
+            while written < size:
+                written += os.write(fd, chunk[written:])
+
+    def _limit(self, size: int) -> int:
+        if self.rate_limiter is None:
+            return size
+        return min(size, self.rate_limiter.chunk_size)
+
+    def _sync(self) -> None:
+        assert self._sync_fd is not None, 'Only outputs on disk are synced'
+        if self.output is not None:  # pragma: no branch
+            self.output.flush()
+        getattr(os, 'fdatasync', os.fsync)(self._sync_fd)
+
+    def _advance(self, size: int) -> None:
+        self.transferred += size
+        if self.rate_limiter is not None:
+            self.rate_limiter.consume(size)
+        if self.callback is None and self._sync_fd is None:
+            return
+
+        now = time.monotonic()
+        if self._sync_fd is not None and now >= self._next_sync:
+            self._next_sync = now + SYNC_INTERVAL
+            self._sync()
+
+        if self.callback is not None and now >= self._next_callback:
+            self._next_callback = now + self.update_interval
+            self._reported = self.transferred
+            self.callback(self.transferred)
@@ -23,7 +23,10 @@ assert scale_1024 is not None
 assert epoch is not None
 StringT = types.TypeVar('StringT', bound=types.StringTypes)
 
-def deltas_to_seconds(*deltas, default: types.Optional[types.Type[ValueError]]=ValueError) -> int | float | None:
+def deltas_to_seconds(
+    *deltas,
+    default: types.Optional[types.Type[ValueError]] = ValueError,
+) -> int | float | None:
     """
     Convert timedeltas and seconds as int to seconds as float while coalescing.
 
@@ -48,24 +51,44 @@ def deltas_to_seconds(*deltas, default: types.Optional[types.Type[ValueError]]=V
     >>> deltas_to_seconds(default=0.0)
     0.0
     """
-    pass
+    for delta in deltas:
+        if delta is None:
+            continue
+        if isinstance(delta, datetime.timedelta):
+            return timedelta_to_seconds(delta)
+        elif not isinstance(delta, float):
+            return float(delta)
+        else:
+            return delta
+
+    if default is ValueError:
+        raise ValueError('No valid deltas passed to `deltas_to_seconds`')
+    else:
+        # mypy doesn't understand the `default is ValueError` check
+        return default  # type: ignore
 
 def no_color(value: StringT) -> StringT:
     """
     Return the `value` without ANSI escape codes.
 
-    >>> no_color(b'\x1b[1234]abc')
+    >>> no_color(b'\u001b[1234]abc')
     b'abc'
-    >>> str(no_color(u'\x1b[1234]abc'))
+    >>> str(no_color(u'\u001b[1234]abc'))
     'abc'
-    >>> str(no_color('\x1b[1234]abc'))
+    >>> str(no_color('\u001b[1234]abc'))
     'abc'
     >>> no_color(123)
     Traceback (most recent call last):
     ...
     TypeError: `value` must be a string or bytes, got 123
     """
-    pass
+    if isinstance(value, bytes):
+        pattern: bytes = bytes(terminal.ESC, 'ascii') + b'\\[.*?[@-~]'
+        return re.sub(pattern, b'', value)  # type: ignore
+    elif isinstance(value, str):
+        return re.sub('\x1b\\[.*?[@-~]', '', value)  # type: ignore
+    else:
+        raise TypeError(f'`value` must be a string or bytes, got {value!r}')
 
 def len_color(value: types.StringTypes) -> int:
     """
@@ -106,6 +129,79 @@ class WrappingIO:
     def __exit__(self, __t: type[BaseException] | None, __value: BaseException | None, __traceback: TracebackType | None) -> None:
         self.close()
 
+    def write(self, value: str) -> int:
+        ret = 0
+        if self.capturing:
+            ret += self.buffer.write(value)
+            if '\n' in value:  # pragma: no branch
+                self.needs_clear = True
+                for listener in self.listeners:  # pragma: no branch
+                    listener.update()
+        else:
+            ret += self.target.write(value)
+            if '\n' in value:  # pragma: no branch
+                self.flush_target()
+
+        return ret
+
+    def flush(self) -> None:
+        self.buffer.flush()
+
+    def _flush(self) -> None:
+        if value := self.buffer.getvalue():
+            self.flush()
+            self.target.write(value)
+            self.buffer.seek(0)
+            self.buffer.truncate(0)
+            self.needs_clear = False
+
+        # when explicitly flushing, always flush the target as well
+        self.flush_target()
+
+    def flush_target(self) -> None:  # pragma: no cover
+        if not self.target.closed and getattr(self.target, 'flush', None):
+            self.target.flush()
+
+    def fileno(self) -> int:
+        return self.target.fileno()
+
+    def isatty(self) -> bool:
+        return self.target.isatty()
+
+    def read(self, n: int = -1) -> str:
+        return self.target.read(n)
+
+    def readable(self) -> bool:
+        return self.target.readable()
+
+    def readline(self, limit: int = -1) -> str:
+        return self.target.readline(limit)
+
+    def readlines(self, hint: int = -1) -> list[str]:
+        return self.target.readlines(hint)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self.target.seek(offset, whence)
+
+    def seekable(self) -> bool:
+        return self.target.seekable()
+
+    def tell(self) -> int:
+        return self.target.tell()
+
+    def truncate(self, size: types.Optional[int] = None) -> int:
+        return self.target.truncate(size)
+
+    def writable(self) -> bool:
+        return self.target.writable()
+
+    def writelines(self, lines: Iterable[str]) -> None:
+        return self.target.writelines(lines)
+
+    def close(self) -> None:
+        self.flush()
+        self.target.close()
+
 class StreamWrapper:
     """Wrap stdout and stderr globally."""
     stdout: base.TextIO | WrappingIO
@@ -131,6 +227,124 @@ class StreamWrapper:
         if env.env_flag('WRAP_STDERR', default=False):
             self.wrap_stderr()
 
+    def start_capturing(self, bar: ProgressBarMixinBase | None = None) -> None:
+        if bar:  # pragma: no branch
+            self.listeners.add(bar)
+
+        self.capturing += 1
+        self.update_capturing()
+
+    def stop_capturing(self, bar: ProgressBarMixinBase | None = None) -> None:
+        if bar:  # pragma: no branch
+            with contextlib.suppress(KeyError):
+                self.listeners.remove(bar)
+
+        self.capturing -= 1
+        self.update_capturing()
+
+    def update_capturing(self) -> None:  # pragma: no cover
+        if isinstance(self.stdout, WrappingIO):
+            self.stdout.capturing = self.capturing > 0
+
+        if isinstance(self.stderr, WrappingIO):
+            self.stderr.capturing = self.capturing > 0
+
+        if self.capturing <= 0:
+            self.flush()
+
+    def wrap(self, stdout: bool = False, stderr: bool = False) -> None:
+        if stdout:
+            self.wrap_stdout()
+
+        if stderr:
+            self.wrap_stderr()
+
+    def wrap_stdout(self) -> WrappingIO:
+        self.wrap_excepthook()
+
+        if not self.wrapped_stdout:
+            self.stdout = sys.stdout = WrappingIO(  # type: ignore
+                self.original_stdout,
+                listeners=self.listeners,
+            )
+        self.wrapped_stdout += 1
+
+        return sys.stdout  # type: ignore
+
+    def wrap_stderr(self) -> WrappingIO:
+        self.wrap_excepthook()
+
+        if not self.wrapped_stderr:
+            self.stderr = sys.stderr = WrappingIO(  # type: ignore
+                self.original_stderr,
+                listeners=self.listeners,
+            )
+        self.wrapped_stderr += 1
+
+        return sys.stderr  # type: ignore
+
+    def unwrap_excepthook(self) -> None:
+        if self.wrapped_excepthook:
+            self.wrapped_excepthook -= 1
+            sys.excepthook = self.original_excepthook
+
+    def wrap_excepthook(self) -> None:
+        if not self.wrapped_excepthook:
+            logger.debug('wrapping excepthook')
+            self.wrapped_excepthook += 1
+            sys.excepthook = self.excepthook
+
+    def unwrap(self, stdout: bool = False, stderr: bool = False) -> None:
+        if stdout:
+            self.unwrap_stdout()
+
+        if stderr:
+            self.unwrap_stderr()
+
+    def unwrap_stdout(self) -> None:
+        if self.wrapped_stdout > 1:
+            self.wrapped_stdout -= 1
+        else:
+            sys.stdout = self.original_stdout
+            self.wrapped_stdout = 0
+
+    def unwrap_stderr(self) -> None:
+        if self.wrapped_stderr > 1:
+            self.wrapped_stderr -= 1
+        else:
+            sys.stderr = self.original_stderr
+            self.wrapped_stderr = 0
+
+    def needs_clear(self) -> bool:  # pragma: no cover
+        stdout_needs_clear = getattr(self.stdout, 'needs_clear', False)
+        stderr_needs_clear = getattr(self.stderr, 'needs_clear', False)
+        return stderr_needs_clear or stdout_needs_clear
+
+    def flush(self) -> None:
+        if self.wrapped_stdout and isinstance(self.stdout, WrappingIO):
+            try:
+                self.stdout._flush()
+            except io.UnsupportedOperation:  # pragma: no cover
+                self.wrapped_stdout = False
+                logger.warning(
+                    'Disabling stdout redirection, %r is not seekable',
+                    sys.stdout,
+                )
+
+        if self.wrapped_stderr and isinstance(self.stderr, WrappingIO):
+            try:
+                self.stderr._flush()
+            except io.UnsupportedOperation:  # pragma: no cover
+                self.wrapped_stderr = False
+                logger.warning(
+                    'Disabling stderr redirection, %r is not seekable',
+                    sys.stderr,
+                )
+
+    def excepthook(self, exc_type, exc_value, exc_traceback):
+        self.original_excepthook(exc_type, exc_value, exc_traceback)
+        self.flush()
+
 class AttributeDict(dict):
     """
     A dict that can be accessed with .attribute.
@@ -191,6 +405,207 @@ class AttributeDict(dict):
             del self[name]
         else:
             raise AttributeError(f'No such attribute: {name}')
+
+
+LazyFactory = types.Callable[[types.Any, 'LazyDict'], types.Any]
+
+
+class LazyDict(dict):
+    '''
+    A dict that computes the values of `factories` on first access.
+
+    Every factory is called as `factory(source, data)` so values can be
+    derived from both the `source` object and other (lazy) values. Computed
+    values are stored so they are only calculated once. All keys read through
+    `__getitem__` and `get` are recorded in `accessed`.
+
+    >>> data = LazyDict(
+    ...     dict(spam=lambda source, data: data['eggs'] * source),
+    ...     2,
+    ...     eggs=21,
+    ... )
+    >>> dict.__contains__(data, 'spam')
+    False
+    >>> 'spam' in data
+    True
+    >>> data['spam']
+    42
+    >>> sorted(data.accessed)
+    ['eggs', 'spam']
+    >>> data.get('bacon', 'no bacon')
+    'no bacon'
+    >>> sorted(data)
+    ['eggs', 'spam']
+    >>> '%(spam)d' % data
+    '42'
+    >>> '{spam}'.format(**data)
+    '42'
+    '''
+
+    __slots__ = ('accessed', 'factories', 'source')
+
+    factories: types.Mapping[str, LazyFactory]
+    source: types.Any
+    accessed: types.Set[str]
+
+    def __init__(self, factories, source=None, /, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.factories = factories
+        self.source = source
+        self.accessed = set()
+
+    def __missing__(self, key):
+        factory = self.factories.get(key)
+        if factory is None:
+            raise KeyError(key)
+
+        value = self[key] = factory(self.source, self)
+        return value
+
+    def __getitem__(self, key):
+        self.accessed.add(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key) -> bool:
+        return super().__contains__(key) or key in self.factories
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = list(dict.keys(self))
+        keys += [
+            key for key in self.factories if not dict.__contains__(self, key)
+        ]
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def copy(self) -> dict:
+        '''Return a regular dict with all values computed.'''
+        return dict(self.items())
+
+
+class SampleBuffer:
+    '''
+    A ring buffer of `(timestamp, value)` samples.
+
+    Appending and removing the oldest sample are O(1) and the buffer only
+    grows (by doubling) if it is full, so a buffer with enough `capacity`
+    never allocates after creation.
+
+    >>> samples = SampleBuffer(capacity=2)
+    >>> samples.append(1.0, 10)
+    >>> samples.append(2.0, 15)
+    >>> samples.append(4.0, 25)
+    >>> samples.delta()
+    (3.0, 15)
+    >>> samples.popleft()
+    (1.0, 10)
+    >>> samples.delta()
+    (2.0, 10)
+    >>> samples.values()
+    [15, 25]
+    >>> len(samples), samples.capacity
+    (2, 4)
+    '''
+
+    __slots__ = ('_head', '_size', '_times', '_values')
+
+    _times: list[float]
+    _values: list[types.Any]
+
+    def __init__(self, capacity: int = 16):
+        capacity = max(capacity, 2)
+        self._times = [0.0] * capacity
+        self._values = [0] * capacity
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._times)
+
+    def _index(self, index: int) -> int:
+        if not -self._size <= index < self._size:
+            raise IndexError(index)
+        return (self._head + index % self._size) % len(self._times)
+
+    def time(self, index: int) -> float:
+        return self._times[self._index(index)]
+
+    def value(self, index: int) -> types.Any:
+        return self._values[self._index(index)]
+
+    def append(self, timestamp: float, value: types.Any) -> None:
+        capacity = len(self._times)
+        if self._size == capacity:
+            self._grow()
+            capacity = len(self._times)
+
+        index = (self._head + self._size) % capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+        self._size += 1
+
+    def popleft(self) -> tuple[float, types.Any]:
+        if not self._size:
+            raise IndexError('pop from an empty buffer')
+
+        head = self._head
+        self._head = (head + 1) % len(self._times)
+        self._size -= 1
+        return self._times[head], self._values[head]
+
+    def clear(self) -> None:
+        self._head = self._size = 0
+
+    def delta(self) -> tuple[float, types.Any]:
+        '''The time and value between the oldest and the newest sample.'''
+        if not self._size:
+            return 0.0, 0
+
+        first = self._head
+        last = (first + self._size - 1) % len(self._times)
+        return (
+            self._times[last] - self._times[first],
+            self._values[last] - self._values[first],
+        )
+
+    def times(self) -> list[float]:
+        return [self.time(index) for index in range(self._size)]
+
+    def values(self) -> list[types.Any]:
+        return [self.value(index) for index in range(self._size)]
+
+    def _grow(self) -> None:
+        times = self.times()
+        values = self.values()
+        extra = max(len(self._times), 2)
+        self._times = times + [0.0] * extra
+        self._values = values + [0] * extra
+        self._head = 0
+
+
 logger = logging.getLogger(__name__)
 streams = StreamWrapper()
 atexit.register(streams.flush)
@@ -0,0 +1,175 @@
+'''
+Watch the progress of another process through its file descriptors.
+
+Like `pv --watchfd` this never touches the data of the process, it only
+compares the positions in `/proc/<pid>/fdinfo/<fd>` with the sizes of the
+files (Linux only). Every tick is a single `os.scandir` of `/proc/<pid>/fd`
+and a small read of the `fdinfo` of the regular files and block devices:
+
+>>> with open(__file__, 'rb', buffering=0) as fh:
+...     _ = fh.read(10)
+...     fd = fh.fileno()
+...     watched = scan(os.getpid(), fd)
+>>> watched[fd].position
+10
+
+`FdWatcher` shows every watched file descriptor as a row of a `MultiBar`
+until the process exits.
+'''
+
+from __future__ import annotations
+
+import contextlib
+import os
+import stat
+import time
+import typing
+
+from . import bar, multi
+
+
+class WatchedFd(typing.NamedTuple):
+    #: The file descriptor within the watched process
+    fd: int
+    #: The path of the file
+    path: str
+    #: The current position within the file
+    position: int
+    #: The size of the file, `None` if unknown
+    size: int | None
+
+
+def parse_target(target: str) -> tuple[int, int | None]:
+    '''
+    Parse `PID` or `PID:FD` as given to `--watchfd`.
+
+    >>> parse_target('123'), parse_target('123:4')
+    ((123, None), (123, 4))
+    '''
+    pid, _, fd = target.partition(':')
+    return int(pid), int(fd) if fd else None
+
+
+def _position(pid: int, fd: int) -> int | None:
+    with contextlib.suppress(OSError, ValueError, IndexError), open(
+        f'/proc/{pid}/fdinfo/{fd}',
+    ) as fh:
+        # The first line is always `pos:\t<position>`
+        return int(fh.readline().split()[1])
+    return None
+
+
+def _block_device_size(path: str) -> int | None:
+    with contextlib.suppress(OSError):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            return os.lseek(fd, 0, os.SEEK_END)
+        finally:
+            os.close(fd)
+    return None
+
+
+def scan(pid: int, only_fd: int | None = None) -> dict[int, WatchedFd]:
+    '''
+    Return the regular files and block devices opened by the process.
+
+    Raises:
+        FileNotFoundError: If the process does not exist (anymore)
+        PermissionError: If the process belongs to another user
+    '''
+    watched = {}
+    with os.scandir(f'/proc/{pid}/fd') as entries:
+        for entry in entries:
+            fd = int(entry.name)
+            if only_fd is not None and fd != only_fd:
+                continue
+
+            # The file descriptor can be closed while scanning
+            with contextlib.suppress(OSError):
+                path = os.readlink(entry.path)
+                mode = entry.stat().st_mode
+                if stat.S_ISREG(mode):
+                    size = entry.stat().st_size
+                elif stat.S_ISBLK(mode):
+                    size = _block_device_size(entry.path)
+                else:
+                    continue
+
+                position = _position(pid, fd)
+                if position is not None:
+                    watched[fd] = WatchedFd(fd, path, position, size)
+    return watched
+
+
+class FdWatcher:
+    '''
+    Shows the progress of the file descriptors of a process in a `MultiBar`.
+
+    Every file gets its own progressbar labeled `<fd>:<path>`, the
+    progressbars of closed files are finished. A file descriptor that is
+    reused for another file gets a new progressbar.
+
+    Args:
+        pid: The process to watch
+        fd: Only watch this file descriptor
+        multibar: The multibar to add the progressbars to, a new one by
+            default
+        **progressbar_kwargs: Passed on to the new `MultiBar`
+    '''
+
+    def __init__(
+        self,
+        pid: int,
+        fd: int | None = None,
+        multibar: multi.MultiBar | None = None,
+        **progressbar_kwargs: typing.Any,
+    ):
+        self.pid = pid
+        self.fd = fd
+        if multibar is None:
+            progressbar_kwargs.setdefault('max_error', False)
+            multibar = multi.MultiBar(**progressbar_kwargs)
+        self.multibar = multibar
+        self._bars: dict[tuple[int, str], bar.ProgressBar] = {}
+
+    def poll(self) -> bool:
+        '''Update the progressbars, `False` once the process is gone.'''
+        try:
+            watched = scan(self.pid, self.fd)
+        except FileNotFoundError:
+            self.finish()
+            return False
+
+        active = set()
+        for fd, path, position, size in watched.values():
+            if size is not None:
+                # Files that are being written grow with the position
+                size = max(size, position)
+
+            key = fd, path
+            active.add(key)
+            progress = self._bars.get(key)
+            if progress is None:
+                # The basename is not unique, the same name can be opened
+                # from different directories
+                label = f'{fd}:{path}'
+                progress = self._bars[key] = self.multibar[label]
+                progress.start(max_value=size)
+            elif size is not None:
+                progress.max_value = size
+            progress.update(position)
+
+        for key in set(self._bars) - active:
+            self._bars.pop(key).finish(dirty=True)
+        return True
+
+    def finish(self) -> None:
+        '''Finish the progressbars in their current state.'''
+        while self._bars:
+            self._bars.popitem()[1].finish(dirty=True)
+
+    def run(self, interval: float = 1.0) -> None:
+        '''Render the progressbars until the process exits.'''
+        with self.multibar:
+            while self.poll():
+                time.sleep(interval)
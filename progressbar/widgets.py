@@ -19,6 +19,17 @@ Data = types.Dict[str, types.Any]
 FormatString = typing.Optional[str]
 T = typing.TypeVar('T')
 
+
+def string_or_lambda(input_):
+    if isinstance(input_, str):
+
+        def render_input(progress, data, width):
+            return input_ % data
+
+        return render_input
+    else:
+        return input_
+
 def create_wrapper(wrapper):
     """Convert a wrapper tuple or format string to a format string.
 
@@ -30,32 +41,58 @@ def create_wrapper(wrapper):
     >>> print(create_wrapper(('a', 'b')))
     a{}b
     """
-    if not wrapper:
+    if isinstance(wrapper, tuple) and len(wrapper) == 2:
+        a, b = wrapper
+        wrapper = (a or '') + '{}' + (b or '')
+    elif not wrapper:
         return None
-    elif isinstance(wrapper, tuple):
-        return '{}{}{}' if len(wrapper) == 3 else '{}{}' if len(wrapper) == 2 else '{}'
+
+    if isinstance(wrapper, str):
+        assert '{}' in wrapper, 'Expected string with {} for formatting'
     else:
-        return wrapper
+        raise RuntimeError(  # noqa: TRY004
+            'Pass either a begin/end string as a tuple or a template string '
+            'with `{}`',
+        )
+
+    return wrapper
 
 def wrapper(function, wrapper_):
     """Wrap the output of a function in a template string or a tuple with
     begin/end strings.
 
     """
+    wrapper_ = create_wrapper(wrapper_)
+    if not wrapper_:
+        return function
+
     @functools.wraps(function)
     def wrap(*args, **kwargs):
-        result = function(*args, **kwargs)
-        
-        if isinstance(wrapper_, tuple):
-            if len(wrapper_) == 2:
-                return f'{wrapper_[0]}{result}{wrapper_[1]}'
-            elif len(wrapper_) == 3:
-                return f'{wrapper_[0]}{result}{wrapper_[1]}{wrapper_[2]}'
-        else:
-            return wrapper_.format(result)
-    
+        return wrapper_.format(function(*args, **kwargs))
+
     return wrap
 
+
+def create_marker(marker, wrap=None):
+    def _marker(progress, data, width):
+        if (
+            progress.max_value is not base.UnknownLength
+            and progress.max_value > 0
+        ):
+            length = int(progress.value / progress.max_value * width)
+            return marker * length
+        else:
+            return marker
+
+    if isinstance(marker, str):
+        marker = converters.to_unicode(marker)
+        assert (
+            utils.len_color(marker) == 1
+        ), 'Markers are required to be 1 char'
+        return wrapper(_marker, wrap)
+    else:
+        return wrapper(marker, wrap)
+
 class FormatWidgetMixin(abc.ABC):
     """Mixin to format widgets using a formatstring.
 
@@ -88,6 +125,14 @@ class FormatWidgetMixin(abc.ABC):
             logger.exception('Error while formatting %r with data: %r', format_, data)
             raise
 
+    def get_format(
+        self,
+        progress: ProgressBarMixinBase,
+        data: Data,
+        format: types.Optional[str] = None,
+    ) -> str:
+        return format or self.format
+
 class WidthWidgetMixin(abc.ABC):
     """Mixing to make sure widgets are only visible if the screen is within a
     specified size range so the progressbar fits on both large and small
@@ -117,6 +162,16 @@ class WidthWidgetMixin(abc.ABC):
         self.min_width = min_width
         self.max_width = max_width
 
+    def check_size(self, progress: ProgressBarMixinBase):
+        max_width = self.max_width
+        min_width = self.min_width
+        if min_width and min_width > progress.term_width:
+            return False
+        elif max_width and max_width < progress.term_width:  # noqa: SIM103
+            return False
+        else:
+            return True
+
 class TGradientColors(typing.TypedDict):
     fg: types.Optional[terminal.OptionalColor | None]
     bg: types.Optional[terminal.OptionalColor | None]
@@ -151,9 +206,13 @@ class WidgetBase(WidthWidgetMixin, metaclass=abc.ABCMeta):
      - copy: Copy this widget when initializing the progress bar so the
        progressbar can be reused. Some widgets such as the FormatCustomText
        require the shared state so this needs to be optional
+     - value_dependent: The output only depends on the `value`, `min_value`
+       and `max_value` (and the variable for variable widgets) so the
+       progressbar can reuse the previous output while those are unchanged
 
     """
     copy = True
+    value_dependent: bool = False
 
     @abc.abstractmethod
     def __call__(self, progress: ProgressBarMixinBase, data: Data) -> str:
@@ -174,6 +233,25 @@ class WidgetBase(WidthWidgetMixin, metaclass=abc.ABCMeta):
             self._len = utils.len_color
         super().__init__(*args, **kwargs)
 
+    @functools.cached_property
+    def uses_colors(self):
+        for value in self._gradient_colors.values():  # pragma: no branch
+            if value is not None:  # pragma: no branch
+                return True
+
+        return any(value is not None for value in self._fixed_colors.values())
+
+    def _apply_colors(self, text: str, data: Data) -> str:
+        if self.uses_colors:
+            return terminal.apply_colors(
+                text,
+                data.get('percentage'),
+                **self._gradient_colors,
+                **self._fixed_colors,
+            )
+        else:
+            return text
+
 class AutoWidthWidgetBase(WidgetBase, metaclass=abc.ABCMeta):
     """The base class for all variable width widgets.
 
@@ -216,7 +294,11 @@ class FormatLabel(FormatWidgetMixin, WidgetBase):
         WidgetBase.__init__(self, **kwargs)
 
     def __call__(self, progress: ProgressBarMixinBase, data: Data, format: types.Optional[str]=None):
+        format_ = self.get_format(progress, data, format)
         for name, (key, transform) in self.mapping.items():
+            # Skip the (lazy) keys the format doesn't use
+            if name not in format_:
+                continue
             with contextlib.suppress(KeyError, ValueError, IndexError):
                 if transform is None:
                     data[name] = data[key]
@@ -241,19 +323,22 @@ class SamplesMixin(TimeSensitiveWidgetBase, metaclass=abc.ABCMeta):
     Note that samples can be either an integer or a timedelta to indicate a
     certain amount of time
 
+    The samples are stored per progressbar in a `utils.SampleBuffer` of
+    float timestamps so adding a sample doesn't allocate any objects.
+
     >>> class progress:
-    ...     last_update_time = datetime.datetime.now()
+    ...     _last_update_time = 0.0
     ...     value = 1
     ...     extra = dict()
 
     >>> samples = SamplesMixin(samples=2)
     >>> samples(progress, None, True)
     (None, None)
-    >>> progress.last_update_time += datetime.timedelta(seconds=1)
+    >>> progress._last_update_time += 1
     >>> samples(progress, None, True) == (datetime.timedelta(seconds=1), 0)
     True
 
-    >>> progress.last_update_time += datetime.timedelta(seconds=1)
+    >>> progress._last_update_time += 1
     >>> samples(progress, None, True) == (datetime.timedelta(seconds=1), 0)
     True
 
@@ -264,6 +349,8 @@ class SamplesMixin(TimeSensitiveWidgetBase, metaclass=abc.ABCMeta):
 
     >>> samples(progress, None, True) == (datetime.timedelta(seconds=1), 0)
     True
+    >>> samples.get_deltas(progress)
+    (1.0, 0)
     """
 
     def __init__(self, samples=datetime.timedelta(seconds=2), key_prefix=None, **kwargs):
@@ -271,33 +358,76 @@ class SamplesMixin(TimeSensitiveWidgetBase, metaclass=abc.ABCMeta):
         self.key_prefix = (key_prefix or self.__class__.__name__) + '_'
         TimeSensitiveWidgetBase.__init__(self, **kwargs)
 
-    def __call__(self, progress: ProgressBarMixinBase, data: Data, delta: bool=False):
-        sample_times = self.get_sample_times(progress, data)
-        sample_values = self.get_sample_values(progress, data)
-        if sample_times:
-            sample_time = sample_times[-1]
-        else:
-            sample_time = datetime.datetime.min
-        if progress.last_update_time - sample_time > self.INTERVAL:
-            sample_times.append(progress.last_update_time)
-            sample_values.append(progress.value)
+    def get_samples(
+        self,
+        progress: ProgressBarMixinBase,
+    ) -> utils.SampleBuffer:
+        """Return the sample buffer of the progressbar."""
+        key = self.key_prefix + 'samples'
+        samples = progress.extra.get(key)
+        if samples is None:
             if isinstance(self.samples, datetime.timedelta):
-                minimum_time = progress.last_update_time - self.samples
-                minimum_value = sample_values[-1]
-                while sample_times[2:] and minimum_time > sample_times[1] and (minimum_value > sample_values[1]):
-                    sample_times.pop(0)
-                    sample_values.pop(0)
-            elif len(sample_times) > self.samples:
-                sample_times.pop(0)
-                sample_values.pop(0)
-        if delta:
-            if (delta_time := (sample_times[-1] - sample_times[0])):
-                delta_value = sample_values[-1] - sample_values[0]
-                return (delta_time, delta_value)
+                # At most one sample per `INTERVAL` is stored
+                interval = self.INTERVAL.total_seconds() or 1
+                capacity = int(self.samples.total_seconds() / interval) + 2
             else:
+                # `samples` may be a float, one extra sample before popping
+                capacity = int(self.samples) + 1
+            samples = progress.extra[key] = utils.SampleBuffer(capacity)
+        return samples
+
+    def get_sample_times(self, progress: ProgressBarMixinBase, data: Data):
+        return containers.SliceableDeque(self.get_samples(progress).times())
+
+    def get_sample_values(self, progress: ProgressBarMixinBase, data: Data):
+        return containers.SliceableDeque(self.get_samples(progress).values())
+
+    def add_sample(self, progress: ProgressBarMixinBase) -> utils.SampleBuffer:
+        """Add the current value if `INTERVAL` passed since the last sample."""
+        samples = self.get_samples(progress)
+        timestamp = progress._last_update_time
+        interval = self.INTERVAL.total_seconds()
+        if samples and timestamp - samples.time(-1) <= interval:
+            return samples
+
+        value = progress.value
+        samples.append(timestamp, value)
+        if isinstance(self.samples, datetime.timedelta):
+            minimum_time = timestamp - self.samples.total_seconds()
+            while (
+                len(samples) > 2
+                and minimum_time > samples.time(1)
+                and value > samples.value(1)
+            ):
+                samples.popleft()
+        elif len(samples) > self.samples:
+            samples.popleft()
+        return samples
+
+    def get_deltas(self, progress: ProgressBarMixinBase):
+        """Add a sample and return the elapsed seconds and the value change.
+
+        Returns:
+            (float, value) or (None, None) if no time has passed
+        """
+        delta_time, delta_value = self.add_sample(progress).delta()
+        if delta_time:
+            return delta_time, delta_value
+        else:
+            return None, None
+
+    def __call__(self, progress: ProgressBarMixinBase, data: Data, delta: bool=False):
+        if delta:
+            delta_time, delta_value = self.get_deltas(progress)
+            if delta_time is None:
                 return (None, None)
+            return (datetime.timedelta(seconds=delta_time), delta_value)
         else:
-            return (sample_times, sample_values)
+            self.add_sample(progress)
+            return (
+                self.get_sample_times(progress, data),
+                self.get_sample_values(progress, data),
+            )
 
 class ETA(Timer):
     """WidgetBase which attempts to estimate the time of arrival."""
@@ -314,14 +444,20 @@ class ETA(Timer):
 
     def _calculate_eta(self, progress: ProgressBarMixinBase, data: Data, value, elapsed):
         """Updates the widget to show the ETA or total time when finished."""
-        pass
+        if elapsed:
+            # The max() prevents zero division errors
+            per_item = utils.deltas_to_seconds(elapsed) / max(value, 1e-06)
+            remaining = progress.max_value - data['value']
+            return remaining * per_item
+        else:
+            return 0
 
     def __call__(self, progress: ProgressBarMixinBase, data: Data, value=None, elapsed=None):
         """Updates the widget to show the ETA or total time when finished."""
         if value is None:
             value = data['value']
         if elapsed is None:
-            elapsed = data['time_elapsed']
+            elapsed = data['total_seconds_elapsed']
         eta_na = False
         try:
             data['eta_seconds'] = self._calculate_eta(progress, data, value=value, elapsed=elapsed)
@@ -350,6 +486,20 @@ class AbsoluteETA(ETA):
     def __init__(self, format_not_started='Estimated finish time:  ----/--/-- --:--:--', format_finished='Finished at: %(elapsed)s', format='Estimated finish time: %(eta)s', **kwargs):
         ETA.__init__(self, format_not_started=format_not_started, format_finished=format_finished, format=format, **kwargs)
 
+    def _calculate_eta(
+        self,
+        progress: ProgressBarMixinBase,
+        data: Data,
+        value,
+        elapsed,
+    ):
+        eta_seconds = ETA._calculate_eta(self, progress, data, value, elapsed)
+        now = datetime.datetime.now()
+        try:
+            return now + datetime.timedelta(seconds=eta_seconds)
+        except OverflowError:  # pragma: no cover
+            return datetime.datetime.max
+
 class AdaptiveETA(ETA, SamplesMixin):
     """WidgetBase which attempts to estimate the time of arrival.
 
@@ -366,7 +516,7 @@ class AdaptiveETA(ETA, SamplesMixin):
         SamplesMixin.__init__(self, **kwargs)
 
     def __call__(self, progress: ProgressBarMixinBase, data: Data, value=None, elapsed=None):
-        elapsed, value = SamplesMixin.__call__(self, progress, data, delta=True)
+        elapsed, value = self.get_deltas(progress)
         if not elapsed:
             value = None
             elapsed = 0
@@ -380,20 +530,48 @@ class SmoothingETA(ETA):
     EMA applies more weight to recent data points and less to older ones,
     and doesn't require storing all past values. This approach works well
     with varying data points and smooths out fluctuations effectively.
+
+    The rate estimators (`algorithms.RateEstimator`) can be selected by class
+    or by name from `algorithms.ALGORITHMS`, e.g. `SmoothingETA('kalman')`.
+    These follow a slowing or speeding job more closely, but for bursty
+    progress that is steady on average the regular ETA (the average rate
+    since the start) is more accurate, see `benchmarks/estimators.py`.
+    Until the rate estimator has enough data the regular ETA is shown.
     """
     smoothing_algorithm: algorithms.SmoothingAlgorithm
     smoothing_parameters: dict[str, float]
 
-    def __init__(self, smoothing_algorithm: type[algorithms.SmoothingAlgorithm]=algorithms.ExponentialMovingAverage, smoothing_parameters: dict[str, float] | None=None, **kwargs):
+    def __init__(
+        self,
+        smoothing_algorithm: type[algorithms.SmoothingAlgorithm]
+        | str=algorithms.ExponentialMovingAverage,
+        smoothing_parameters: dict[str, float] | None=None,
+        **kwargs,
+    ):
         self.smoothing_parameters = smoothing_parameters or {}
-        self.smoothing_algorithm = smoothing_algorithm(**self.smoothing_parameters or {})
+        algorithm = algorithms.get_algorithm(smoothing_algorithm)
+        self.smoothing_algorithm = algorithm(**self.smoothing_parameters)
         ETA.__init__(self, **kwargs)
 
+    def _calculate_eta(
+        self,
+        progress: ProgressBarMixinBase,
+        data: Data,
+        value,
+        elapsed,
+    ):
+        algorithm = self.smoothing_algorithm
+        if isinstance(algorithm, algorithms.RateEstimator):
+            eta = algorithm.eta(progress.max_value - data['value'])
+            if eta is not None:
+                return eta
+        return ETA._calculate_eta(self, progress, data, value, elapsed)
+
     def __call__(self, progress: ProgressBarMixinBase, data: Data, value=None, elapsed=None):
         if value is None:
             value = data['value']
         if elapsed is None:
-            elapsed = data['time_elapsed']
+            elapsed = data['total_seconds_elapsed']
         self.smoothing_algorithm.update(value, elapsed)
         return ETA.__call__(self, progress, data, value=value, elapsed=elapsed)
 
@@ -407,6 +585,7 @@ class DataSize(FormatWidgetMixin, WidgetBase):
 
     def __init__(self, variable='value', format='%(scaled)5.1f %(prefix)s%(unit)s', unit='B', prefixes=('', 'Ki', 'Mi', 'Gi', 'Ti', 'Pi', 'Ei', 'Zi', 'Yi'), **kwargs):
         self.variable = variable
+        self.value_dependent = variable in ('value', 'max_value')
         self.unit = unit
         self.prefixes = prefixes
         FormatWidgetMixin.__init__(self, format=format, **kwargs)
@@ -456,6 +635,10 @@ class FileTransferSpeed(FormatWidgetMixin, TimeSensitiveWidgetBase):
             data['prefix'] = self.prefixes[power]
             return FormatWidgetMixin.__call__(self, progress, data)
 
+    def _speed(self, value, elapsed):
+        speed = float(value) / elapsed
+        return utils.scale_1024(speed, len(self.prefixes))
+
 class AdaptiveTransferSpeed(FileTransferSpeed, SamplesMixin):
     """Widget for showing the transfer speed based on the last X samples."""
 
@@ -464,7 +647,7 @@ class AdaptiveTransferSpeed(FileTransferSpeed, SamplesMixin):
         SamplesMixin.__init__(self, **kwargs)
 
     def __call__(self, progress: ProgressBarMixinBase, data, value=None, total_seconds_elapsed=None):
-        elapsed, value = SamplesMixin.__call__(self, progress, data, delta=True)
+        elapsed, value = self.get_deltas(progress)
         return FileTransferSpeed.__call__(self, progress, data, value, elapsed)
 
 class AnimatedMarker(TimeSensitiveWidgetBase):
@@ -503,6 +686,7 @@ RotatingMarker = AnimatedMarker
 
 class Counter(FormatWidgetMixin, WidgetBase):
     """Displays the current count."""
+    value_dependent = True
 
     def __init__(self, format='%(value)d', **kwargs):
         FormatWidgetMixin.__init__(self, format=format, **kwargs)
@@ -517,14 +701,31 @@ class ColoredMixin:
 
 class Percentage(FormatWidgetMixin, ColoredMixin, WidgetBase):
     """Displays the current percentage as a number with a percent sign."""
+    value_dependent = True
 
     def __init__(self, format='%(percentage)3d%%', na='N/A%%', **kwargs):
         self.na = na
         FormatWidgetMixin.__init__(self, format=format, **kwargs)
         WidgetBase.__init__(self, format=format, **kwargs)
 
+    def get_format(
+        self,
+        progress: ProgressBarMixinBase,
+        data: Data,
+        format=None,
+    ):
+        # If percentage is not available, display N/A%
+        percentage = data.get('percentage', base.Undefined)
+        if not percentage and percentage != 0:
+            output = self.na
+        else:
+            output = FormatWidgetMixin.get_format(self, progress, data, format)
+
+        return self._apply_colors(output, data)
+
 class SimpleProgress(FormatWidgetMixin, ColoredMixin, WidgetBase):
     """Returns progress as a count of the total (e.g.: "5 of 47")."""
+    value_dependent = True
     max_width_cache: dict[types.Union[str, tuple[float, float | types.Type[base.UnknownLength]]], types.Optional[int]]
     DEFAULT_FORMAT = '%(value_s)s of %(max_value_s)s'
 
@@ -647,6 +848,9 @@ class FormatCustomText(FormatWidgetMixin, WidgetBase):
     def __call__(self, progress: ProgressBarMixinBase, data: Data, format: types.Optional[str]=None):
         return FormatWidgetMixin.__call__(self, progress, self.mapping, format or self.format)
 
+    def update_mapping(self, **mapping: types.Dict[str, types.Any]):
+        self.mapping.update(mapping)
+
 class VariableMixin:
     """Mixin to display a custom user variable."""
 
@@ -702,11 +906,40 @@ class MultiRangeBar(Bar, VariableMixin):
             middle = fill * width
         return left + middle + right
 
+    def get_values(self, progress: ProgressBarMixinBase, data: Data):
+        return data['variables'][self.name] or []
+
 class MultiProgressBar(MultiRangeBar):
 
     def __init__(self, name, markers=' ▁▂▃▄▅▆▇█', **kwargs):
         MultiRangeBar.__init__(self, name=name, markers=list(reversed(markers)), **kwargs)
 
+    def get_values(self, progress: ProgressBarMixinBase, data: Data):
+        ranges = [0.0] * len(self.markers)
+        for value in data['variables'][self.name] or []:
+            if not isinstance(value, (int, float)):
+                # Progress is (value, max)
+                progress_value, progress_max = value
+                value = float(progress_value) / float(progress_max)
+
+            if not 0 <= value <= 1:
+                raise ValueError(
+                    'Range value needs to be in the range [0..1], '
+                    f'got {value}',
+                )
+
+            range_ = value * (len(ranges) - 1)
+            pos = int(range_)
+            frac = range_ % 1
+            ranges[pos] += 1 - frac
+            if frac:
+                ranges[pos + 1] += frac
+
+        if self.fill_left:  # pragma: no branch
+            ranges = list(reversed(ranges))
+
+        return ranges
+
 class GranularMarkers:
     smooth = ' ▏▎▍▌▋▊▉█'
     bar = ' ▁▂▃▄▅▆▇█'
@@ -790,6 +1023,7 @@ class PercentageLabelBar(Percentage, FormatLabelBar):
 
 class Variable(FormatWidgetMixin, VariableMixin, WidgetBase):
     """Displays a custom variable."""
+    value_dependent = True
 
     def __init__(self, name, format='{name}: {formatted_value}', width=6, precision=3, **kwargs):
         """Creates a Variable associated with the given name."""
@@ -834,6 +1068,16 @@ class CurrentTime(FormatWidgetMixin, TimeSensitiveWidgetBase):
         data['current_datetime'] = self.current_datetime()
         return FormatWidgetMixin.__call__(self, progress, data, format=format)
 
+    def current_datetime(self):
+        now = datetime.datetime.now()
+        if not self.microseconds:
+            now = now.replace(microsecond=0)
+
+        return now
+
+    def current_time(self):
+        return self.current_datetime().time()
+
 class JobStatusBar(Bar, VariableMixin):
     """
     Widget which displays the job status as markers on the bar.
@@ -0,0 +1,101 @@
+import asyncio
+import io
+
+from progressbar import aio
+
+
+async def numbers(n):
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield i
+
+
+def test_async_iteration():
+    fd = io.StringIO()
+
+    async def main():
+        bar = aio.AsyncProgressBar(fd=fd)
+        assert [i async for i in bar(numbers(10), max_value=10)] == list(
+            range(10),
+        )
+        return bar
+
+    bar = asyncio.run(main())
+    assert bar.value == 10
+    assert bar.end_time
+    assert bar.fd is fd
+    assert '100%' in fd.getvalue()
+
+
+def test_async_progressbar_restart_in_new_loop():
+    fd = io.StringIO()
+    bar = aio.AsyncProgressBar(max_value=10, fd=fd)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        bar.start()
+        async for _ in bar(numbers(10)):
+            assert bar.fd.loop is loop
+        assert bar.fd is fd
+
+    asyncio.run(main())
+    asyncio.run(main())
+    assert fd.getvalue().count('100%') == 2
+
+
+def test_async_context_manager():
+    fd = io.StringIO()
+
+    events = []
+
+    async def main():
+        async with aio.AsyncProgressBar(max_value=10, fd=fd) as bar:
+            bar.add_listener(
+                lambda bar, event, **kwargs: events.append(event),
+            )
+            for i in range(10):
+                bar.update(i + 1)
+                assert bar.value == i + 1
+            # Updates only schedule a redraw
+            assert bar._render_handle is not None
+        assert bar._render_handle is None
+        return bar
+
+    bar = asyncio.run(main())
+    assert bar.end_time
+    assert fd.getvalue()
+    # Rendering from the loop is not an update
+    assert events == ['update'] * 10 + ['finish']
+
+
+def test_async_progressbar_without_loop():
+    bar = aio.AsyncProgressBar(max_value=10, fd=io.StringIO())
+    for _ in bar(range(10)):
+        pass
+    assert not isinstance(bar.fd, aio.AsyncStreamWriter)
+    assert bar.value == 10
+
+
+def test_async_stream_writer_coalesces():
+    class Stream(io.StringIO):
+        writes = 0
+
+        def write(self, value):
+            self.writes += 1
+            return super().write(value)
+
+    async def main():
+        stream = Stream()
+        writer = aio.AsyncStreamWriter(stream, asyncio.get_running_loop())
+        writer.write('a')
+        writer.flush()
+        writer.write('b')
+        writer.flush()
+        writer.write('c')
+        writer.flush()
+        await writer.drain()
+        return stream
+
+    stream = asyncio.run(main())
+    assert stream.getvalue() == 'abc'
+    assert stream.writes == 2
@@ -1,3 +1,4 @@
+import array
 from datetime import timedelta
 
 import pytest
@@ -44,4 +45,107 @@ def test_dema_update(alpha, new_value, expected):
     result = dema.update(new_value, timedelta(seconds=1))
     assert result == expected
 
-# Additional test functions can be added here as needed.
+
+@pytest.mark.parametrize(
+    'name',
+    ['linear_regression', 'kalman', 'median', 'holt_winters'],
+)
+def test_rate_estimators(name):
+    estimator = algorithms.get_algorithm(name)()
+    assert estimator.eta(100) is None
+    for second in range(50):
+        rate = estimator.update(second * 10, timedelta(seconds=second))
+    assert rate == pytest.approx(10)
+    assert estimator.eta(100) == pytest.approx(10)
+
+    # Updates without elapsed time are ignored
+    assert estimator.update(10_000, 49) == rate
+
+
+def test_holt_winters_trend():
+    estimator = algorithms.HoltWinters(alpha=0.5, beta=0.5)
+    for second in range(50):
+        # A rate of 100 dropping by 1 per second
+        estimator.update(100 * second - second**2 / 2, second)
+    assert estimator.trend == pytest.approx(-1, rel=0.01)
+    assert estimator.eta(100) > 100 / estimator.rate
+
+
+def test_smoothing_eta_algorithm_by_name():
+    import progressbar
+
+    widget = progressbar.SmoothingETA('kalman')
+    assert isinstance(widget.smoothing_algorithm, algorithms.KalmanFilter)
+    with pytest.raises(ValueError):
+        progressbar.SmoothingETA('spam')
+
+
+@pytest.mark.parametrize(
+    'algorithm',
+    [
+        algorithms.ExponentialMovingAverage,
+        algorithms.DoubleExponentialMovingAverage,
+        algorithms.KalmanFilter,
+    ],
+)
+def test_update_many(algorithm):
+    values = [0, 5, 12, 13, 30, 31, 45, 60]
+    elapsed = [timedelta(seconds=second) for second in range(len(values))]
+    scalar = algorithm()
+    expected = [scalar.update(v, e) for v, e in zip(values, elapsed)]
+
+    batch = algorithm()
+    result = batch.update_many(values, elapsed)
+    assert isinstance(result, array.array)
+    assert list(result) == expected
+    # The state is kept so batches can be chained
+    assert batch.update(70, timedelta(seconds=8)) == scalar.update(
+        70,
+        timedelta(seconds=8),
+    )
+
+
+def test_update_many_alpha_grid():
+    numpy = pytest.importorskip('numpy')
+    values = numpy.arange(100.0) ** 1.5
+    alphas = numpy.linspace(0.1, 0.9, 9)
+
+    grid = algorithms.DoubleExponentialMovingAverage(alphas).update_many(
+        values,
+        range(100),
+    )
+    # The same rows as without NumPy
+    assert isinstance(grid, list)
+    assert all(isinstance(row, array.array) for row in grid)
+    assert numpy.asarray(grid).shape == (100, 9)
+    for column, alpha in enumerate(alphas.tolist()):
+        dema = algorithms.DoubleExponentialMovingAverage(alpha)
+        assert [row[column] for row in grid] == [
+            dema.update(value, elapsed)
+            for elapsed, value in enumerate(values.tolist())
+        ]
+
+
+@pytest.mark.parametrize(
+    'algorithm',
+    [
+        algorithms.ExponentialMovingAverage,
+        algorithms.DoubleExponentialMovingAverage,
+    ],
+)
+def test_update_many_alpha_grid_columns(algorithm):
+    values = [float(value) ** 1.5 for value in range(20)]
+    alphas = [0.1, 0.5, 0.9]
+
+    grid = algorithm(alphas)
+    rows = grid.update_many(values[:10], range(10))
+    # The state of every alpha is kept so batches can be chained
+    rows = [*rows, *grid.update_many(values[10:], range(10, 20))]
+    assert len(rows) == 20
+    assert all(isinstance(row, array.array) for row in rows)
+    for column, alpha in enumerate(alphas):
+        scalar = algorithm(alpha)
+        assert [row[column] for row in rows] == [
+            scalar.update(value, elapsed)
+            for elapsed, value in enumerate(values)
+        ]
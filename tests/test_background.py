@@ -0,0 +1,111 @@
+import io
+import threading
+import time
+
+import progressbar
+import pytest
+
+
+def wait_for(condition):
+    # The frozen `time.sleep` does not wait so use a real timeout
+    for _ in range(500):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError('Timed out')
+
+
+def test_background_progressbar():
+    fd = io.StringIO()
+    bar = progressbar.BackgroundProgressBar(
+        max_value=100,
+        fd=fd,
+        poll_interval=0.001,
+    ).start()
+    render_thread = bar._render_thread
+    assert render_thread.daemon
+    assert render_thread.is_alive()
+
+    for i in range(100):
+        bar.update(i + 1)
+        assert bar.value == i + 1
+
+    bar.finish()
+    assert not render_thread.is_alive()
+    assert bar._render_thread is None
+    assert '100%' in fd.getvalue()
+
+
+def test_background_progressbar_errors():
+    bar = progressbar.BackgroundProgressBar(
+        max_value=10,
+        fd=io.StringIO(),
+        variables=dict(spam=None),
+    ).start()
+    with pytest.raises(ValueError):
+        bar.update(11)
+    with pytest.raises(ValueError):
+        bar.update(-1)
+    with pytest.raises(TypeError):
+        bar.update(eggs=1)
+
+    bar.update(5, spam='eggs', force=True)
+    assert bar.variables.spam == 'eggs'
+    bar.finish(dirty=True)
+    assert bar.value == 5
+
+
+def test_background_progressbar_no_max_error():
+    bar = progressbar.BackgroundProgressBar(
+        max_value=10,
+        max_error=False,
+        fd=io.StringIO(),
+    ).start()
+    bar += 20
+    assert bar.value == 10
+    bar.finish()
+
+
+def test_background_progressbar_redraws():
+    fd = io.StringIO()
+    bar = progressbar.BackgroundProgressBar(
+        max_value=10,
+        fd=fd,
+        poll_interval=0.01,
+        widgets=[progressbar.Counter(), ' ', progressbar.Timer()],
+    ).start()
+    assert bar.start() is bar
+    updates = bar.updates
+
+    # The render thread draws the new value
+    bar.update(5)
+    wait_for(lambda: bar.updates > updates)
+    assert '5 Elapsed Time: 0:00:00' in fd.getvalue()
+
+    # And redraws the time sensitive widgets without updates
+    time.sleep(61)
+    wait_for(lambda: 'Elapsed Time: 0:01:01' in fd.getvalue())
+    assert bar.value == 5
+    bar.finish()
+
+
+def test_background_progressbar_render_error(caplog):
+    bar = progressbar.BackgroundProgressBar(
+        max_value=10,
+        fd=io.StringIO(),
+        poll_interval=0.01,
+    ).start()
+    thread = bar._render_thread
+
+    def fail(value):
+        raise RuntimeError('broken')
+
+    bar._update_parents = fail
+    bar.update(5, force=True)
+    # The render thread stops instead of failing on every interval
+    wait_for(lambda: not thread.is_alive())
+    assert 'Unable to render' in caplog.text
+
+    del bar._update_parents
+    bar.finish()
+    assert bar.finished()
@@ -0,0 +1,100 @@
+import io
+import json
+import socket
+import time
+
+import progressbar
+from progressbar import events
+
+
+def read_events(output):
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_event_stream_interval():
+    output = io.StringIO()
+    stream = events.EventStream(output, min_interval=1)
+    bar = stream.attach(
+        progressbar.ProgressBar(max_value=100, fd=io.StringIO()),
+    )
+    for _ in bar(range(100)):
+        time.sleep(0.25)
+
+    records = read_events(output)
+    assert records[0]['event'] == 'start'
+    assert records[-1]['event'] == 'finish'
+    assert records[-1]['value'] == 100
+    # One update per 4 items, besides the start and the finish
+    assert len(records) == 26
+    assert records[1]['rate'] == 4
+    assert records[1]['eta'] == 24
+
+
+def test_event_stream_multibar():
+    output = io.StringIO()
+    stream = events.EventStream(output)
+    multibar = progressbar.MultiBar(fd=io.StringIO())
+    multibar['a'].max_value = 10
+    stream.attach(multibar)
+    # Bars that are added later are attached as well
+    multibar['b'].max_value = 20
+
+    for key in ('a', 'b'):
+        multibar[key].start()
+        time.sleep(1)
+        multibar[key].update(5, force=True)
+        multibar[key].finish()
+
+    records = read_events(output)
+    assert [(record['label'], record['event']) for record in records] == [
+        ('a', 'start'),
+        ('a', 'update'),
+        ('a', 'finish'),
+        ('b', 'start'),
+        ('b', 'update'),
+        ('b', 'finish'),
+    ]
+
+
+def test_event_stream_headless_socket():
+    reader, writer = socket.socketpair()
+    with reader, writer:
+        with events.EventStream(writer) as stream:
+            bar = stream.progressbar(max_value=10, variables=dict(name='x'))
+            for i in range(10):
+                bar.update(i, name=str(i))
+            bar.finish()
+
+        writer.shutdown(socket.SHUT_WR)
+        data = reader.makefile().read()
+
+    records = [json.loads(line) for line in data.splitlines()]
+    assert records[0]['event'] == 'start'
+    assert records[-1] == dict(
+        event='finish',
+        value=10,
+        max_value=10,
+        percentage=100.0,
+        elapsed=0.0,
+        rate=None,
+        eta=None,
+        variables=dict(name='9'),
+    )
+
+
+def test_event_stream_attach_twice():
+    output = io.StringIO()
+    stream = events.EventStream(output)
+    multibar = progressbar.MultiBar(fd=io.StringIO())
+    bar = multibar['a']
+    stream.attach(multibar)
+    stream.attach(multibar)
+    stream.attach(bar)
+    assert multibar.event_streams == [stream]
+
+    bar.start(max_value=10)
+    bar.finish()
+    assert [record['event'] for record in read_events(output)] == [
+        'start',
+        'finish',
+    ]
@@ -58,3 +58,28 @@ def test_adding_value():
     p.increment(2)
     with pytest.raises(ValueError):
         p += 5
+
+
+def test_fast_iteration():
+    p = progressbar.ProgressBar()
+    assert list(p(range(1000), fast_iteration=True)) == list(range(1000))
+    assert p.value == 1000
+    assert p.end_time
+
+
+def test_fast_iteration_break():
+    p = progressbar.ProgressBar()
+    iterator = iter(p(range(100), fast_iteration=True))
+    for i in iterator:
+        if i == 10:
+            break
+    iterator.close()
+    assert p.value == 10
+    assert not p.end_time
+
+
+def test_fast_iteration_incorrect_max_value():
+    p = progressbar.ProgressBar(max_value=10)
+    with pytest.raises(ValueError):
+        for _i in p(iter(range(20)), fast_iteration=True):
+            time.sleep(0.001)
@@ -0,0 +1,103 @@
+import io
+import json
+import time
+from datetime import timedelta
+
+import progressbar
+
+
+def log_lines(bar):
+    return [json.loads(line) for line in bar.fd.getvalue().splitlines()]
+
+
+def test_log_steps():
+    bar = progressbar.LogProgressBar(
+        max_value=100,
+        log_step=25,
+        fd=io.StringIO(),
+        json_lines=True,
+    )
+    for _ in bar(range(100)):
+        pass
+
+    lines = log_lines(bar)
+    assert [line['event'] for line in lines] == [
+        'start',
+        'update',
+        'update',
+        'update',
+        'finish',
+    ]
+    assert [line['value'] for line in lines] == [0, 25, 50, 75, 100]
+    assert lines[-1]['percentage'] == 100
+
+
+def test_log_milestones_and_interval():
+    bar = progressbar.LogProgressBar(
+        max_value=1000,
+        log_step=None,
+        log_interval=125,
+        milestones=[90],
+        fd=io.StringIO(),
+        json_lines=True,
+    )
+    bar.start()
+    for i in range(1, 1000):
+        time.sleep(0.25)
+        bar.update(i)
+    bar.finish(dirty=True)
+
+    lines = log_lines(bar)
+    assert [line['event'] for line in lines] == [
+        'start',
+        'update',
+        'milestone',
+        'finish',
+    ]
+    assert lines[1]['value'] == 500
+    assert lines[2]['value'] == 900
+    assert lines[3]['value'] == 999
+    assert lines[3]['rate'] == 4
+
+
+def test_log_text_lines():
+    bar = progressbar.LogProgressBar(
+        max_value=10,
+        widgets=[progressbar.SimpleProgress()],
+        fd=io.StringIO(),
+    )
+    for _ in bar(range(10)):
+        pass
+
+    lines = bar.fd.getvalue().splitlines()
+    assert lines[0] == '0 of 10'
+    assert lines[-1] == '10 of 10'
+    assert len(lines) == 11
+
+
+def test_log_text_interval():
+    bar = progressbar.LogProgressBar(
+        max_value=1000,
+        log_step=None,
+        log_interval=timedelta(seconds=125),
+        widgets=[
+            '\x1b[1m',
+            progressbar.SimpleProgress(),
+            '\x1b[0m ',
+            progressbar.ETA(),
+        ],
+        fd=io.StringIO(),
+        enable_colors=False,
+    )
+    bar.start()
+    for i in range(1, 1000):
+        time.sleep(0.25)
+        bar.update(i)
+    bar.finish()
+
+    # The colors are stripped and the interval is converted to seconds
+    assert bar.fd.getvalue().splitlines() == [
+        '0 of 1000 ETA:  --:--:--',
+        '500 of 1000 ETA:   0:02:05',
+        '1000 of 1000 Time:  0:04:09',
+    ]
@@ -0,0 +1,169 @@
+import io
+import time
+import urllib.request
+
+import progressbar
+import pytest
+from progressbar import metrics
+
+
+def test_metrics_render():
+    exporter = metrics.MetricsExporter(labels=dict(job='test'))
+    bar = exporter.register(
+        progressbar.ProgressBar(max_value=100, fd=io.StringIO()),
+    )
+    # Progressbars are only exported once started
+    assert 'bar=' not in exporter.render()
+
+    bar.start()
+    time.sleep(10)
+    bar.update(25)
+    output = exporter.render()
+    assert f'progressbar_value{{job="test",bar="bar{bar.index}"}} 25' in (
+        output
+    )
+    assert 'progressbar_rate{job="test",bar="bar' in output
+    assert '# TYPE progressbar_updates_total counter' in output
+    openmetrics = exporter.render(openmetrics=True)
+    assert '# TYPE progressbar_updates counter' in openmetrics
+    assert 'progressbar_updates_total{' in output
+
+    record = exporter.collect()[0]
+    assert record['rate'] == 2.5
+    assert record['eta'] == 30
+    assert record['elapsed'] == 10
+    assert not record['finished']
+
+
+def test_metrics_multibar_and_samples(tmp_path):
+    exporter = metrics.MetricsExporter()
+    multibar = exporter.register(progressbar.MultiBar(fd=io.StringIO()))
+    multibar['with "quotes"'].max_value = 10
+    bar = multibar['samples']
+    bar.widgets = [progressbar.AdaptiveETA(samples=2)]
+    bar.max_value = 100
+    for key in multibar:
+        multibar[key].start()
+
+    for value in (10, 20, 60):
+        time.sleep(1)
+        bar.update(value, force=True)
+        bar.widgets[0].get_deltas(bar)
+
+    records = {record['bar']: record for record in exporter.collect()}
+    assert records['samples']['rate'] == 40
+    assert records['samples']['eta'] == 1
+
+    path = tmp_path / 'progress.prom'
+    exporter.write_textfile(path)
+    assert 'progressbar_value{bar="with \\"quotes\\""} 0' in (
+        path.read_text()
+    )
+
+
+def test_metrics_http():
+    exporter = metrics.MetricsExporter()
+    exporter.register(
+        progressbar.ProgressBar(max_value=10, fd=io.StringIO()),
+    ).start()
+    server = exporter.serve()
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+        with urllib.request.urlopen(url) as response:
+            assert response.headers['Content-Type'] == metrics.CONTENT_TYPE
+            assert b'progressbar_max_value{' in response.read()
+
+        request = urllib.request.Request(
+            url,
+            headers=dict(Accept='application/openmetrics-text'),
+        )
+        with urllib.request.urlopen(request) as response:
+            assert response.read().endswith(b'# EOF\n')
+    finally:
+        exporter.shutdown()
+
+
+def test_metrics_format_value():
+    assert metrics._format_value(True) == '1'
+    assert metrics._format_value(1.5) == '1.5'
+    assert metrics._format_value(float('nan')) == 'NaN'
+    assert metrics._format_value(float('inf')) == '+Inf'
+    assert metrics._format_value(float('-inf')) == '-Inf'
+
+
+def test_metrics_register():
+    exporter = metrics.MetricsExporter()
+    bar = progressbar.ProgressBar(fd=io.StringIO())
+    assert exporter.register(bar) is exporter.register(bar)
+    assert exporter.progressbars() == [bar]
+
+    exporter.unregister(bar)
+    exporter.unregister(bar)
+    assert exporter.progressbars() == []
+
+
+def test_metrics_sample_rate():
+    bar = progressbar.ProgressBar(
+        max_value=progressbar.UnknownLength,
+        fd=io.StringIO(),
+    ).start()
+    bar.extra['other'] = None
+    assert metrics.sample_rate(bar) is None
+
+    samples = bar.extra['samples'] = progressbar.utils.SampleBuffer()
+    samples.append(1.0, 0)
+    samples.append(1.0, 5)
+    # No time passed between the samples
+    assert metrics.sample_rate(bar) is None
+
+    samples.append(3.0, 15)
+    exporter = metrics.MetricsExporter()
+    exporter.register(bar)
+    record = exporter.collect()[0]
+    assert record['rate'] == 7.5
+    # Without a maximum value there is no ETA
+    assert record['eta'] is None
+
+
+def test_metrics_textfile_error(tmp_path, monkeypatch):
+    def replace(source, destination):
+        raise OSError
+
+    monkeypatch.setattr(metrics.os, 'replace', replace)
+    exporter = metrics.MetricsExporter()
+    path = tmp_path / 'progress.prom'
+    with pytest.raises(OSError):
+        exporter.write_textfile(path)
+    # The temporary file is removed again
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_metrics_textfile_every(tmp_path):
+    exporter = metrics.MetricsExporter()
+    bar = exporter.register(
+        progressbar.ProgressBar(max_value=10, fd=io.StringIO()),
+    ).start()
+    path = tmp_path / 'progress.prom'
+    thread = exporter.write_textfile_every(path, interval=3600)
+    bar.update(5)
+    # Without a server only the textfile writer is stopped
+    exporter.shutdown()
+    thread.join()
+    assert not thread.is_alive()
+    assert 'progressbar_value{bar="bar' in path.read_text()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_metrics_textfile_interval(tmp_path, monkeypatch):
+    exporter = metrics.MetricsExporter()
+    paths = []
+
+    def write_textfile(path):
+        paths.append(path)
+        if len(paths) == 3:
+            exporter._stopped.set()
+
+    monkeypatch.setattr(exporter, 'write_textfile', write_textfile)
+    exporter.write_textfile_every(tmp_path, interval=0).join()
+    # Written every interval and once more after stopping
+    assert paths == [tmp_path] * 4
@@ -1,9 +1,11 @@
+import io
 import random
 import threading
 import time
 
 import progressbar
 import pytest
+from progressbar import terminal
 
 N = 10
 BARS = 3
@@ -247,3 +249,203 @@ def test_multibar_threads():
     bar.finish()
     multibar.join()
     multibar.render(force=True)
+
+
+def test_multibar_changed_lines():
+    fd = io.StringIO()
+    multibar = progressbar.MultiBar(fd=fd)
+    multibar._write_changed_lines(['a', 'b', 'c'])
+    multibar._previous_output = ['a', 'b', 'c']
+    multibar.flush()
+    assert fd.getvalue().startswith('\n\n\n' + terminal.PREVIOUS_LINE(3) + 'a')
+
+    fd.seek(0)
+    fd.truncate(0)
+    multibar._write_changed_lines(['a', 'x', 'c'])
+    multibar.flush()
+    # Only the changed row is written and the cursor is moved back down
+    assert fd.getvalue() == (
+        terminal.PREVIOUS_LINE(2)
+        + 'x'
+        + terminal.CLEAR_LINE_RIGHT()
+        + terminal.NEXT_LINE(2)
+    )
+
+    fd.seek(0)
+    fd.truncate(0)
+    multibar._previous_output = ['a', 'x', 'c']
+    multibar._write_changed_lines(['a', 'x', 'c'])
+    multibar.flush()
+    assert fd.getvalue() == ''
+
+    multibar._write_changed_lines(['a'])
+    multibar.flush()
+    assert fd.getvalue().endswith(
+        terminal.CLEAR_LINE_RIGHT() + terminal.PREVIOUS_LINE(1),
+    )
+
+
+def test_multibar_viewport():
+    multibar = progressbar.MultiBar(
+        fd=io.StringIO(),
+        max_rows=3,
+        sort_key=progressbar.SortKey.VALUE,
+        sort_reverse=False,
+    )
+    bars = []
+    for i in range(10):
+        bar = multibar[f'bar {i}']
+        bar.max_value = 10
+        bar.start()
+        bar.update(i)
+        bars.append(bar)
+    bars[0].finish()
+
+    multibar.render(force=True)
+    output = multibar._previous_output
+    assert len(output) == 3
+    assert output[-1] == '7 more running / 0 waiting / 1 finished'
+    assert (
+        multibar._format_summary([bars[0], bars[1], progressbar.ProgressBar()])
+        == '1 more running / 1 waiting / 1 finished'
+    )
+    # Only the bars in the viewport are formatted
+    assert multibar._labeled == {bars[1], bars[2]}
+
+    multibar.max_rows = None
+    multibar.render()
+    assert len(multibar._previous_output) == 10
+
+
+def test_frame_scheduler():
+    scheduler = progressbar.FrameScheduler.for_stream(io.StringIO(), 0.01)
+    # Redirected output is rendered at most once per second
+    assert scheduler.min_interval == 1.0
+
+    scheduler = progressbar.FrameScheduler(
+        0.01,
+        idle_interval=0.1,
+        max_bytes_per_second=1000,
+    )
+    assert scheduler.frame(0.0, 0, active=True) == 0.01
+    intervals = [scheduler.frame(0.0, 0, active=False) for _ in range(5)]
+    assert intervals == [0.02, 0.04, 0.08, 0.1, 0.1]
+    # Bursts of updates reset the interval
+    assert scheduler.frame(0.0, 0, active=True) == 0.01
+    assert scheduler.frame(0.0, 100, active=True) == 0.1
+    assert scheduler.frame(0.01, 0, active=True) == pytest.approx(0.1)
+
+
+def test_multibar_update_wakes_render_loop():
+    multibar = progressbar.MultiBar(fd=io.StringIO())
+    bar = multibar['bar']
+    assert not multibar._updated.is_set()
+    bar.max_value = 10
+    bar.start()
+    bar.update(1)
+    assert multibar._updated.is_set()
+
+    multibar._updated.clear()
+    multibar.render()
+    assert not multibar._updated.is_set()
+
+    # Updates without changes don't need a redraw
+    bar.update(1)
+    assert not multibar._updated.is_set()
+
+
+class AttachRecorder:
+    def __init__(self):
+        self.attached = []
+
+    def attach(self, progress):
+        self.attached.append(progress)
+
+
+def test_multibar_attaches_bars_once():
+    multibar = progressbar.MultiBar(fd=io.StringIO())
+    recorder = AttachRecorder()
+    multibar.event_streams.append(recorder)
+    bar = multibar['a']
+    multibar['b'] = bar
+    assert recorder.attached == [bar]
+    assert bar.update_listener == multibar._bar_updated
+
+
+def test_multibar_sort_index():
+    calls = []
+
+    def keyfunc(bar):
+        calls.append(bar)
+        return bar.value
+
+    multibar = progressbar.MultiBar(fd=io.StringIO(), sort_keyfunc=keyfunc)
+    bars = [multibar[f'bar {i}'] for i in range(5)]
+    for bar in bars:
+        bar.max_value = 10
+        bar.start()
+
+    assert multibar.get_sorted_bars() == bars
+    calls.clear()
+    bars[2].update(5)
+    assert multibar.get_sorted_bars()[0] is bars[2]
+    # Only the updated bar is looked up again
+    assert calls == [bars[2]]
+
+    calls.clear()
+    assert multibar.get_sorted_bars()[0] is bars[2]
+    assert calls == []
+
+    multibar.sort_reverse = False
+    assert multibar.get_sorted_bars()[-1] is bars[2]
+
+    del multibar['bar 2']
+    assert bars[2] not in multibar.get_sorted_bars()
+
+
+def test_multibar_from_dict():
+    a = progressbar.ProgressBar(max_value=10)
+    b = progressbar.ProgressBar(max_value=10)
+    multibar = progressbar.MultiBar(
+        {'a': a, 'b': b},
+        fd=io.StringIO(),
+        sort_key='value',
+        sort_reverse=False,
+    )
+    assert a.label == 'a'
+    assert b.update_listener == multibar._bar_updated
+    assert multibar.get_sorted_bars() == [a, b]
+
+    a.start()
+    b.start()
+    a.update(5)
+    b.update(1)
+    assert [bar.value for bar in multibar.get_sorted_bars()] == [1, 5]
+
+
+def test_multibar_renders_changed_bars():
+    multibar = progressbar.MultiBar(
+        fd=io.StringIO(),
+        widgets=[progressbar.Counter()],
+    )
+    a = multibar['a'].start(max_value=10)
+    b = multibar['b'].start(max_value=10)
+    multibar.render()
+    updates = a.updates, b.updates
+
+    # Only the updated bar is formatted again
+    a.update(5)
+    multibar.render()
+    assert (a.updates, b.updates) == (updates[0] + 1, updates[1])
+    assert f"{'a':20} 5" in multibar._previous_output
+    multibar.render()
+    assert (a.updates, b.updates) == (updates[0] + 1, updates[1])
+
+    # Time sensitive widgets are redrawn after their poll interval
+    b.poll_interval = 1
+    time.sleep(1)
+    multibar.render()
+    assert (a.updates, b.updates) == (updates[0] + 1, updates[1] + 1)
+
+    multibar.render(force=True)
+    assert (a.updates, b.updates) == (updates[0] + 2, updates[1] + 2)
@@ -1,4 +1,6 @@
+import concurrent.futures
 import contextlib
+import io
 import os
 import time
 
@@ -74,3 +76,72 @@ def test_negative_maximum():
     with pytest.raises(ValueError), progressbar.ProgressBar(
             max_value=-1) as progress:
         progress.start()
+
+
+def test_threaded_increment():
+    bar = progressbar.ProgressBar(max_value=8000, fd=io.StringIO()).start()
+
+    def produce(_):
+        for _ in range(1000):
+            bar.increment()
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        list(executor.map(produce, range(8)))
+
+    # The increments that were not rendered yet are applied by the finish
+    bar.finish(dirty=True)
+    assert bar.value == 8000
+
+
+def test_threaded_increment_waits_for_update():
+    bar = progressbar.ProgressBar(
+        max_value=100,
+        fd=io.StringIO(),
+        min_poll_interval=1,
+    ).start()
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        executor.submit(bar.increment, 5).result()
+    assert bar.value == 5
+
+    # With multiple threads the increments wait until the bar needs an update
+    bar.increment()
+    assert bar.value == 5
+    time.sleep(1)
+    bar.increment()
+    assert bar.value == 7
+
+
+@pytest.mark.parametrize(
+    'bar_class',
+    [
+        progressbar.ProgressBar,
+        progressbar.BackgroundProgressBar,
+        progressbar.LogProgressBar,
+    ],
+)
+def test_listeners(bar_class):
+    calls = []
+
+    def listener(bar, event, **kwargs):
+        calls.append((event, kwargs))
+
+    bar = bar_class(max_value=10, fd=io.StringIO())
+    bar.add_listener(listener)
+    bar.add_listener(listener)
+    bar.start()
+    bar.update(5)
+    bar.update(6, force=True)
+    bar.finish()
+    # The updates within `start()` and `finish()` are part of those calls
+    assert calls == [
+        ('start', {}),
+        ('update', dict(force=False)),
+        ('update', dict(force=True)),
+        ('finish', dict(dirty=False)),
+    ]
+
+    bar.remove_listener(listener)
+    bar.remove_listener(listener)
+    bar.start()
+    bar.finish(dirty=True)
+    assert len(calls) == 4
@@ -1,5 +1,9 @@
 import io
+import os
+import pathlib
+import time
 
+import progressbar
 import progressbar.__main__ as main
 import pytest
 
@@ -97,6 +101,47 @@ def test_main_bytes_output(monkeypatch, tmp_path):
     assert output_filename.read_text() == f'{text}'
 
 
+def test_main_widgets(monkeypatch, tmp_path):
+    bars = []
+
+    class ProgressBar(progressbar.ProgressBar):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            bars.append(self)
+
+    monkeypatch.setattr(progressbar, 'ProgressBar', ProgressBar)
+    main.main(['-e', '-o', str(tmp_path / 'output'), __file__])
+
+    # The transfer widgets are used without a rate limit as well
+    (bar,) = bars
+    widget_types = [type(widget) for widget in bar.widgets]
+    assert progressbar.FileTransferSpeed in widget_types
+    assert progressbar.AdaptiveETA in widget_types
+    assert progressbar.AdaptiveTransferSpeed not in widget_types
+
+
+def test_main_rate_limit(tmp_path):
+    output_filename = tmp_path / 'output'
+    start = time.monotonic()
+    main.main(['-L', '1k', '-o', str(output_filename), __file__])
+
+    size = os.path.getsize(__file__)
+    assert output_filename.read_bytes() == pathlib.Path(__file__).read_bytes()
+    assert time.monotonic() - start == pytest.approx(size / 1024, abs=0.2)
+
+
+def test_main_discard(tmp_path):
+    output_filename = tmp_path / 'output'
+    main.main(['-X', '-o', str(output_filename), __file__])
+    assert not output_filename.exists()
+
+
+def test_main_direct_io_sync(tmp_path):
+    output_filename = tmp_path / 'output'
+    main.main(['-K', '-Y', '-o', str(output_filename), __file__])
+    assert output_filename.read_bytes() == pathlib.Path(__file__).read_bytes()
+
+
 def test_missing_input(tmp_path):
     with pytest.raises(SystemExit):
         main.main([str(tmp_path / 'output')])
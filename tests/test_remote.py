@@ -0,0 +1,101 @@
+import io
+import json
+import socket
+import threading
+import time
+
+import progressbar
+import pytest
+from progressbar import remote
+
+
+def wait_for(condition):
+    # The frozen `time.sleep` does not wait so use a real timeout
+    for _ in range(500):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError('Timed out')
+
+
+def test_remote_coalescing(tmp_path):
+    path = str(tmp_path / 'progress.sock')
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(path)
+    listener.listen()
+
+    progress = remote.RemoteProgressBar(
+        path,
+        label='job',
+        send_interval=1,
+        max_value=100,
+    )
+    connection, _ = listener.accept()
+    for _ in progress(range(100)):
+        time.sleep(0.25)
+
+    # Close the client side so the reads stop at the end of the messages
+    progress.connection.socket.shutdown(socket.SHUT_WR)
+    with connection, connection.makefile('rb') as fh:
+        data = fh.read()
+    listener.close()
+
+    messages = [json.loads(line) for line in data.splitlines()]
+    assert messages[0]['event'] == 'start'
+    assert messages[-1]['event'] == 'finish'
+    assert messages[-1]['value'] == 100
+    # One update per 4 items, besides the start and the finish
+    assert len(messages) == 26
+    assert {message['label'] for message in messages} == {'job'}
+
+    multibar = progressbar.MultiBar(fd=io.StringIO())
+    remote.MultiBarServer(multibar, path).handle(data.splitlines())
+    assert multibar['job'].value == 100
+    assert multibar['job'].max_value == 100
+    assert multibar['job'].finished()
+
+
+def test_remote_server(tmp_path):
+    path = tmp_path / 'progress.sock'
+    multibar = progressbar.MultiBar(fd=io.StringIO())
+    with multibar.serve(path):
+        progress = remote.RemoteProgressBar(
+            path,
+            label='job',
+            max_value=10,
+            variables=dict(name='a'),
+        )
+        progress.start()
+        progress.update(5, name='b')
+        progress.finish(dirty=True)
+        wait_for(lambda: 'job' in multibar and multibar['job'].finished())
+
+    assert not path.exists()
+    assert multibar['job'].value == 5
+    assert multibar['job'].variables['name'] == 'b'
+
+
+def test_remote_server_disconnect():
+    multibar = progressbar.MultiBar(fd=io.StringIO())
+    server = remote.MultiBarServer(multibar, 'unused')
+    message = dict(event='start', label='job', value=0, max_value=None)
+    server.handle([json.dumps(message).encode(), b'invalid'])
+    # Disconnected clients leave their progressbars in the current state
+    assert multibar['job'].finished()
+    assert multibar['job'].max_value is progressbar.UnknownLength
+
+
+def test_remote_without_server(tmp_path, monkeypatch):
+    monkeypatch.delenv(remote.SOCKET_ENV, raising=False)
+    with pytest.raises(ValueError):
+        remote.RemoteProgressBar()
+
+    monkeypatch.setenv(remote.SOCKET_ENV, str(tmp_path / 'missing.sock'))
+    events = []
+    with remote.RemoteProgressBar(max_value=10) as progress:
+        progress.add_listener(
+            lambda bar, event, **kwargs: events.append(event),
+        )
+        progress.update(5)
+    assert progress.value == 10
+    assert events == ['start', 'update', 'finish']
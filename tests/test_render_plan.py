@@ -0,0 +1,118 @@
+import progressbar
+from progressbar import bar as bar_module
+
+
+class CountingPercentage(progressbar.Percentage):
+    calls = 0
+
+    def __call__(self, progress, data, format=None):
+        CountingPercentage.calls += 1
+        return super().__call__(progress, data, format)
+
+
+def test_render_plan_classification():
+    bar = progressbar.ProgressBar(
+        max_value=10,
+        widgets=[
+            'static ',
+            progressbar.Percentage(),
+            ' ',
+            progressbar.Timer(),
+            progressbar.Bar(),
+            progressbar.Counter('%(value)d %(elapsed)s'),
+        ],
+    ).start()
+    plan = bar_module.RenderPlan(bar)
+    assert plan.value_indices == [1]
+    assert plan.time_indices == [3, 5]
+    assert plan.auto_indices == [4]
+    assert plan.fragments[:1] == ['static ']
+    bar.finish()
+
+
+def test_render_plan_caches_value_widgets():
+    CountingPercentage.calls = 0
+    bar = progressbar.ProgressBar(
+        max_value=10,
+        widgets=[CountingPercentage(), ' ', progressbar.Bar()],
+    )
+    bar.start()
+    calls = CountingPercentage.calls
+    bar.update(0, force=True)
+    assert CountingPercentage.calls == calls
+
+    bar.update(5, force=True)
+    assert CountingPercentage.calls == calls + 1
+    line = progressbar.utils.no_color(bar._format_line())
+    assert line.startswith(' 50%')
+    bar.finish()
+
+
+def test_render_plan_recompiles_on_change():
+    bar = progressbar.ProgressBar(max_value=10, term_width=60).start()
+    plan = bar._render_plan
+    assert plan.matches(bar)
+
+    bar.widgets.insert(0, 'label ')
+    assert not plan.matches(bar)
+    assert bar._format_line().startswith('label ')
+    assert bar._render_plan is not plan
+
+    bar.term_width = 100
+    assert bar.custom_len(bar._format_line()) == 100
+    bar.finish()
+
+
+def test_lazy_data():
+    bar = progressbar.ProgressBar(max_value=10).start()
+    bar.update(5)
+    data = bar.data()
+    assert not dict.__contains__(data, 'percentage')
+    assert data['percentage'] == 50
+    assert dict.__contains__(data, 'percentage')
+    assert data['total_seconds_elapsed'] >= 0
+    assert 'time_elapsed' in data.copy()
+    bar.finish()
+
+
+def test_render_plan_dependencies():
+    bar = progressbar.ProgressBar(
+        max_value=10,
+        widgets=[progressbar.Percentage(), ' ', progressbar.Timer()],
+    ).start()
+    dependencies = bar._render_plan.dependencies
+    assert 'percentage' in dependencies[0]
+    assert 'total_seconds_elapsed' in dependencies[2]
+    assert 1 not in dependencies
+    bar.finish()
+
+
+class ElapsedCounter(progressbar.widgets.WidgetBase):
+    value_dependent = True
+
+    def __call__(self, progress, data, format=None):
+        return f'{data["value"]} in {data["seconds_elapsed"]:.0f}s'
+
+
+class VariablesLabel(progressbar.widgets.WidgetBase):
+    value_dependent = True
+
+    def __call__(self, progress, data, format=None):
+        return ' '.join(map(str, data['variables'].values()))
+
+
+def test_render_plan_dependencies_reclassify():
+    bar = progressbar.ProgressBar(
+        max_value=10,
+        widgets=[ElapsedCounter(), ' ', VariablesLabel()],
+        variables=dict(spam='eggs'),
+    ).start()
+    plan = bar._render_plan
+    # The widget reads the elapsed time so it can't be cached
+    assert plan.value_indices == [2]
+    assert plan.time_indices == [0]
+    assert plan.all_variables
+
+    bar.update(spam='bacon', force=True)
+    assert bar._format_line().startswith('0 in 0s bacon')
+    bar.finish()
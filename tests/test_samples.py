@@ -109,3 +109,20 @@ def test_timedelta_no_update():
     bar.update(3)
     assert samples_widget(bar, None, True) == (timedelta(0, 1), 1)
     assert samples_widget(bar, None, False)[1] == [1, 2]
+
+
+def test_sample_buffer():
+    samples_widget = widgets.SamplesMixin(samples=3)
+    samples_widget.INTERVAL = timedelta(0)
+    bar = progressbar.ProgressBar(widgets=[samples_widget])
+
+    for i in range(10):
+        bar.value = i * 2
+        bar._last_update_time = float(i)
+        samples_widget.get_deltas(bar)
+
+    buffer = samples_widget.get_samples(bar)
+    # The ring buffer is preallocated and never grows
+    assert buffer.capacity == 4
+    assert buffer.values() == [14, 16, 18]
+    assert samples_widget.get_deltas(bar) == (2.0, 4)
@@ -0,0 +1,42 @@
+import io
+import multiprocessing
+import pickle
+
+import progressbar
+from progressbar import shared
+
+
+def work(counter, items):
+    for _ in range(items):
+        counter += 1
+
+
+def test_shared_counter():
+    with shared.SharedCounter(slots=4) as counter:
+        counter += 2
+        counter.increment(3, slot=3)
+        assert counter.value == 5
+        assert counter.counts[counter.slot] == 2
+
+        counter.reset()
+        assert counter.value == 0
+
+
+def test_shared_counter_pickle():
+    with shared.SharedCounter() as counter:
+        attached = pickle.loads(pickle.dumps(counter))
+        assert attached.name == counter.name
+        assert not attached.owner
+        attached.increment(5, slot=1)
+        assert counter.value == 5
+        attached.close()
+
+
+def test_shared_counter_pool():
+    bar = progressbar.ProgressBar(max_value=1000, fd=io.StringIO())
+    with shared.SharedCounter() as counter, multiprocessing.Pool(2) as pool:
+        result = pool.starmap_async(work, [(counter, 100)] * 10)
+        assert counter.watch(bar, result, interval=0.001) == 1000
+
+    assert bar.value == 1000
+    assert bar.end_time
@@ -1,7 +1,9 @@
 import datetime
+import io
 import time
 
 import progressbar
+import pytest
 
 
 def test_timer():
@@ -185,3 +187,20 @@ def test_eta_not_available():
     bar = progressbar.ProgressBar(widgets=widgets)
     for _i in bar(gen()):
         pass
+
+
+@pytest.mark.parametrize('widget', [progressbar.ETA, progressbar.AdaptiveETA])
+def test_eta_output(widget):
+    p = progressbar.ProgressBar(
+        max_value=10,
+        widgets=[widget()],
+        fd=io.StringIO(),
+    ).start()
+    for i in range(5):
+        time.sleep(2)
+        p.update(i + 1)
+    # 5 items in 10 seconds so 5 more items take another 10 seconds
+    assert progressbar.utils.no_color(p._format_line()).strip() == (
+        'ETA:   0:00:10'
+    )
+    p.finish()
@@ -1,3 +1,4 @@
+import timeit
 from datetime import timedelta
 
 import progressbar
@@ -57,3 +58,41 @@ def test_intervals(monkeypatch, interval):
     bar._last_update_time -= 2
     bar.update(3)
     assert bar.last_update_time != last_update_time
+
+
+def test_monotonic_timer(monkeypatch):
+    timer = [100.0]
+    monkeypatch.setattr(timeit, 'default_timer', lambda: timer[0])
+    bar = progressbar.ProgressBar(max_value=10).start()
+    start_time = bar.start_time
+
+    # The wall clock is frozen so the elapsed time only comes from the timer
+    timer[0] += 5
+    data = bar.data()
+    assert data['total_seconds_elapsed'] == 5
+    assert data['time_elapsed'] == timedelta(seconds=5)
+    assert (bar.last_update_time - start_time).total_seconds() == (
+        pytest.approx(5)
+    )
+
+    # The datetime views are only created when used
+    assert not dict.__contains__(data, 'start_time')
+    assert data['start_time'] == start_time
+
+    # Setting the datetime views moves the timers
+    bar.start_time = start_time - timedelta(seconds=10)
+    assert bar._start_timer == pytest.approx(90)
+    bar.finish()
+
+
+def test_elapsed_days(monkeypatch):
+    timer = [0.0]
+    monkeypatch.setattr(timeit, 'default_timer', lambda: timer[0])
+    bar = progressbar.ProgressBar(max_value=10).start()
+
+    timer[0] += timedelta(days=2, hours=3, seconds=5).total_seconds()
+    data = bar.data()
+    assert data['days_elapsed'] == 2
+    assert int(data['hours_elapsed']) == 3
+    assert data['seconds_elapsed'] == 5
+    bar.finish()
@@ -0,0 +1,130 @@
+import io
+
+import progressbar
+import pytest
+from progressbar import tracing
+
+
+def record(fd, clock):
+    with clock.patch(), tracing.TraceRecorder(fd) as recorder:
+        bar = recorder.attach(
+            progressbar.ProgressBar(
+                max_value=100,
+                fd=io.StringIO(),
+                widgets=[progressbar.Variable('name'), progressbar.ETA()],
+                variables=dict(name='a'),
+            ),
+        )
+        bar.start()
+        for i in range(1, 100):
+            clock.advance(0.01 * (i % 7))
+            bar.update(i, name='b' if i > 50 else 'a')
+        bar.finish()
+    return bar
+
+
+def test_record_and_replay():
+    output = io.StringIO()
+    bar = record(output, tracing.FakeClock())
+    events = list(tracing.read_trace(io.StringIO(output.getvalue())))
+
+    assert events[0]['event'] == 'start'
+    assert events[0]['max_value'] == 100
+    assert events[0]['variables'] == dict(name='a')
+    assert events[-1]['event'] == 'finish'
+    assert len(events) == 101
+    # Only the changed variables are recorded
+    changed = [event for event in events if 'variables' in event]
+    assert [event['value'] for event in changed] == [0, 51]
+
+    replayed = tracing.replay(
+        events,
+        fd=io.StringIO(),
+        widgets=[progressbar.Variable('name'), progressbar.ETA()],
+    )
+    assert replayed.value == 100
+    assert replayed.variables['name'] == 'b'
+    assert replayed.updates == bar.updates
+    elapsed = replayed.end_time - replayed.start_time
+    assert elapsed.total_seconds() == pytest.approx(events[-1]['elapsed'])
+
+
+def test_gzip_trace(tmp_path):
+    path = tmp_path / 'trace.ndjson.gz'
+    record(path, tracing.FakeClock())
+    events = list(tracing.read_trace(path))
+    assert len(events) == 101
+    assert tracing.replay(path, fd=io.StringIO()).value == 100
+
+
+def test_record_multiple_bars(tmp_path):
+    path = tmp_path / 'trace.ndjson'
+    clock = tracing.FakeClock()
+    with clock.patch(), tracing.TraceRecorder(path) as recorder:
+        a = recorder.attach(
+            progressbar.ProgressBar(max_value=10, fd=io.StringIO()),
+        )
+        b = recorder.attach(progressbar.ProgressBar(fd=io.StringIO()))
+        # Attaching again does not record the events twice
+        assert recorder.attach(a) is a
+        a.start()
+        b.start()
+        clock.advance(1)
+        a.max_value = 20
+        a.update(5, force=True)
+        b.update(3)
+        a.finish(dirty=True)
+        b.finish()
+
+    events = list(tracing.read_trace(path))
+    assert [(event['bar'], event['event']) for event in events] == [
+        (0, 'start'),
+        (1, 'start'),
+        (0, 'update'),
+        (1, 'update'),
+        (0, 'finish'),
+        (1, 'finish'),
+    ]
+    assert events[1]['max_value'] is None
+    assert events[2]['max_value'] == 20
+    assert events[2]['force']
+    assert events[4]['dirty']
+
+    # Only the first bar is replayed, empty lines are skipped
+    trace = io.StringIO('\n'.join(path.read_text().splitlines()) + '\n\n')
+    replayed = tracing.replay(trace, fd=io.StringIO())
+    assert replayed.max_value == 20
+    assert replayed.value == 5
+    assert replayed.finished()
+
+    replayed = tracing.replay(
+        [dict(event, bar=0) for event in events if event['bar'] == 1],
+        fd=io.StringIO(),
+    )
+    assert replayed.max_value is progressbar.UnknownLength
+    assert replayed.value == 3
+
+
+def test_replay_partial_trace():
+    # Without a start event the progressbar starts at the first event
+    replayed = tracing.replay(
+        [dict(event='update', elapsed=1.0, value=5)],
+        fd=io.StringIO(),
+    )
+    assert replayed.value == 5
+    assert replayed.max_value is progressbar.UnknownLength
+
+    start = dict(event='start', elapsed=0.0, value=0, max_value=10)
+    replayed = tracing.replay(
+        [start, dict(event='update', elapsed=1.0, value=4), start],
+        fd=io.StringIO(),
+    )
+    # Starting again keeps the state
+    assert replayed.value == 4
+
+    # Unknown events are ignored
+    unknown = dict(event='milestone', elapsed=1.0, value=8)
+    assert tracing.replay([start, unknown], fd=io.StringIO()).value == 0
+
+    with pytest.raises(ValueError):
+        tracing.replay([], fd=io.StringIO())
@@ -0,0 +1,383 @@
+import errno
+import io
+import mmap
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+from progressbar import transfer
+
+DATA = os.urandom(100_000)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'source'
+    path.write_bytes(DATA)
+    with path.open('rb') as fh:
+        yield fh
+
+
+def test_transfer_buffered():
+    output = io.BytesIO()
+    progress = []
+    transfer_ = transfer.Transfer(output, progress.append, buffer_size=4096)
+    assert transfer_.copy(io.BytesIO(DATA)) == len(DATA)
+    assert transfer_.copy(io.BytesIO(DATA)) == len(DATA)
+    assert transfer_.method == 'buffered'
+    assert output.getvalue() == DATA * 2
+    assert progress[0] == 4096
+    assert progress[-1] == transfer_.transferred == len(DATA) * 2
+
+
+@pytest.mark.skipif(
+    not hasattr(os, 'copy_file_range'),
+    reason='copy_file_range is not available',
+)
+def test_transfer_file_to_file(tmp_path, source):
+    with (tmp_path / 'output').open('wb') as output:
+        # Buffered writes must be flushed before the zero-copy writes
+        output.write(b'header')
+        transfer_ = transfer.Transfer(output)
+        assert transfer_.copy(source) == len(DATA)
+
+    assert transfer_.method in ('copy_file_range', 'sendfile')
+    assert (tmp_path / 'output').read_bytes() == b'header' + DATA
+
+
+@pytest.mark.skipif(not hasattr(os, 'splice'), reason='splice is required')
+def test_transfer_pipe(tmp_path):
+    read_fd, write_fd = os.pipe()
+    # The data fits in the pipe so the writing does not block
+    os.write(write_fd, DATA[:4096])
+    os.close(write_fd)
+
+    output = tmp_path / 'output'
+    with open(read_fd, 'rb') as reader, output.open('wb') as fh:
+        transfer_ = transfer.Transfer(fh)
+        assert transfer_.copy(reader) == 4096
+
+    assert transfer_.method == 'splice'
+    assert output.read_bytes() == DATA[:4096]
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith('linux'),
+    reason='sendfile without an offset is Linux only',
+)
+def test_transfer_file_to_socket(source):
+    sender, receiver = socket.socketpair()
+    received = bytearray()
+
+    def receive():
+        while len(received) < len(DATA):
+            received.extend(receiver.recv(65536))
+
+    thread = threading.Thread(target=receive)
+    thread.start()
+    with sender, receiver, sender.makefile('wb') as output:
+        transfer_ = transfer.Transfer(output)
+        assert transfer_.copy(source) == len(DATA)
+        thread.join()
+
+    assert transfer_.method == 'sendfile'
+    assert bytes(received) == DATA
+
+
+def test_transfer_without_zero_copy(tmp_path, source):
+    with (tmp_path / 'output').open('wb') as output:
+        transfer_ = transfer.Transfer(output, zero_copy=False)
+        transfer_.copy(source)
+
+    assert transfer_.method == 'buffered'
+    assert (tmp_path / 'output').read_bytes() == DATA
+
+
+def test_transfer_adaptive_buffer():
+    data = DATA * 100
+    output = io.BytesIO()
+    progress = []
+    transfer_ = transfer.Transfer(output, progress.append, update_interval=60)
+    assert transfer_.copy(io.BytesIO(data)) == len(data)
+    assert output.getvalue() == data
+    # The fast copies grow the buffer
+    assert transfer_.policy.size > transfer_.policy.min_size
+    # The first chunk and the total at the end
+    assert progress == [transfer_.policy.min_size, len(data)]
+
+
+def test_buffer_policy():
+    policy = transfer.BufferPolicy(min_size=4, max_size=16)
+    # A pipe smaller than the minimum size does not shrink the buffer
+    policy.fit_pipe(2)
+    assert policy.limit == 4
+    policy.fit_pipe(None)
+    assert policy.limit == 16
+    assert policy.update(4, 4, 0.001) == 8
+    # A slow chunk shrinks the buffer again
+    assert policy.update(8, 8, 1) == 4
+    assert policy.update(4, 4, 1) == 4
+    assert policy.update(4, 4, 0.01) == 4
+
+
+@pytest.mark.skipif(
+    transfer.F_GETPIPE_SZ is None,
+    reason='F_GETPIPE_SZ is required',
+)
+def test_transfer_grows_pipes():
+    # The raw values of Linux, also without the constants of Python 3.10+
+    assert (transfer.F_SETPIPE_SZ, transfer.F_GETPIPE_SZ) == (1031, 1032)
+    read_fd, write_fd = os.pipe()
+    with open(read_fd, 'rb') as reader, open(write_fd, 'wb') as writer:
+        size = transfer.fcntl.fcntl(read_fd, transfer.F_GETPIPE_SZ)
+        transfer_ = transfer.Transfer(writer)
+        transfer_.copy(io.BytesIO(b'data'))
+        writer.flush()
+        capacity = transfer.fcntl.fcntl(read_fd, transfer.F_GETPIPE_SZ)
+        assert capacity >= size
+        assert reader.read(4) == b'data'
+
+    # The buffer never grows beyond what the pipe holds
+    assert transfer_.policy.pipe_size == capacity
+    assert transfer_.policy.limit == max(capacity, transfer_.policy.min_size)
+
+    # Other outputs are not limited
+    transfer_.output = io.BytesIO()
+    transfer_.copy(io.BytesIO(b'data'))
+    assert transfer_.policy.pipe_size is None
+
+
+@pytest.mark.skipif(
+    transfer.F_GETPIPE_SZ is None,
+    reason='F_GETPIPE_SZ is required',
+)
+def test_transfer_pipe_size_limits(monkeypatch):
+    fcntl = transfer.fcntl.fcntl
+
+    def fcntl_without_resize(fd, command, arg=0):
+        if command == transfer.F_SETPIPE_SZ:
+            raise OSError(errno.EPERM, os.strerror(errno.EPERM))
+        return fcntl(fd, command, arg)
+
+    # The pipe keeps its size if it cannot be enlarged
+    monkeypatch.setattr(transfer.fcntl, 'fcntl', fcntl_without_resize)
+    read_fd, write_fd = os.pipe()
+    with open(read_fd, 'rb') as reader, open(write_fd, 'wb') as writer:
+        capacity = fcntl(read_fd, transfer.F_GETPIPE_SZ)
+        writer.write(DATA[:1024])
+        writer.close()
+        transfer_ = transfer.Transfer(io.BytesIO(), zero_copy=False)
+        assert transfer_.copy(reader) == 1024
+    assert transfer_.policy.pipe_size == capacity
+    assert transfer_.policy.size <= capacity
+
+
+def test_rate_limiter():
+    limiter = transfer.RateLimiter(1000, burst=100)
+    output = io.BytesIO()
+    transfer_ = transfer.Transfer(output, rate_limiter=limiter)
+    start = time.monotonic()
+    assert transfer_.copy(io.BytesIO(DATA[:10_000])) == 10_000
+    # The first 100 bytes are the burst
+    assert time.monotonic() - start == pytest.approx(9.9, rel=0.01)
+    assert output.getvalue() == DATA[:10_000]
+
+    with pytest.raises(ValueError):
+        transfer.RateLimiter(0)
+
+
+@pytest.mark.skipif(not transfer.O_DIRECT, reason='O_DIRECT is required')
+def test_transfer_direct_io(tmp_path, source):
+    output = tmp_path / 'output'
+    with output.open('wb') as fh:
+        transfer_ = transfer.Transfer(fh, direct_io=True)
+        # The size is not a whole amount of pages
+        assert transfer_.copy(source) == len(DATA)
+        flags = transfer.fcntl.fcntl(fh.fileno(), transfer.fcntl.F_GETFL)
+
+    assert transfer_.method == 'direct'
+    assert output.read_bytes() == DATA
+    # The flags are restored after the copy
+    assert not flags & transfer.O_DIRECT
+
+
+def test_transfer_discard(source):
+    transfer_ = transfer.Transfer(None, buffer_size=4096)
+    assert transfer_.copy(source) == len(DATA)
+    assert transfer_.copy(io.BytesIO(DATA)) == len(DATA)
+    assert transfer_.method == 'buffered'
+
+
+def test_transfer_sync(tmp_path, source, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, 'fdatasync', synced.append, raising=False)
+    monkeypatch.setattr(os, 'fsync', synced.append)
+    with (tmp_path / 'output').open('wb') as fh:
+        transfer_ = transfer.Transfer(fh, buffer_size=4096, sync=True)
+        transfer_.copy(source)
+        # The output is synced at the end of every copy
+        assert synced == [fh.fileno()]
+
+        # And periodically during the copy
+        monkeypatch.setattr(transfer, 'SYNC_INTERVAL', 0)
+        source.seek(0)
+        transfer_.copy(source)
+        assert len(synced) > 2
+        synced.clear()
+
+    # Pipes and other streams cannot be synced
+    transfer.Transfer(io.BytesIO(), sync=True).copy(io.BytesIO(DATA))
+    assert not synced
+
+
+def test_transfer_empty_file(tmp_path):
+    path = tmp_path / 'empty'
+    path.write_bytes(b'')
+    output = tmp_path / 'output'
+    with path.open('rb') as source, output.open('wb') as fh:
+        transfer_ = transfer.Transfer(fh)
+        assert transfer_.copy(source) == 0
+    # Files without a size are copied with reads, like the files in `/proc`
+    assert transfer_.method == 'buffered'
+
+
+def test_transfer_read_without_readinto():
+    class Reader:
+        def __init__(self, data):
+            self.stream = io.BytesIO(data)
+
+        def read(self, size):
+            return self.stream.read(size)
+
+    output = io.BytesIO()
+    transfer_ = transfer.Transfer(output, buffer_size=4096)
+    assert transfer_.copy(Reader(DATA)) == len(DATA)
+    assert output.getvalue() == DATA
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith('linux'),
+    reason='sendfile without an offset is Linux only',
+)
+def test_transfer_zero_copy_fallback(tmp_path, source, monkeypatch):
+    def unsupported(input_fd, output_fd, count):
+        raise OSError(errno.EXDEV, 'Invalid cross-device link')
+
+    # The next method continues where the unsupported one stopped
+    monkeypatch.setattr(transfer, '_copy_file_range', unsupported)
+    with (tmp_path / 'output').open('wb') as output:
+        transfer_ = transfer.Transfer(output)
+        assert transfer_.copy(source) == len(DATA)
+    assert transfer_.method == 'sendfile'
+    assert (tmp_path / 'output').read_bytes() == DATA
+
+    def failing(input_fd, output_fd, count):
+        raise OSError(errno.EIO, 'Input/output error')
+
+    # Other errors are not hidden by the fallback
+    monkeypatch.setattr(transfer, '_sendfile', failing)
+    source.seek(0)
+    with (tmp_path / 'output').open('wb') as output, pytest.raises(OSError):
+        transfer.Transfer(output).copy(source)
+
+
+@pytest.mark.skipif(not transfer.O_DIRECT, reason='O_DIRECT is required')
+def test_transfer_direct_io_unsupported(tmp_path, source, monkeypatch):
+    fcntl = transfer.fcntl.fcntl
+
+    def fcntl_without_direct(fd, command, arg=0):
+        if command == transfer.fcntl.F_SETFL and arg & transfer.O_DIRECT:
+            raise OSError(errno.EINVAL, 'Invalid argument')
+        return fcntl(fd, command, arg)
+
+    # Filesystems without `O_DIRECT` keep using the page cache
+    monkeypatch.setattr(transfer.fcntl, 'fcntl', fcntl_without_direct)
+    output = tmp_path / 'output'
+    with output.open('wb') as fh:
+        transfer_ = transfer.Transfer(fh, direct_io=True)
+        assert transfer_.copy(source) == len(DATA)
+    assert transfer_.method == 'direct'
+    assert output.read_bytes() == DATA
+
+    # Pipes are never opened with `O_DIRECT`
+    read_fd, write_fd = os.pipe()
+    with open(read_fd, 'rb') as reader, open(write_fd, 'wb') as writer:
+        writer.write(DATA[:4096])
+        writer.close()
+        transfer_ = transfer.Transfer(None, direct_io=True)
+        assert transfer_.copy(reader) == 4096
+
+
+@pytest.mark.skipif(not transfer.O_DIRECT, reason='O_DIRECT is required')
+def test_transfer_direct_io_unaligned(tmp_path, source, monkeypatch):
+    readv = os.readv
+    errors = [errno.EINVAL]
+
+    def unaligned_readv(fd, buffers):
+        if errors:
+            error = errors.pop()
+            raise OSError(error, os.strerror(error))
+        return readv(fd, buffers)
+
+    # A partially read input is read without `O_DIRECT`
+    monkeypatch.setattr(os, 'readv', unaligned_readv)
+    transfer_ = transfer.Transfer(None, direct_io=True)
+    assert transfer_.copy(source) == len(DATA)
+    assert not errors
+
+    errors.append(errno.EIO)
+    source.seek(0)
+    with pytest.raises(OSError):
+        transfer_.copy(source)
+
+
+@pytest.mark.skipif(not transfer.O_DIRECT, reason='O_DIRECT is required')
+def test_transfer_direct_io_write_error(tmp_path, source, monkeypatch):
+    def write(fd, data):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+    monkeypatch.setattr(os, 'write', write)
+    with (tmp_path / 'output').open('wb') as fh, pytest.raises(OSError):
+        transfer.Transfer(fh, direct_io=True).copy(source)
+
+
+@pytest.mark.skipif(not transfer.O_DIRECT, reason='O_DIRECT is required')
+def test_transfer_direct_io_closes_buffers(tmp_path, monkeypatch):
+    maps = []
+    mmap_ = mmap.mmap
+
+    def tracked_mmap(*args):
+        maps.append(mmap_(*args))
+        return maps[-1]
+
+    monkeypatch.setattr(mmap, 'mmap', tracked_mmap)
+    path = tmp_path / 'source'
+    path.write_bytes(DATA * 100)
+    with path.open('rb') as source:
+        transfer_ = transfer.Transfer(None, direct_io=True)
+        assert transfer_.copy(source) == len(DATA) * 100
+
+    # The buffer grows with the policy, the previous buffers are closed
+    assert len(maps) > 1
+    assert all(buffer.closed for buffer in maps)
+
+
+@pytest.mark.skipif(not transfer.O_DIRECT, reason='O_DIRECT is required')
+def test_transfer_direct_io_rate_limit(source):
+    consumed = []
+    limiter = transfer.RateLimiter(1e9, burst=mmap.PAGESIZE * 2.5)
+    limiter.consume = consumed.append
+    transfer_ = transfer.Transfer(None, rate_limiter=limiter, direct_io=True)
+    assert transfer_.copy(source) == len(DATA)
+    # The aligned chunks never exceed the burst
+    assert max(consumed) == mmap.PAGESIZE * 2
+
+    # But a chunk is at least a single page
+    consumed.clear()
+    limiter.burst = 1
+    source.seek(0)
+    transfer_.copy(source)
+    assert max(consumed) == mmap.PAGESIZE
@@ -0,0 +1,146 @@
+import io
+import os
+import types
+
+import progressbar
+import progressbar.__main__ as main
+import pytest
+from progressbar import watchfd
+
+pytestmark = pytest.mark.skipif(
+    not os.path.isdir(f'/proc/{os.getpid()}/fdinfo'),
+    reason='/proc is required',
+)
+
+
+def test_scan(tmp_path):
+    path = tmp_path / 'data'
+    path.write_bytes(b'x' * 100)
+    with path.open('rb') as fh:
+        fh.raw.read(25)
+        watched = watchfd.scan(os.getpid())
+        assert watched[fh.fileno()] == watchfd.WatchedFd(
+            fh.fileno(),
+            str(path),
+            25,
+            100,
+        )
+        assert list(watchfd.scan(os.getpid(), fh.fileno())) == [fh.fileno()]
+
+    with pytest.raises(FileNotFoundError):
+        watchfd.scan(-1)
+
+
+def test_fd_watcher(tmp_path):
+    path = tmp_path / 'data'
+    path.write_bytes(b'x' * 100)
+    multibar = progressbar.MultiBar(fd=io.StringIO())
+    with path.open('rb') as fh:
+        watcher = watchfd.FdWatcher(os.getpid(), fh.fileno(), multibar)
+        fh.raw.read(40)
+        assert watcher.poll()
+        progress = multibar[f'{fh.fileno()}:{path}']
+        assert progress.value == 40
+        assert progress.max_value == 100
+        assert progress.started()
+        assert not progress.finished()
+
+        fh.raw.read(20)
+        assert watcher.poll()
+        assert progress.value == 60
+
+    # Closed files are finished in their current state
+    assert watcher.poll()
+    assert progress.finished()
+    assert progress.value == 60
+
+    watcher.pid = -1
+    assert not watcher.poll()
+
+
+def test_scan_positions(tmp_path, monkeypatch):
+    path = tmp_path / 'data'
+    path.write_bytes(b'x' * 100)
+    assert watchfd._position(os.getpid(), -1) is None
+    assert watchfd._block_device_size(str(path)) == 100
+    assert watchfd._block_device_size(str(tmp_path / 'missing')) is None
+
+    with path.open('rb') as fh:
+        # Pretend the file is a block device, the size is read by seeking
+        monkeypatch.setattr(
+            watchfd,
+            'stat',
+            types.SimpleNamespace(
+                S_ISREG=lambda mode: False,
+                S_ISBLK=lambda mode: True,
+            ),
+        )
+        watched = watchfd.scan(os.getpid(), fh.fileno())
+        assert watched[fh.fileno()].size == 100
+
+        # Files without a readable position are skipped
+        monkeypatch.setattr(watchfd, '_position', lambda pid, fd: None)
+        assert watchfd.scan(os.getpid(), fh.fileno()) == {}
+
+
+def test_fd_watcher_unknown_size(tmp_path, monkeypatch):
+    path = tmp_path / 'data'
+    path.write_bytes(b'x' * 100)
+    monkeypatch.setattr(watchfd, '_block_device_size', lambda path: None)
+    monkeypatch.setattr(
+        watchfd,
+        'stat',
+        types.SimpleNamespace(
+            S_ISREG=lambda mode: False,
+            S_ISBLK=lambda mode: True,
+        ),
+    )
+    multibar = progressbar.MultiBar(fd=io.StringIO())
+    with path.open('rb') as fh:
+        watcher = watchfd.FdWatcher(os.getpid(), fh.fileno(), multibar)
+        fh.raw.read(10)
+        assert watcher.poll()
+        fh.raw.read(10)
+        assert watcher.poll()
+        progress = multibar[f'{fh.fileno()}:{path}']
+        assert progress.max_value is progressbar.UnknownLength
+        assert progress.value == 20
+
+        watcher.finish()
+        assert progress.finished()
+
+
+def test_fd_watcher_run():
+    watcher = watchfd.FdWatcher(os.getpid())
+    assert watcher.multibar.progressbar_kwargs == dict(max_error=False)
+
+    polls = iter([True, True, False])
+    watcher.multibar.fd = io.StringIO()
+    watcher.poll = lambda: next(polls)
+    watcher.run(0.1)
+    assert next(polls, None) is None
+
+
+def test_main_watchfd(monkeypatch):
+    intervals = []
+    monkeypatch.setattr(
+        watchfd.FdWatcher,
+        'run',
+        lambda self, interval: intervals.append(interval),
+    )
+    main.main(['-d', str(os.getpid()), '-i', '0.5'])
+    assert intervals == [0.5]
+
+    def run(self, interval):
+        raise PermissionError
+
+    monkeypatch.setattr(watchfd.FdWatcher, 'run', run)
+    with pytest.raises(SystemExit):
+        main.main(['-d', str(os.getpid())])
+
+
+def test_main_watchfd_errors():
+    with pytest.raises(SystemExit):
+        main.main(['-d', 'invalid'])
+    with pytest.raises(SystemExit):
+        main.main(['--watchfd=-1'])